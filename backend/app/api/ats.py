@@ -1,8 +1,17 @@
+import asyncio
+import time
+from typing import AsyncIterator, Dict, List, Tuple
 from fastapi import APIRouter, HTTPException
-from app.models.schemas import ATSRequest, ATSResponse
+from app.models.schemas import ATSBatchRequest, ATSRequest, ATSResponse
+from app.core.config import settings
+from app.core.request_context import Priority, use_priority
+from app.core.sse import format_ndjson, ndjson_response
+from app.services.ats_scorer import ats_scorer
 from app.services.vectorstore import vectorstore
+from app.services.profile_service import profile_service
 from app.models.llm_client import llm_client
 from app.core.logger import get_logger
+from app.core.tracing import span
 
 logger = get_logger(__name__)
 
@@ -10,74 +19,186 @@ router = APIRouter()
 
 @router.post("/ats", response_model=ATSResponse)
 async def analyze_ats(request: ATSRequest):
-    """Analyze resume for ATS compatibility with job description"""
+    """Analyze resume for ATS compatibility with job description
+
+    The score and keywords come from the local scoring engine; the LLM is only
+    called for narrative feedback when `use_llm` is set.
+    """
     try:
         # Get resume documents
         documents = vectorstore.get_documents(request.file_id)
         if not documents:
             raise ValueError(f"No documents found for file_id: {request.file_id}")
         
-        # Combine resume text
-        resume_text = "\n\n".join([doc["text"] for doc in documents])
+        with span("ats_score"):
+            result = ats_scorer.score(request.job_description, request.file_id, documents)
+        
+        feedback = result["feedback"]
+        suggestions = result["suggestions"]
+        engine = "local"
+        degraded = False
+        if request.use_llm:
+            try:
+                feedback, suggestions = await _llm_feedback(request.job_description, request.file_id, documents, result)
+                engine = "local+llm"
+            except Exception as e:
+                # The local analysis is still complete; narrative feedback is best-effort,
+                # so a missing API key, bad JSON or an outage must not fail the request
+                logger.warning("ATS narrative skipped, LLM failed: %s", e)
+                degraded = True
         
-        # Use similarity search to find relevant sections
-        relevant_docs = await vectorstore.similarity_search(
-            query=request.job_description,
+        return ATSResponse(
+            score=min(100, max(0, result["score"])),  # Clamp between 0-100
+            feedback=feedback[:10],  # Limit to 10 items
+            missing_keywords=result["missing_keywords"][:15],  # Limit to 15 items
+            suggestions=suggestions[:10],  # Limit to 10 items
             file_id=request.file_id,
-            top_k=5
+            matched_keywords=result["matched_keywords"][:30],
+            engine=engine,
+            degraded=degraded
         )
-        
-        # Generate ATS analysis using LLM
-        system_prompt = """You are an expert ATS (Applicant Tracking System) analyzer. Analyze resumes for compatibility with job descriptions.
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error("Error analyzing ATS: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error analyzing ATS: {str(e)}")
+
+async def _llm_feedback(job_description: str, file_id: str, documents: List[Dict],
+                        result: Dict) -> Tuple[List[str], List[str]]:
+    """Narrative feedback and suggestions from the LLM, grounded in the local analysis"""
+    resume_text = "\n\n".join([doc["text"] for doc in documents])
+    
+    system_prompt = """You are an expert ATS (Applicant Tracking System) analyzer. The resume has already been scored against the job description; explain the result.
 Provide:
-1. ATS score (0-100)
-2. Specific feedback on strengths and weaknesses
-3. Missing keywords from the job description
-4. Actionable suggestions for improvement"""
-        
-        user_prompt = f"""Analyze the following resume for ATS compatibility with this job description:
+1. Specific feedback on strengths and weaknesses
+2. Actionable suggestions for improvement"""
+    
+    user_prompt = f"""Review the following resume against this job description:
 
 JOB DESCRIPTION:
-{request.job_description[:2000]}
+{job_description[:2000]}
 
-RESUME:
+{profile_service.prompt_context(file_id)}RESUME:
 {resume_text[:3000]}
 
+ATS SCORE: {result["score"]}/100
+MATCHED KEYWORDS: {", ".join(result["matched_keywords"][:20]) or "none"}
+MISSING KEYWORDS: {", ".join(result["missing_keywords"][:15]) or "none"}
+
 Provide a JSON response with:
-- "score": number (0-100)
 - "feedback": array of strings (specific feedback points)
-- "missing_keywords": array of strings (important keywords from JD not in resume)
 - "suggestions": array of strings (actionable improvement suggestions)"""
-        
+    
+    with span("llm"):
         analysis = await llm_client.generate_structured_output(
             prompt=user_prompt,
-            system_prompt=system_prompt
+            system_prompt=system_prompt,
+            cache_tag=file_id,
+            caller="ats"
         )
+    
+    feedback = analysis.get("feedback", []) or result["feedback"]
+    if isinstance(feedback, str):
+        feedback = [feedback]
+    
+    suggestions = analysis.get("suggestions", []) or result["suggestions"]
+    if isinstance(suggestions, str):
+        suggestions = [suggestions]
+    
+    return feedback, suggestions
+
+@router.post("/ats/batch")
+async def analyze_ats_batch(request: ATSBatchRequest):
+    """Rank many resumes against one job description, streamed as NDJSON
+    
+    Every candidate is scored locally and by embedding similarity (the job
+    description is embedded once), then one `result` line per candidate is
+    sent in rank order. The `top_n` best candidates additionally get a
+    `narrative` line with LLM feedback as it completes. A final `summary`
+    line closes the stream.
+    """
+    started = time.perf_counter()
+    requested = list(vectorstore.documents) if request.file_ids == "all" else list(dict.fromkeys(request.file_ids))
+    candidates = {fid: vectorstore.get_documents(fid) for fid in requested}
+    unknown = [fid for fid, documents in candidates.items() if not documents]
+    candidates = {fid: documents for fid, documents in candidates.items() if documents}
+    if not candidates:
+        raise HTTPException(status_code=404, detail="No documents found for the requested file_ids")
+    
+    try:
+        with span("ats_score", candidates=len(candidates)):
+            keywords = ats_scorer.extract_keywords(request.job_description)
+            # Cold resume profiles cost ~0.3 ms each; keep a large batch off the event loop
+            results = await asyncio.to_thread(lambda: {
+                fid: ats_scorer.score(request.job_description, fid, documents, keywords=keywords)
+                for fid, documents in candidates.items()
+            })
+        similarities = await vectorstore.file_similarities(request.job_description, candidates)
+    except Exception as e:
+        logger.error("Error ranking ATS batch: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error ranking ATS batch: {str(e)}")
+    
+    weight = min(1.0, max(0.0, settings.ATS_BATCH_SIMILARITY_WEIGHT))
+    ranked = sorted(
+        candidates,
+        key=lambda fid: (-_rank_score(results[fid]["score"], similarities[fid], weight), fid)
+    )[:request.limit or None]
+    
+    async def lines() -> AsyncIterator[str]:
+        for rank, fid in enumerate(ranked, start=1):
+            result = results[fid]
+            yield format_ndjson({
+                "type": "result",
+                "rank": rank,
+                "file_id": fid,
+                "rank_score": _rank_score(result["score"], similarities[fid], weight),
+                "score": result["score"],
+                "similarity": round(similarities[fid], 4),
+                "matched_keywords": result["matched_keywords"][:30],
+                "missing_keywords": result["missing_keywords"][:15],
+            })
+        for fid in unknown:
+            yield format_ndjson({"type": "error", "file_id": fid, "detail": "No documents found"})
         
-        # Extract results
-        score = float(analysis.get("score", 0))
-        feedback = analysis.get("feedback", [])
-        if isinstance(feedback, str):
-            feedback = [feedback]
-        
-        missing_keywords = analysis.get("missing_keywords", [])
-        if isinstance(missing_keywords, str):
-            missing_keywords = [missing_keywords]
-        
-        suggestions = analysis.get("suggestions", [])
-        if isinstance(suggestions, str):
-            suggestions = [suggestions]
+        narrated = ranked[:max(0, request.top_n or 0)]
+        if narrated:
+            semaphore = asyncio.Semaphore(max(1, settings.ATS_BATCH_LLM_CONCURRENCY))
+            
+            async def narrate(rank: int, fid: str) -> Dict:
+                async with semaphore:
+                    try:
+                        feedback, suggestions = await _llm_feedback(
+                            request.job_description, fid, candidates[fid], results[fid]
+                        )
+                        return {"type": "narrative", "rank": rank, "file_id": fid,
+                                "feedback": feedback[:10], "suggestions": suggestions[:10]}
+                    except Exception as e:
+                        logger.warning("ATS narrative failed for %s: %s", fid, e)
+                        return {"type": "error", "rank": rank, "file_id": fid, "detail": str(e)}
+            
+            # Tasks copy the context, so the LLM calls queue behind interactive traffic
+            with use_priority(Priority.BACKGROUND):
+                tasks = [asyncio.create_task(narrate(rank, fid)) for rank, fid in enumerate(narrated, start=1)]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    yield format_ndjson(await next_done)
+            finally:
+                # Client went away: stop paying for narratives nobody will read
+                for task in tasks:
+                    task.cancel()
         
-        return ATSResponse(
-            score=min(100, max(0, score)),  # Clamp between 0-100
-            feedback=feedback[:10],  # Limit to 10 items
-            missing_keywords=missing_keywords[:15],  # Limit to 15 items
-            suggestions=suggestions[:10],  # Limit to 10 items
-            file_id=request.file_id
-        )
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        logger.error(f"Error analyzing ATS: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error analyzing ATS: {str(e)}")
+        yield format_ndjson({
+            "type": "summary",
+            "candidates": len(candidates),
+            "returned": len(ranked),
+            "unknown": len(unknown),
+            "keywords": len(keywords),
+            "narratives": len(narrated),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        })
+    
+    return ndjson_response(lines())
 
+def _rank_score(score: float, similarity: float, weight: float) -> float:
+    """Blend the keyword score with embedding similarity, both on a 0-100 scale"""
+    return round((1 - weight) * score + weight * max(0.0, similarity) * 100, 1)
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, HTTPException
+from app.api.upload import get_upload_dir
+from app.models.schemas import CandidateProfile
+from app.services.item_pool import item_pool
+from app.services.notes_service import notes_service
+from app.services.profile_service import profile_service
+from app.services.vectorstore import vectorstore
+from app.services.warmup import warmup_service
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+router = APIRouter()
+
+@router.get("/files/{file_id}/profile", response_model=CandidateProfile)
+async def get_profile(file_id: str):
+    """Structured profile extracted from an uploaded resume"""
+    try:
+        profile = profile_service.get_profile(file_id)
+        return CandidateProfile(file_id=file_id, **profile)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error("Error getting profile: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error getting profile: {str(e)}")
+
+@router.delete("/files/{file_id}")
+async def delete_file(file_id: str):
+    """Delete an uploaded resume with its documents, cached generations and pending background work"""
+    if not vectorstore.get_documents(file_id):
+        raise HTTPException(status_code=404, detail=f"No documents found for file_id: {file_id}")
+    try:
+        warmup_service.cancel(file_id)
+        item_pool.cancel(file_id)
+        notes_service.forget(file_id)
+        # Also purges the file's LLM cache entries (in a worker thread, as that touches SQLite)
+        await vectorstore.delete_documents(file_id)
+        for path in get_upload_dir().glob(f"{file_id}.*"):
+            path.unlink(missing_ok=True)
+        logger.info("Deleted file %s", file_id)
+        return {"file_id": file_id, "deleted": True}
+    except Exception as e:
+        logger.error("Error deleting file: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error deleting file: {str(e)}")
@@ -1,7 +1,11 @@
+import math
 from fastapi import APIRouter, HTTPException
 from app.models.schemas import FlashcardRequest, FlashcardsResponse, Flashcard
 from app.services.flashcard_service import flashcard_service
+from app.services.item_pool import item_pool
+from app.services.warmup import warmup_service
 from app.core.logger import get_logger
+from app.core.resilience import ServiceUnavailableError
 
 logger = get_logger(__name__)
 
@@ -11,10 +15,16 @@ router = APIRouter()
 async def generate_flashcards(request: FlashcardRequest):
     """Generate flashcards from uploaded resume"""
     try:
-        flashcards_data = await flashcard_service.generate_flashcards(
-            file_id=request.file_id,
-            count=request.count
-        )
+        # Generated ahead of time after upload, when warmup is enabled
+        flashcards_data = await warmup_service.lookup(request.file_id, "flashcards", count=request.count)
+        if flashcards_data is None:
+            # Sampled from the file's pre-generated pool, unless the count is too large for it
+            flashcards_data = await item_pool.take(request.file_id, "flashcards", request.count)
+        if flashcards_data is None:
+            flashcards_data = await flashcard_service.generate_flashcards(
+                file_id=request.file_id,
+                count=request.count
+            )
         
         flashcards = [Flashcard(**card) for card in flashcards_data]
         
@@ -22,9 +32,11 @@ async def generate_flashcards(request: FlashcardRequest):
             flashcards=flashcards,
             file_id=request.file_id
         )
+    except ServiceUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after or 1))})
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
-        logger.error(f"Error generating flashcards: {str(e)}")
+        logger.error("Error generating flashcards: %s", e)
         raise HTTPException(status_code=500, detail=f"Error generating flashcards: {str(e)}")
 
@@ -1,7 +1,13 @@
+import math
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
 from app.models.schemas import GeneratePayload, GenerateResponse
 from app.services.generator_service import generator_service
+from app.services.document_export import MEDIA_TYPES
+from app.services.export_service import export_service
+from app.core.sse import text_event_stream, event_stream_response
 from app.core.logger import get_logger
+from app.core.resilience import ServiceUnavailableError
 
 logger = get_logger(__name__)
 
@@ -24,9 +30,49 @@ async def generate_resume(payload: GeneratePayload):
         
         return GenerateResponse(
             resume=resume,
-            format=payload.template
+            format=payload.template,
+            id=await export_service.register(resume)
         )
+    except ServiceUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after or 1))})
     except Exception as e:
-        logger.error(f"Error generating resume: {str(e)}")
+        logger.error("Error generating resume: %s", e)
         raise HTTPException(status_code=500, detail=f"Error generating resume: {str(e)}")
 
+
+@router.post("/generate/stream")
+async def stream_resume(payload: GeneratePayload):
+    """Stream an ATS-friendly resume as server-sent events while it is generated"""
+    chunks = generator_service.stream_resume(
+        name=payload.name,
+        contact=payload.contact,
+        summary=payload.summary,
+        experiences=payload.experiences,
+        skills=payload.skills,
+        education=payload.education,
+        template=payload.template,
+        job_description=payload.job_description
+    )
+    
+    return event_stream_response(text_event_stream(chunks, done={"format": payload.template}))
+
+
+@router.get("/generate/{export_id}.{fmt}")
+async def export_resume(export_id: str, fmt: str):
+    """Download a generated resume as PDF or DOCX (rendered once per distinct resume)"""
+    try:
+        path = await export_service.render(export_id, fmt)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error("Error exporting resume: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error exporting resume: {str(e)}")
+    
+    # Content-addressed, so clients and proxies may keep it forever. Starlette
+    # streams the file in chunks from a worker thread; there is no sendfile path
+    return FileResponse(
+        path,
+        media_type=MEDIA_TYPES[fmt],
+        filename=f"resume-{export_id[:8]}.{fmt}",
+        headers={"Cache-Control": "public, max-age=31536000, immutable"}
+    )
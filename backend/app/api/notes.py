@@ -1,7 +1,12 @@
+import math
+from typing import AsyncIterator
 from fastapi import APIRouter, HTTPException
 from app.models.schemas import NotesRequest, NotesResponse
 from app.services.notes_service import notes_service
+from app.services.warmup import warmup_service
+from app.core.sse import text_event_stream, event_stream_response
 from app.core.logger import get_logger
+from app.core.resilience import ServiceUnavailableError
 
 logger = get_logger(__name__)
 
@@ -11,18 +16,44 @@ router = APIRouter()
 async def generate_notes(request: NotesRequest):
     """Generate short notes from uploaded resume"""
     try:
-        notes = await notes_service.generate_notes(
-            file_id=request.file_id,
-            style=request.style
-        )
+        # Generated ahead of time after upload, when warmup is enabled
+        notes = await warmup_service.lookup(request.file_id, "notes", style=request.style)
+        if notes is None:
+            notes = await notes_service.generate_notes(
+                file_id=request.file_id,
+                style=request.style
+            )
         
         return NotesResponse(
             notes=notes,
             file_id=request.file_id
         )
+    except ServiceUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after or 1))})
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
-        logger.error(f"Error generating notes: {str(e)}")
+        logger.error("Error generating notes: %s", e)
         raise HTTPException(status_code=500, detail=f"Error generating notes: {str(e)}")
 
+
+@router.post("/notes/stream")
+async def stream_notes(request: NotesRequest):
+    """Stream notes as server-sent events while they are generated"""
+    try:
+        warmed = await warmup_service.lookup(request.file_id, "notes", style=request.style)
+        if warmed is not None:
+            chunks = _replay(warmed)
+        else:
+            chunks = await notes_service.stream_notes(
+                file_id=request.file_id,
+                style=request.style
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    return event_stream_response(text_event_stream(chunks, done={"file_id": request.file_id}))
+
+async def _replay(text: str) -> AsyncIterator[str]:
+    """Send already generated notes through the same event stream as a single token"""
+    yield text
@@ -1,10 +1,14 @@
+import math
 from fastapi import APIRouter, HTTPException
 from app.models.schemas import (
     QuizRequest, QuizResponse, QuizQuestion,
     EvalPayload, EvalResponse
 )
 from app.services.quiz_service import quiz_service
+from app.services.item_pool import item_pool
+from app.services.warmup import warmup_service
 from app.core.logger import get_logger
+from app.core.resilience import ServiceUnavailableError
 
 logger = get_logger(__name__)
 
@@ -14,11 +18,21 @@ router = APIRouter()
 async def generate_quiz(request: QuizRequest):
     """Generate quiz questions from uploaded resume"""
     try:
-        questions_data = await quiz_service.generate_quiz(
-            file_id=request.file_id,
-            count=request.count,
-            difficulty=request.difficulty
+        # Generated ahead of time after upload, when warmup is enabled
+        questions_data = await warmup_service.lookup(
+            request.file_id, "quiz", count=request.count, difficulty=request.difficulty
         )
+        if questions_data is None:
+            # Sampled from the file's pre-generated pool, unless the count is too large for it
+            questions_data = await item_pool.take(
+                request.file_id, "quiz", request.count, difficulty=request.difficulty
+            )
+        if questions_data is None:
+            questions_data = await quiz_service.generate_quiz(
+                file_id=request.file_id,
+                count=request.count,
+                difficulty=request.difficulty
+            )
         
         questions = [QuizQuestion(**q) for q in questions_data]
         
@@ -26,10 +40,12 @@ async def generate_quiz(request: QuizRequest):
             questions=questions,
             file_id=request.file_id
         )
+    except ServiceUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after or 1))})
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
-        logger.error(f"Error generating quiz: {str(e)}")
+        logger.error("Error generating quiz: %s", e)
         raise HTTPException(status_code=500, detail=f"Error generating quiz: {str(e)}")
 
 @router.post("/quiz/evaluate", response_model=EvalResponse)
@@ -43,6 +59,6 @@ async def evaluate_answer(payload: EvalPayload):
         
         return EvalResponse(**result)
     except Exception as e:
-        logger.error(f"Error evaluating answer: {str(e)}")
+        logger.error("Error evaluating answer: %s", e)
         raise HTTPException(status_code=500, detail=f"Error evaluating answer: {str(e)}")
 
@@ -0,0 +1,113 @@
+import asyncio
+import time
+from typing import AsyncIterator, Dict, Optional
+from fastapi import APIRouter, HTTPException
+from app.models.schemas import StudyPackRequest, Flashcard, QuizQuestion
+from app.services.context_builder import context_builder
+from app.services.notes_service import notes_service
+from app.services.flashcard_service import flashcard_service
+from app.services.quiz_service import quiz_service
+from app.services.item_pool import item_pool
+from app.services.vectorstore import vectorstore
+from app.services.warmup import warmup_service
+from app.core.logger import get_logger
+from app.core.resilience import ServiceUnavailableError
+from app.core.sse import format_ndjson, ndjson_response
+
+logger = get_logger(__name__)
+
+router = APIRouter()
+
+ARTIFACTS = ("notes", "flashcards", "quiz")
+
+@router.post("/study-pack")
+async def generate_study_pack(request: StudyPackRequest):
+    """Generate notes, flashcards and quiz concurrently, streamed as NDJSON
+
+    One line is sent per artifact as soon as it is ready (`notes`,
+    `flashcards`, `quiz`), or an `error` line if that artifact failed; the
+    others are unaffected. A final `done` line lists what completed.
+    Artifacts that need generating share one resume context, built once.
+    """
+    if not vectorstore.get_documents(request.file_id):
+        raise HTTPException(status_code=404, detail=f"No documents found for file_id: {request.file_id}")
+    artifacts = list(dict.fromkeys(request.artifacts or ARTIFACTS))
+    # Explicit nulls get the schema defaults
+    flashcard_count = request.flashcard_count or 10
+    quiz_count = request.quiz_count or 5
+    started = time.perf_counter()
+    shared_context: Optional[asyncio.Task] = None
+
+    async def context() -> str:
+        """The pack's resume context, built on first use (warm artifacts never need it)"""
+        nonlocal shared_context
+        if shared_context is None:
+            shared_context = asyncio.ensure_future(context_builder.build(request.file_id, "study_pack"))
+        # Shielded: cancelling one artifact must not cancel the build the others wait for
+        return await asyncio.shield(shared_context)
+
+    async def build(artifact: str) -> Dict:
+        if artifact == "notes":
+            notes = (await warmup_service.lookup(request.file_id, "notes", style=request.style)
+                     or await notes_service.generate_notes(
+                         file_id=request.file_id, style=request.style, context=await context()
+                     ))
+            return {"type": "notes", "notes": notes}
+        if artifact == "flashcards":
+            cards = (await warmup_service.lookup(request.file_id, "flashcards", count=flashcard_count)
+                     or await item_pool.take(request.file_id, "flashcards", flashcard_count)
+                     or await flashcard_service.generate_flashcards(
+                         file_id=request.file_id, count=flashcard_count, context=await context()
+                     ))
+            return {"type": "flashcards", "flashcards": [Flashcard(**card).model_dump() for card in cards]}
+        questions = (
+            await warmup_service.lookup(request.file_id, "quiz", count=quiz_count, difficulty=request.difficulty)
+            or await item_pool.take(request.file_id, "quiz", quiz_count, difficulty=request.difficulty)
+            or await quiz_service.generate_quiz(
+                file_id=request.file_id, count=quiz_count, difficulty=request.difficulty, context=await context()
+            )
+        )
+        return {"type": "quiz", "questions": [QuizQuestion(**question).model_dump() for question in questions]}
+
+    async def isolated(artifact: str) -> Dict:
+        """Turn a failure into an error record so it cannot take the other artifacts down"""
+        artifact_started = time.perf_counter()
+        try:
+            result = await build(artifact)
+        except ServiceUnavailableError as e:
+            result = {"type": "error", "artifact": artifact, "status": 503, "detail": str(e),
+                      "retry_after": e.retry_after}
+        except ValueError as e:
+            result = {"type": "error", "artifact": artifact, "status": 404, "detail": str(e)}
+        except Exception as e:
+            logger.error("Error generating %s for study pack: %s", artifact, e)
+            result = {"type": "error", "artifact": artifact, "status": 500, "detail": str(e)}
+        result["elapsed_ms"] = round((time.perf_counter() - artifact_started) * 1000, 1)
+        return result
+
+    async def lines() -> AsyncIterator[str]:
+        tasks = [asyncio.create_task(isolated(artifact)) for artifact in artifacts]
+        completed, failed = [], []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                if result["type"] == "error":
+                    failed.append(result["artifact"])
+                else:
+                    completed.append(result["type"])
+                yield format_ndjson(result)
+        finally:
+            # Client went away: stop the remaining generations
+            for task in tasks:
+                task.cancel()
+            if shared_context is not None:
+                shared_context.cancel()
+        yield format_ndjson({
+            "type": "done",
+            "file_id": request.file_id,
+            "completed": completed,
+            "failed": failed,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        })
+
+    return ndjson_response(lines())
@@ -1,22 +1,30 @@
 import os
 import uuid
+from functools import lru_cache
 from pathlib import Path
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from app.models.schemas import UploadResponse
 from app.services.parser import parser
-from app.services.chunker import chunker
+from app.services.chunker import chunker, detect_section
 from app.services.vectorstore import vectorstore
+from app.services.profile_service import profile_service
+from app.services.warmup import warmup_service
 from app.core.config import settings
 from app.core.logger import get_logger
+from app.core.request_context import Priority, use_priority
+from app.core.tracing import span
 
 logger = get_logger(__name__)
 
 router = APIRouter()
 
-# Ensure upload directory exists (use absolute path)
-UPLOAD_DIR = Path(settings.UPLOAD_DIR).resolve()
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-logger.info(f"Upload directory: {UPLOAD_DIR}")
+@lru_cache(maxsize=None)
+def get_upload_dir() -> Path:
+    """Absolute upload directory, created on the first upload rather than at import"""
+    upload_dir = Path(settings.UPLOAD_DIR).resolve()
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    logger.info("Upload directory: %s", upload_dir)
+    return upload_dir
 
 @router.post("/upload", response_model=UploadResponse)
 async def upload_file(file: UploadFile = File(...)):
@@ -45,9 +53,10 @@ async def upload_file(file: UploadFile = File(...)):
             )
         
         # Check file size
-        file_content = await file.read()
+        with span("read"):
+            file_content = await file.read()
         file_size_mb = len(file_content) / (1024 * 1024)
-        logger.info(f"File size: {file_size_mb:.2f} MB, Type: {file.content_type}")
+        logger.info("File size: %.2f MB, Type: %s", file_size_mb, file.content_type)
         
         if file_size_mb > settings.MAX_UPLOAD_MB:
             raise HTTPException(
@@ -69,24 +78,26 @@ async def upload_file(file: UploadFile = File(...)):
             else:
                 file_extension = '.pdf'
         
-        file_path = UPLOAD_DIR / f"{file_id}{file_extension}"
+        file_path = get_upload_dir() / f"{file_id}{file_extension}"
         
         # Save file
         try:
-            with open(file_path, "wb") as f:
-                f.write(file_content)
-            logger.info(f"Saved uploaded file: {file_path}")
+            with span("save", bytes=len(file_content)):
+                with open(file_path, "wb") as f:
+                    f.write(file_content)
+            logger.info("Saved uploaded file: %s", file_path)
         except Exception as e:
-            logger.error(f"Error saving file: {str(e)}")
+            logger.error("Error saving file: %s", e)
             raise HTTPException(status_code=500, detail=f"Error saving file: {str(e)}")
         
         # Parse file to extract text
         extracted_text = None
         try:
-            extracted_text = parser.parse_file(str(file_path), file.content_type)
-            logger.info(f"Extracted {len(extracted_text)} characters from file")
+            with span("parse", content_type=content_type):
+                extracted_text = parser.parse_file(str(file_path), file.content_type)
+            logger.info("Extracted %s characters from file", len(extracted_text))
         except Exception as e:
-            logger.error(f"Error parsing file: {str(e)}", exc_info=True)
+            logger.error("Error parsing file: %s", e, exc_info=True)
             # Try to clean up file
             try:
                 if file_path and file_path.exists():
@@ -113,24 +124,38 @@ async def upload_file(file: UploadFile = File(...)):
         # Chunk the text
         try:
             chunks = chunker.chunk_by_sections(extracted_text)
-            logger.info(f"Created {len(chunks)} chunks from text")
+            logger.info("Created %s chunks from text", len(chunks))
         except Exception as e:
-            logger.error(f"Error chunking text: {str(e)}")
+            logger.error("Error chunking text: %s", e)
             chunks = [extracted_text]  # Fallback to single chunk
         
-        # Store in vector database
+        # Store in vector database (ingestion yields upstream quota to interactive calls)
         try:
-            await vectorstore.add_documents(
-                file_id=file_id,
-                texts=chunks,
-                metadata=[{"chunk_index": i, "filename": file.filename or "uploaded_file"} for i in range(len(chunks))]
-            )
-            logger.info(f"Stored {len(chunks)} documents in vector store")
+            with use_priority(Priority.BACKGROUND), span("index", chunks=len(chunks)):
+                await vectorstore.add_documents(
+                    file_id=file_id,
+                    texts=chunks,
+                    metadata=[
+                        {"chunk_index": i, "filename": file.filename or "uploaded_file", "section": detect_section(chunk)}
+                        for i, chunk in enumerate(chunks)
+                    ]
+                )
+            logger.info("Stored %s documents in vector store", len(chunks))
         except Exception as e:
-            logger.error(f"Error storing in vector database: {str(e)}")
+            logger.error("Error storing in vector database: %s", e)
             # Don't fail the upload if vector store fails, but log it
             # The file is still uploaded and can be used
         
+        # Structured profile (skills, roles, dates, education) for prompts, filtering and ranking
+        try:
+            profile_service.build_profile(file_id, chunks)
+            profile_service.schedule_enrichment(file_id, extracted_text)
+        except Exception as e:
+            logger.error("Error extracting profile: %s", e)
+        
+        # Start generating what the user will most likely open next
+        warmup_service.schedule(file_id)
+        
         return UploadResponse(
             file_id=file_id,
             filename=file.filename or "uploaded_file",
@@ -141,7 +166,7 @@ async def upload_file(file: UploadFile = File(...)):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in upload: {str(e)}", exc_info=True)
+        logger.error("Unexpected error in upload: %s", e, exc_info=True)
         # Clean up file if it was created
         try:
             if file_path and file_path.exists():
@@ -0,0 +1,130 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# SQLite limits the number of bound parameters per statement
+SQLITE_MAX_PARAMS = 900
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with optional TTL"""
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: Optional[float] = None):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value or None if missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if self.ttl_seconds is not None and time.time() - stored_at > self.ttl_seconds:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, stored_at: Optional[float] = None):
+        """Insert or refresh a value, evicting the least recently used entry"""
+        with self._lock:
+            self._data[key] = (stored_at if stored_at is not None else time.time(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+class SQLiteStore:
+    """Small key/value table in SQLite used as the on-disk tier of a cache"""
+
+    def __init__(self, path: str, table: str = "cache"):
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use"""
+        if self._conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, tag TEXT, created_at REAL NOT NULL)"
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_tag ON {self.table} (tag)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, keys: Iterable[str], max_age: Optional[float] = None) -> Dict[str, Tuple[bytes, float]]:
+        """Fetch several keys at once, returning {key: (value, created_at)} for hits"""
+        keys = list(keys)
+        found: Dict[str, Tuple[bytes, float]] = {}
+        if not keys:
+            return found
+        min_created = time.time() - max_age if max_age is not None else 0.0
+        with self._lock:
+            conn = self._connect()
+            for start in range(0, len(keys), SQLITE_MAX_PARAMS):
+                batch = keys[start:start + SQLITE_MAX_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, value, created_at FROM {self.table} "
+                    f"WHERE key IN ({placeholders}) AND created_at >= ?",
+                    (*batch, min_created)
+                ).fetchall()
+                for key, value, created_at in rows:
+                    found[key] = (value, created_at)
+        return found
+
+    def put_many(self, items: List[Tuple[str, bytes, Optional[str]]]):
+        """Insert or replace (key, value, tag) rows in one transaction"""
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, tag, created_at) VALUES (?, ?, ?, ?)",
+                [(key, value, tag, now) for key, value, tag in items]
+            )
+            conn.commit()
+
+    def delete_tag(self, tag: str) -> List[str]:
+        """Delete every row carrying a tag and return the removed keys"""
+        with self._lock:
+            conn = self._connect()
+            keys = [row[0] for row in conn.execute(f"SELECT key FROM {self.table} WHERE tag = ?", (tag,))]
+            conn.execute(f"DELETE FROM {self.table} WHERE tag = ?", (tag,))
+            conn.commit()
+        return keys
+
+    def purge_older_than(self, max_age: float) -> int:
+        """Remove rows older than max_age seconds"""
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute(f"DELETE FROM {self.table} WHERE created_at < ?", (time.time() - max_age,))
+            conn.commit()
+            return cursor.rowcount
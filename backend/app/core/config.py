@@ -10,6 +10,104 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
     EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+    OPENAI_BASE_URL: str = os.getenv("OPENAI_BASE_URL", "")  # e.g. a local stand-in server
+    
+    # Model Routing Configuration (small or latency-critical calls to a faster model)
+    OPENAI_FAST_MODEL: str = os.getenv("OPENAI_FAST_MODEL", "")  # empty disables routing
+    LLM_ROUTES: str = os.getenv("LLM_ROUTES", "")  # per-caller overrides, e.g. "quiz=3000/6,ats=0/30"
+    LLM_ROUTER_WINDOW_SECONDS: float = float(os.getenv("LLM_ROUTER_WINDOW_SECONDS", "300"))  # latency history for p95
+    LLM_ROUTER_MIN_SAMPLES: int = int(os.getenv("LLM_ROUTER_MIN_SAMPLES", "20"))
+    
+    # OpenAI Transport Configuration
+    OPENAI_MAX_CONNECTIONS: int = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    OPENAI_KEEPALIVE_EXPIRY: float = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30"))
+    OPENAI_CONNECT_TIMEOUT: float = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+    OPENAI_CHAT_TIMEOUT: float = float(os.getenv("OPENAI_CHAT_TIMEOUT", "60"))
+    OPENAI_EMBEDDING_TIMEOUT: float = float(os.getenv("OPENAI_EMBEDDING_TIMEOUT", "20"))
+    OPENAI_MAX_RETRIES: int = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+    OPENAI_RETRY_BASE_DELAY: float = float(os.getenv("OPENAI_RETRY_BASE_DELAY", "0.5"))
+    OPENAI_RETRY_MAX_DELAY: float = float(os.getenv("OPENAI_RETRY_MAX_DELAY", "20"))
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "5"))
+    CIRCUIT_BREAKER_RESET_SECONDS: float = float(os.getenv("CIRCUIT_BREAKER_RESET_SECONDS", "30"))
+    LLM_HEDGE_DELAY_MS: float = float(os.getenv("LLM_HEDGE_DELAY_MS", "0"))  # 0 disables hedged requests
+    
+    # Upstream Rate Limiting Configuration (0 disables a limit)
+    LLM_RPM_LIMIT: int = int(os.getenv("LLM_RPM_LIMIT", "3000"))
+    LLM_TPM_LIMIT: int = int(os.getenv("LLM_TPM_LIMIT", "150000"))
+    LLM_QUEUE_TIMEOUT_INTERACTIVE: float = float(os.getenv("LLM_QUEUE_TIMEOUT_INTERACTIVE", "10"))
+    LLM_QUEUE_TIMEOUT_BACKGROUND: float = float(os.getenv("LLM_QUEUE_TIMEOUT_BACKGROUND", "120"))
+    LLM_QUEUE_TIMEOUT_WARMUP: float = float(os.getenv("LLM_QUEUE_TIMEOUT_WARMUP", "30"))
+    
+    # Embedding Backend Configuration
+    EMBEDDING_BACKEND: str = os.getenv("EMBEDDING_BACKEND", "auto")  # auto, openai or local
+    EMBEDDING_LOCAL_FALLBACK: bool = os.getenv("EMBEDDING_LOCAL_FALLBACK", "true").lower() == "true"
+    LOCAL_EMBEDDING_DIM: int = int(os.getenv("LOCAL_EMBEDDING_DIM", "384"))
+    
+    # Embedding Batching Configuration
+    EMBEDDING_BATCH_MAX_ITEMS: int = int(os.getenv("EMBEDDING_BATCH_MAX_ITEMS", "256"))
+    EMBEDDING_BATCH_MAX_TOKENS: int = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "100000"))
+    EMBEDDING_MAX_CONCURRENCY: int = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))
+    EMBEDDING_COALESCE_WINDOW_MS: float = float(os.getenv("EMBEDDING_COALESCE_WINDOW_MS", "5"))
+    
+    # Embedding Cache Configuration
+    EMBEDDING_DIMENSIONS: int = int(os.getenv("EMBEDDING_DIMENSIONS", "0"))  # 0 = model default
+    EMBEDDING_CACHE_ENABLED: bool = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_MEMORY_ITEMS: int = int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", "10000"))
+    EMBEDDING_CACHE_PATH: str = os.getenv("EMBEDDING_CACHE_PATH", "./vector_store/embedding_cache.sqlite3")
+    
+    # LLM Response Cache Configuration
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_TTL_SECONDS: int = int(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+    LLM_CACHE_MEMORY_ITEMS: int = int(os.getenv("LLM_CACHE_MEMORY_ITEMS", "1000"))
+    LLM_CACHE_PATH: str = os.getenv("LLM_CACHE_PATH", "./vector_store/llm_cache.sqlite3")
+    
+    # Logging Configuration
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVELS: str = os.getenv("LOG_LEVELS", "")  # per-logger overrides, e.g. "app.services.parser=WARNING"
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")  # json or text
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # records beyond this are dropped, not blocked on
+    LOG_RATE_LIMIT: int = int(os.getenv("LOG_RATE_LIMIT", "50"))  # per message template and window, 0 disables
+    LOG_RATE_LIMIT_WINDOW: float = float(os.getenv("LOG_RATE_LIMIT_WINDOW", "60"))
+    
+    # Observability Configuration
+    TRACING_ENABLED: bool = os.getenv("TRACING_ENABLED", "true").lower() == "true"  # Server-Timing header and trace logs
+    ADMIN_TOKEN: str = os.getenv("ADMIN_TOKEN", "")  # enables ?profile=1 with a matching X-Admin-Token header
+    
+    # ATS Scoring Configuration
+    ATS_SKILLS_PATH: str = os.getenv("ATS_SKILLS_PATH", "")  # extra skills, one per line with comma-separated aliases
+    ATS_BATCH_SIMILARITY_WEIGHT: float = float(os.getenv("ATS_BATCH_SIMILARITY_WEIGHT", "0.3"))  # share of embedding similarity in batch ranking
+    ATS_BATCH_LLM_CONCURRENCY: int = int(os.getenv("ATS_BATCH_LLM_CONCURRENCY", "4"))
+    
+    # Profile Extraction Configuration
+    PROFILE_LLM_ENABLED: bool = os.getenv("PROFILE_LLM_ENABLED", "false").lower() == "true"  # one cached LLM pass per upload
+    
+    # Warmup Configuration (speculative generation after upload)
+    WARMUP_ENABLED: bool = os.getenv("WARMUP_ENABLED", "false").lower() == "true"
+    WARMUP_ARTIFACTS: str = os.getenv("WARMUP_ARTIFACTS", "notes,flashcards,quiz")
+    WARMUP_MAX_CONCURRENCY: int = int(os.getenv("WARMUP_MAX_CONCURRENCY", "2"))  # warm generations across all files
+    WARMUP_CACHE_ITEMS: int = int(os.getenv("WARMUP_CACHE_ITEMS", "3000"))
+    
+    # Notes Configuration (map-reduce summarization of long documents)
+    NOTES_MAP_REDUCE_MIN_TOKENS: int = int(os.getenv("NOTES_MAP_REDUCE_MIN_TOKENS", "1500"))  # shorter files use one call
+    NOTES_MAP_GROUP_TOKENS: int = int(os.getenv("NOTES_MAP_GROUP_TOKENS", "1200"))  # input per partial summary
+    NOTES_MAP_CONCURRENCY: int = int(os.getenv("NOTES_MAP_CONCURRENCY", "4"))  # partial summaries in flight
+    NOTES_PARTIAL_MAX_TOKENS: int = int(os.getenv("NOTES_PARTIAL_MAX_TOKENS", "400"))
+    NOTES_PARTIAL_CACHE_ITEMS: int = int(os.getenv("NOTES_PARTIAL_CACHE_ITEMS", "5000"))
+    
+    # Resume Generator Configuration
+    GENERATOR_SECTION_CACHE_ITEMS: int = int(os.getenv("GENERATOR_SECTION_CACHE_ITEMS", "5000"))  # generated sections by input hash
+    
+    # Quiz/Flashcard Generation Configuration
+    GENERATION_SHARD_SIZE: int = int(os.getenv("GENERATION_SHARD_SIZE", "5"))  # larger counts are split into concurrent calls
+    GENERATION_MAX_SHARDS: int = int(os.getenv("GENERATION_MAX_SHARDS", "8"))
+    GENERATION_RETRY_ROUNDS: int = int(os.getenv("GENERATION_RETRY_ROUNDS", "1"))  # re-requests of a shortfall
+    
+    # Item Pool Configuration (pre-generated quiz questions and flashcards)
+    ITEM_POOL_ENABLED: bool = os.getenv("ITEM_POOL_ENABLED", "false").lower() == "true"
+    ITEM_POOL_SIZE: int = int(os.getenv("ITEM_POOL_SIZE", "30"))  # unserved items kept per file, kind and difficulty
+    ITEM_POOL_LOW_WATERMARK: int = int(os.getenv("ITEM_POOL_LOW_WATERMARK", "10"))  # top up below this
+    ITEM_POOL_SHARD_SIZE: int = int(os.getenv("ITEM_POOL_SHARD_SIZE", "5"))  # items per concurrent LLM call
     
     # Vector Store Configuration
     VECTOR_STORE_PATH: str = os.getenv("VECTOR_STORE_PATH", "./vector_store")
@@ -21,6 +119,15 @@ class Settings(BaseSettings):
     MAX_UPLOAD_MB: int = int(os.getenv("MAX_UPLOAD_MB", "10"))
     UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", "./uploads")
     
+    # Export Configuration (PDF/DOCX downloads of generated resumes)
+    EXPORT_DIR: str = os.getenv("EXPORT_DIR", "./exports")
+    EXPORT_WORKERS: int = int(os.getenv("EXPORT_WORKERS", "2"))  # rendering processes
+    EXPORT_TTL_SECONDS: int = int(os.getenv("EXPORT_TTL_SECONDS", "604800"))  # unused exports are deleted after this, 0 keeps them
+    
+    # Prompt Context Configuration
+    CONTEXT_TOKEN_BUDGET: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", "800"))  # resume text per prompt
+    CONTEXT_CACHE_ITEMS: int = int(os.getenv("CONTEXT_CACHE_ITEMS", "2000"))
+    
     # Chunking Configuration
     CHUNK_SIZE: int = int(os.getenv("CHUNK_SIZE", "1000"))
     CHUNK_OVERLAP: int = int(os.getenv("CHUNK_OVERLAP", "200"))
@@ -0,0 +1,69 @@
+import importlib
+import threading
+from types import ModuleType
+from typing import Callable, Dict, Generic, Optional, TypeVar
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+_optional_modules: Dict[str, Optional[ModuleType]] = {}
+_optional_lock = threading.Lock()
+
+def optional_import(module_name: str, warning: Optional[str] = None) -> Optional[ModuleType]:
+    """Import an optional dependency on first use, or return None if it is missing
+
+    The result is remembered, so `warning` is logged once per process, the first
+    time a feature actually needs the module rather than at application import.
+    """
+    try:
+        return _optional_modules[module_name]
+    except KeyError:
+        pass
+    with _optional_lock:
+        if module_name not in _optional_modules:
+            try:
+                _optional_modules[module_name] = importlib.import_module(module_name)
+            except ImportError:
+                _optional_modules[module_name] = None
+                if warning:
+                    logger.warning(warning)
+        return _optional_modules[module_name]
+
+class LazySingleton(Generic[T]):
+    """Module-level stand-in that builds the real object on first attribute access
+
+    Lets modules keep exposing `llm_client`, `vectorstore` and friends as plain
+    globals without paying for their construction (clients, directories, model
+    state) at import time.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _lazy_instance(self) -> T:
+        instance = object.__getattribute__(self, "_instance")
+        if instance is None:
+            with object.__getattribute__(self, "_lock"):
+                instance = object.__getattribute__(self, "_instance")
+                if instance is None:
+                    instance = object.__getattribute__(self, "_factory")()
+                    object.__setattr__(self, "_instance", instance)
+        return instance
+
+    def _lazy_initialized(self) -> bool:
+        return object.__getattribute__(self, "_instance") is not None
+
+    def __getattr__(self, name: str):
+        return getattr(self._lazy_instance(), name)
+
+    def __setattr__(self, name: str, value):
+        setattr(self._lazy_instance(), name, value)
+
+    def __repr__(self) -> str:
+        if not self._lazy_initialized():
+            return f"<lazy {object.__getattribute__(self, '_factory').__name__}>"
+        return repr(self._lazy_instance())
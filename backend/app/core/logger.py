@@ -1,13 +1,185 @@
+import atexit
+import json
 import logging
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Tuple
+from app.core.request_context import request_id
+
+# Attributes every LogRecord has; anything else was passed via `extra=` and is emitted as a field
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "asctime", "request_id", "suppressed", "rate_limit"
+}
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request id (runs in the caller, where the context is set)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id.get()
+        return True
+
+class RateLimitFilter(logging.Filter):
+    """Let each message template through at most `limit` times per `window` seconds
+
+    Suppressed repeats are counted and reported on the next record that gets
+    through. Records logged with extra={"rate_limit": False} are never dropped.
+    """
+
+    def __init__(self, limit: int, window: float = 60.0):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        # (logger, level, template) -> [window start, emitted, suppressed]
+        self._counts: Dict[Tuple[str, int, str], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.limit <= 0 or not getattr(record, "rate_limit", True):
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._counts.get(key)
+            if entry is None or now - entry[0] >= self.window:
+                suppressed = entry[2] if entry else 0
+                entry = [now, 0, 0]
+                self._counts[key] = entry
+                if suppressed:
+                    record.suppressed = suppressed
+                if len(self._counts) > 10000:
+                    # Templates are bounded in practice; guard against ones that embed data
+                    self._counts = {key: entry}
+            if entry[1] >= self.limit:
+                entry[2] += 1
+                return False
+            entry[1] += 1
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with `extra=` fields merged in"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        if getattr(record, "suppressed", 0):
+            payload["suppressed"] = record.suppressed
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc_info"] = record.exc_text
+        return json.dumps(payload, default=str)
+
+class TextFormatter(logging.Formatter):
+    """The original human-readable format, plus the request id"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not hasattr(record, "request_id"):
+            record.request_id = "-"
+        text = super().format(record)
+        if getattr(record, "suppressed", 0):
+            text += f" ({record.suppressed} similar messages suppressed)"
+        return text
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hand records to the listener thread; never block the caller, even when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Interpolate now (the args may change later) but leave formatting and I/O to the listener
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+_configure_lock = threading.Lock()
+
+def configure_logging(force: bool = False):
+    """Route all `app.*` loggers through one queue to a single stream handler
+
+    Called on first get_logger(); `force` rebuilds the pipeline after settings change.
+    """
+    global _listener, _queue_handler
+    with _configure_lock:
+        if _listener is not None and not force:
+            return
+        if _listener is not None:
+            _listener.stop()
+
+        from app.core.config import settings
+
+        stream_handler = logging.StreamHandler(sys.stderr)
+        stream_handler.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else TextFormatter())
+
+        log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+        handler = NonBlockingQueueHandler(log_queue)
+        handler.addFilter(RateLimitFilter(settings.LOG_RATE_LIMIT, settings.LOG_RATE_LIMIT_WINDOW))
+        handler.addFilter(RequestIdFilter())
+
+        app_logger = logging.getLogger("app")
+        for existing in list(app_logger.handlers):
+            app_logger.removeHandler(existing)
+        app_logger.addHandler(handler)
+        app_logger.setLevel(settings.LOG_LEVEL.upper())
+        app_logger.propagate = False
+
+        # e.g. LOG_LEVELS="app.services.parser=WARNING,app.trace=INFO"
+        for entry in filter(None, (part.strip() for part in settings.LOG_LEVELS.split(","))):
+            name, _, level = entry.partition("=")
+            logging.getLogger(name.strip()).setLevel(level.strip().upper())
+
+        _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+        _queue_handler = handler
+
+def shutdown_logging():
+    """Flush queued records; registered to run at interpreter exit"""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+atexit.register(shutdown_logging)
+
+def dropped_records() -> int:
+    """Records discarded because the log queue was full"""
+    return _queue_handler.dropped if _queue_handler else 0
 
 def get_logger(name=__name__):
+    if _listener is None:
+        configure_logging()
     logger = logging.getLogger(name)
-    if not logger.handlers:
-        handler = logging.StreamHandler()
-        formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-        )
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-        logger.setLevel(logging.INFO)
+    if name != "app" and not name.startswith("app."):
+        # Outside the app hierarchy: share the app's handler instead of propagating to root
+        logger.handlers = list(logging.getLogger("app").handlers)
+        logger.propagate = False
     return logger
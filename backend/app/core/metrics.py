@@ -0,0 +1,257 @@
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Seconds; covers fast cache-backed routes up to slow multi-call LLM generations
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+class Gauge(_Metric):
+    """Value that can go up and down, e.g. requests in progress"""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+class Histogram(_Metric):
+    """Cumulative bucketed distribution with sum and count, as Prometheus expects"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> (per-bucket counts incl. +Inf, sum)
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+class MetricsRegistry:
+    """Process-local collection of metrics rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collect: Callable[[], None]):
+        """Run `collect` before every scrape, e.g. to copy in-process stats into gauges"""
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        for collect in self._collectors:
+            collect()
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+registry = MetricsRegistry()
+
+# Starlette appends "; charset=utf-8" to text responses
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# HTTP, labelled by route template so /files/{file_id} stays one series
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests handled", ["method", "route", "status"]
+)
+HTTP_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency until the response body is sent", ["method", "route"]
+)
+HTTP_IN_PROGRESS = registry.gauge(
+    "http_requests_in_progress", "HTTP requests currently being handled", ["method"]
+)
+
+# LLM calls as seen by callers, including ones answered from cache
+LLM_CALLS = registry.counter(
+    "llm_calls_total", "LLM client calls by outcome of the response cache", ["kind", "model", "caller", "cache"]
+)
+# Upstream requests actually sent to the provider
+LLM_REQUEST_LATENCY = registry.histogram(
+    "llm_request_duration_seconds",
+    "Upstream LLM request latency including queueing and retries",
+    ["kind", "model", "caller"]
+)
+LLM_REQUESTS = registry.counter(
+    "llm_requests_total", "Upstream LLM requests by result", ["kind", "model", "caller", "result"]
+)
+LLM_RETRIES = registry.counter(
+    "llm_retries_total", "Upstream LLM request retries", ["kind", "model", "caller"]
+)
+LLM_TOKENS = registry.counter(
+    "llm_tokens_total", "Tokens from the provider's usage block (estimated for streams)", ["kind", "model", "caller", "type"]
+)
+# Model chosen per call: small request, default primary, or fallback after a p95 SLO breach
+LLM_ROUTES = registry.counter(
+    "llm_routes_total", "Chat model routing decisions", ["caller", "model", "reason"]
+)
+
+# Speculative generation of artifacts after upload
+ARTIFACT_WARMUP = registry.counter(
+    "artifact_warmup_total",
+    "Warmup events: generated, failed, cancelled, hit, joined, preempted, miss, unused",
+    ["artifact", "event"]
+)
+# Pre-generated quiz and flashcard pools; served, generated and duplicate count items, the rest requests or shards
+ITEM_POOL = registry.counter(
+    "item_pool_events_total",
+    "Item pool events: hit, wait, recycled, served, generated, duplicate, failed_shard",
+    ["kind", "event"]
+)
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route request counts, latency and concurrency"""
+
+    def __init__(self, app, exclude_paths: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        started = time.perf_counter()
+        # The route is only known once the router has matched, so concurrency is tracked per method
+        HTTP_IN_PROGRESS.inc(method=method)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_PROGRESS.dec(method=method)
+            route = scope.get("route")
+            # Unmatched paths share one label to keep cardinality bounded
+            template = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUESTS.inc(method=method, route=template, status=str(status))
+            HTTP_LATENCY.observe(time.perf_counter() - started, method=method, route=template)
@@ -0,0 +1,88 @@
+import cProfile
+import hmac
+import io
+import pstats
+from urllib.parse import parse_qs
+from app.core.lazy import optional_import
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+class ProfilingMiddleware:
+    """Profile a single request on demand and return the profile instead of the response
+
+    Triggered by `?profile=1` together with an `X-Admin-Token` header matching
+    ADMIN_TOKEN; without a configured token the flag is ignored. Use
+    `profile_format=speedscope` for a speedscope JSON (pyinstrument only);
+    the default is pyinstrument's HTML report. Without pyinstrument a cProfile
+    listing is returned, which also includes anything else the event loop ran
+    meanwhile.
+    """
+
+    def __init__(self, app, admin_token: str = ""):
+        self.app = app
+        self.admin_token = admin_token
+
+    def _requested(self, scope) -> bool:
+        if not self.admin_token or scope["type"] != "http":
+            return False
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        if query.get("profile", ["0"])[0] not in ("1", "true"):
+            return False
+        headers = dict(scope.get("headers", []))
+        # Compared as bytes: compare_digest rejects non-ASCII str with TypeError
+        supplied = headers.get(b"x-admin-token", b"")
+        return hmac.compare_digest(supplied, self.admin_token.encode("utf-8"))
+
+    async def __call__(self, scope, receive, send):
+        if not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        output_format = query.get("profile_format", ["html"])[0]
+        status = 500
+
+        async def capture(message):
+            # The real response is discarded; only its status is reported
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        # Sampling profiler (optional); cProfile is the fallback
+        pyinstrument = optional_import("pyinstrument")
+        if pyinstrument:
+            profiler = pyinstrument.Profiler(async_mode="enabled")
+            profiler.start()
+            try:
+                await self.app(scope, receive, capture)
+            finally:
+                profiler.stop()
+            if output_format == "speedscope":
+                from pyinstrument.renderers import SpeedscopeRenderer
+                body, content_type = profiler.output(SpeedscopeRenderer()), "application/json"
+            else:
+                body, content_type = profiler.output_html(), "text/html; charset=utf-8"
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                await self.app(scope, receive, capture)
+            finally:
+                profiler.disable()
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(60)
+            body, content_type = stream.getvalue(), "text/plain; charset=utf-8"
+
+        logger.info("Profiled %s %s (status %s)", scope['method'], scope['path'], status)
+        payload = body.encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", content_type.encode("latin-1")),
+                (b"content-length", str(len(payload)).encode("latin-1")),
+                (b"x-profiled-status", str(status).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": payload})
@@ -0,0 +1,167 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional
+from app.core.logger import get_logger
+from app.core.request_context import Priority
+from app.core.resilience import ServiceUnavailableError
+
+logger = get_logger(__name__)
+
+class AdmissionRejected(ServiceUnavailableError):
+    """A request waited too long for upstream quota and was shed"""
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `rate` per second"""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def time_until(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 if they are now)"""
+        self._refill()
+        missing = min(amount, self.capacity) - self.tokens
+        return max(0.0, missing / self.rate) if missing > 0 else 0.0
+
+    def consume(self, amount: float):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def refund(self, amount: float):
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+class _Waiter:
+    def __init__(self, tokens: int, future: asyncio.Future):
+        self.tokens = tokens
+        self.future = future
+
+class AdmissionScheduler:
+    """Admit upstream calls under RPM/TPM budgets, by priority class and fairly across tenants
+
+    Higher priority classes are always served first. Within a class, tenants
+    take turns (round robin) so one tenant's burst cannot starve the others.
+    Requests that wait longer than their class's queue timeout are shed.
+    """
+
+    def __init__(self, rpm: int, tpm: int, queue_timeouts: Dict[Priority, float]):
+        self.enabled = rpm > 0 or tpm > 0
+        self.requests = TokenBucket(rpm, rpm / 60.0) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm, tpm / 60.0) if tpm > 0 else None
+        self.queue_timeouts = queue_timeouts
+        # priority -> tenant -> FIFO of waiters; tenant order rotates for fairness
+        self._queues: Dict[Priority, "OrderedDict[str, Deque[_Waiter]]"] = {
+            priority: OrderedDict() for priority in Priority
+        }
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+
+        self.admitted = 0
+        self.shed = 0
+
+    def _wait_time(self, tokens: int) -> float:
+        wait = 0.0
+        if self.requests:
+            wait = max(wait, self.requests.time_until(1))
+        if self.tokens:
+            wait = max(wait, self.tokens.time_until(tokens))
+        return wait
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        """Head of the highest-priority queue, taking tenants in turn"""
+        for priority in Priority:
+            tenants = self._queues[priority]
+            while tenants:
+                tenant, waiters = next(iter(tenants.items()))
+                while waiters and waiters[0].future.done():
+                    waiters.popleft()
+                if not waiters:
+                    del tenants[tenant]
+                    continue
+                return waiters[0]
+        return None
+
+    def _pop_waiter(self):
+        for priority in Priority:
+            tenants = self._queues[priority]
+            if tenants:
+                tenant, waiters = next(iter(tenants.items()))
+                waiters.popleft()
+                # Rotate: this tenant goes to the back of its class
+                tenants.move_to_end(tenant)
+                if not waiters:
+                    del tenants[tenant]
+                return
+
+    def _dispatch(self):
+        """Grant as many queued requests as the buckets allow"""
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+
+        while True:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            wait = self._wait_time(waiter.tokens)
+            if wait > 0:
+                self._wakeup = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            self._pop_waiter()
+            if self.requests:
+                self.requests.consume(1)
+            if self.tokens:
+                self.tokens.consume(waiter.tokens)
+            self.admitted += 1
+            waiter.future.set_result(None)
+
+    async def acquire(self, tokens: int, priority: Priority = Priority.INTERACTIVE, tenant: str = "default"):
+        """Wait for quota for one request of roughly `tokens` tokens, or raise AdmissionRejected"""
+        if not self.enabled:
+            return
+
+        waiter = _Waiter(tokens, asyncio.get_running_loop().create_future())
+        self._queues[priority].setdefault(tenant, deque()).append(waiter)
+        self._dispatch()
+        if waiter.future.done():
+            return
+
+        timeout = self.queue_timeouts.get(priority)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=timeout)
+        except asyncio.TimeoutError:
+            waiter.future.cancel()
+            self.shed += 1
+            logger.warning("Shed %s LLM request for tenant %s after %ss in queue", priority.name.lower(), tenant, timeout)
+            raise AdmissionRejected("LLM capacity is exhausted, please retry shortly", retry_after=timeout)
+        except asyncio.CancelledError:
+            waiter.future.cancel()
+            raise
+        finally:
+            # A cancelled head waiter must not block the ones behind it
+            self._dispatch()
+
+    def refund(self, tokens: int):
+        """Return over-estimated tokens once actual usage is known"""
+        if self.tokens and tokens > 0:
+            self.tokens.refund(tokens)
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "queued": {
+                priority.name.lower(): sum(len(waiters) for waiters in self._queues[priority].values())
+                for priority in Priority
+            },
+            "requests_available": round(self.requests.tokens, 1) if self.requests else None,
+            "tokens_available": round(self.tokens.tokens) if self.tokens else None
+        }
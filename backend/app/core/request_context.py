@@ -0,0 +1,71 @@
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+
+class Priority(IntEnum):
+    """Upstream admission classes; lower values are served first"""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+    WARMUP = 2
+
+# Per-request cache control, set from the Cache-Control request header:
+#   no-store -> skip the LLM response cache entirely
+#   no-cache -> ignore cached responses but store the fresh one
+cache_bypass: ContextVar[bool] = ContextVar("cache_bypass", default=False)
+cache_refresh: ContextVar[bool] = ContextVar("cache_refresh", default=False)
+
+# Who the work is for and how urgent it is, used for fair upstream admission
+tenant_id: ContextVar[str] = ContextVar("tenant_id", default="default")
+request_priority: ContextVar[Priority] = ContextVar("request_priority", default=Priority.INTERACTIVE)
+
+# Correlates log lines, traces and the client's view of one request (X-Request-ID)
+request_id: ContextVar[str] = ContextVar("request_id", default="-")
+
+@contextmanager
+def use_priority(priority: Priority):
+    """Run a block of work (e.g. ingestion or warmup) at a different admission priority"""
+    token = request_priority.set(priority)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+class RequestContextMiddleware:
+    """ASGI middleware that exposes request-scoped settings through context variables"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope.get("headers", [])}
+        directives = {part.strip().lower() for part in headers.get("cache-control", "").split(",")}
+
+        # Fair queuing key: explicit tenant, else API key, else client address
+        client = scope.get("client")
+        tenant = headers.get("x-tenant-id") or headers.get("x-api-key") or (client[0] if client else "default")
+
+        # Honour a caller-supplied id (e.g. from a proxy) so logs line up across services
+        rid = headers.get("x-request-id", "")[:64] or uuid.uuid4().hex
+
+        tokens = [
+            (cache_bypass, cache_bypass.set("no-store" in directives)),
+            (cache_refresh, cache_refresh.set("no-cache" in directives)),
+            (tenant_id, tenant_id.set(tenant)),
+            (request_id, request_id.set(rid)),
+        ]
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (b"x-request-id", rid.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            for var, token in reversed(tokens):
+                var.reset(token)
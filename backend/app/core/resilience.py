@@ -0,0 +1,185 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+class ServiceUnavailableError(Exception):
+    """An upstream dependency is temporarily refusing work; safe to retry later"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class CircuitOpenError(ServiceUnavailableError):
+    """Raised without calling upstream while the circuit breaker is open"""
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Read Retry-After (seconds or HTTP date) or retry-after-ms from an HTTP error's response"""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return max(0.0, float(retry_after_ms) / 1000.0)
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class RetryPolicy:
+    """Jittered exponential backoff that honours Retry-After"""
+
+    def __init__(self, max_retries: int = 3, base_delay: float = 0.5, max_delay: float = 20.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def compute_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before retry number `attempt` (0-based)"""
+        if retry_after is not None:
+            # Server knows best; add a little jitter so clients don't retry in lockstep
+            return min(self.max_delay, retry_after * random.uniform(1.0, 1.1))
+        # "Full jitter" backoff
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+class CircuitBreaker:
+    """Stop calling an upstream after repeated failures, then probe it after a cool-down"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def before_call(self):
+        """Raise CircuitOpenError if the call must not go upstream"""
+        if self.state == self.OPEN:
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0:
+                raise CircuitOpenError(f"{self.name} is temporarily unavailable (circuit open)", retry_after=remaining)
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+
+        if self.state == self.HALF_OPEN:
+            # Let exactly one probe through
+            if self._probe_in_flight:
+                raise CircuitOpenError(f"{self.name} is recovering (circuit half-open)", retry_after=1.0)
+            self._probe_in_flight = True
+
+    def release_probe(self):
+        """Forget an abandoned probe (e.g. a cancelled call) so another can be made"""
+        self._probe_in_flight = False
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info("Circuit for %s closed", self.name)
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning("Circuit for %s opened after %s failures", self.name, self.failures)
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+async def hedged(make_call: Callable[[], Awaitable[Any]], delay: float) -> Any:
+    """Start a second identical call if the first hasn't finished after `delay`; first success wins"""
+    first = asyncio.ensure_future(make_call())
+    pending = {first}
+    error: Optional[BaseException] = None
+    try:
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if done:
+            return first.result()
+
+        pending.add(asyncio.ensure_future(make_call()))
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                # A call cancelled from elsewhere has no exception to read; the other may still win
+                if task.cancelled():
+                    continue
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        # Both calls were cancelled without either failing
+        raise error or asyncio.CancelledError()
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def call_with_retries(
+    make_call: Callable[[], Awaitable[Any]],
+    policy: RetryPolicy,
+    breaker: Optional[CircuitBreaker] = None,
+    is_retryable: Callable[[BaseException], bool] = lambda exc: True,
+    hedge_delay: Optional[float] = None,
+    on_retry: Optional[Callable[[int, BaseException, float], None]] = None
+) -> Any:
+    """Run a call behind a circuit breaker with backoff retries and optional hedging"""
+    attempt = 0
+    while True:
+        if breaker:
+            breaker.before_call()
+        try:
+            if hedge_delay:
+                result = await hedged(make_call, hedge_delay)
+            else:
+                result = await make_call()
+        except asyncio.CancelledError:
+            if breaker:
+                breaker.release_probe()
+            raise
+        except ServiceUnavailableError:
+            # Refused locally (e.g. load shedding); says nothing about upstream health
+            if breaker:
+                breaker.release_probe()
+            raise
+        except Exception as e:
+            retryable = is_retryable(e)
+            if breaker:
+                if retryable:
+                    breaker.record_failure()
+                else:
+                    # The upstream answered; a 4xx says nothing about its health
+                    breaker.record_success()
+            if not retryable or attempt >= policy.max_retries:
+                raise
+            delay = policy.compute_delay(attempt, retry_after_seconds(e))
+            if on_retry:
+                on_retry(attempt + 1, e, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+
+        if breaker:
+            breaker.record_success()
+        return result
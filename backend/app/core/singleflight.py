@@ -0,0 +1,63 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+class _Call:
+    """A shared in-flight call and the number of callers waiting on it"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution
+
+    The first caller starts the work as a separate task; everyone with the same
+    key awaits that task. A caller being cancelled only cancels the shared work
+    once no one else is waiting for it, and errors propagate to every waiter.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task, key=key, call=call: self._finish(key, call))
+            self.executed += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _finish(self, key: str, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # Mark the exception as retrieved even if every waiter went away
+        if not call.task.cancelled():
+            call.task.exception()
+
+    def is_running(self, key: str) -> bool:
+        """Whether a call with this key would join an existing execution"""
+        return key in self._calls
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> Dict:
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight()
+        }
@@ -0,0 +1,44 @@
+import json
+from typing import Any, AsyncIterator, Dict, Optional
+from fastapi.responses import StreamingResponse
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+def format_sse(data: Any, event: Optional[str] = None) -> str:
+    """Encode one server-sent event; data is JSON so newlines survive the wire"""
+    message = ""
+    if event:
+        message += f"event: {event}\n"
+    message += f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+    return message
+
+async def text_event_stream(chunks: AsyncIterator[str], done: Optional[Dict] = None) -> AsyncIterator[str]:
+    """Forward text chunks as `token` events, then a `done` or `error` event"""
+    try:
+        async for text in chunks:
+            yield format_sse({"text": text}, event="token")
+        yield format_sse(done or {}, event="done")
+    except Exception as e:
+        logger.error("Error while streaming response: %s", e)
+        yield format_sse({"detail": str(e)}, event="error")
+
+def event_stream_response(events: AsyncIterator[str]) -> StreamingResponse:
+    """text/event-stream response with proxy buffering disabled"""
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def format_ndjson(data: Any) -> str:
+    """Encode one newline-delimited JSON record"""
+    return json.dumps(data, ensure_ascii=False) + "\n"
+
+def ndjson_response(lines: AsyncIterator[str]) -> StreamingResponse:
+    """application/x-ndjson response with proxy buffering disabled"""
+    return StreamingResponse(
+        lines,
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
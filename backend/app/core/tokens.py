@@ -0,0 +1,14 @@
+from typing import Iterable
+
+# Rough average for English text with OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """Cheaply estimate the token count of a string without a tokenizer"""
+    if not text:
+        return 0
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def estimate_total_tokens(texts: Iterable[str]) -> int:
+    """Estimate the combined token count of several strings"""
+    return sum(estimate_tokens(text) for text in texts)
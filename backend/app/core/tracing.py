@@ -0,0 +1,155 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence
+from app.core.logger import get_logger
+
+logger = get_logger("app.trace")
+
+class Span:
+    """One timed stage of a request"""
+
+    __slots__ = ("name", "start", "duration", "attrs")
+
+    def __init__(self, name: str, start: float, duration: float, attrs: Dict):
+        self.name = name
+        self.start = start
+        self.duration = duration
+        self.attrs = attrs
+
+class Trace:
+    """Spans recorded while handling one request
+
+    Spans may finish on worker threads (asyncio.to_thread copies the context),
+    so recording is locked.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def totals(self) -> Dict[str, Dict]:
+        """Total duration and count per span name, in first-seen order"""
+        totals: Dict[str, Dict] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            entry = totals.setdefault(span.name, {"duration": 0.0, "count": 0})
+            entry["duration"] += span.duration
+            entry["count"] += 1
+        return totals
+
+    def server_timing(self) -> str:
+        """Server-Timing header value; repeated stages (e.g. retried LLM calls) are summed"""
+        entries = []
+        for name, entry in self.totals().items():
+            value = f"{name};dur={entry['duration'] * 1000:.1f}"
+            if entry["count"] > 1:
+                value += f';desc="{entry["count"]}x"'
+            entries.append(value)
+        entries.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(entries)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            spans = list(self.spans)
+        return {
+            "duration_ms": round(self.elapsed() * 1000, 1),
+            "spans": [
+                {
+                    "name": span.name,
+                    "offset_ms": round((span.start - self.started) * 1000, 1),
+                    "duration_ms": round(span.duration * 1000, 1),
+                    **span.attrs
+                }
+                for span in spans
+            ]
+        }
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time a block of work as a named stage of the current request
+
+    Works in sync and async code; outside a traced request it only costs a
+    context-variable lookup. Attributes end up in the structured trace log.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield attrs
+        return
+    started = time.perf_counter()
+    try:
+        yield attrs
+    except BaseException:
+        attrs["error"] = True
+        raise
+    finally:
+        trace.add(Span(name, started, time.perf_counter() - started, attrs))
+
+class TracingMiddleware:
+    """ASGI middleware that traces each request, adds a Server-Timing header and logs the spans
+
+    Stages that finish after the response headers are sent (e.g. while
+    streaming) only appear in the log line.
+    """
+
+    def __init__(self, app, enabled: bool = True, exclude_paths: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.enabled = enabled
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace()
+        token = _current_trace.set(trace)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(token)
+            route = scope.get("route")
+            details = trace.to_dict()
+            # One line per request, so it must never be sampled away
+            logger.info(
+                "%s %s %s %.1fms",
+                scope["method"],
+                scope["path"],
+                status,
+                details["duration_ms"],
+                extra={
+                    "event": "request_trace",
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": getattr(route, "path", None),
+                    "status": status,
+                    "rate_limit": False,
+                    **details
+                }
+            )
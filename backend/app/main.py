@@ -1,8 +1,21 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from app.api import upload, notes, flashcards, quiz, generator, ats
+from fastapi.responses import JSONResponse, Response
+from app.api import upload, notes, flashcards, quiz, generator, ats, files, study_pack
+from app.core import metrics
 from app.core.config import settings
+from app.core.logger import dropped_records
+from app.core.profiling import ProfilingMiddleware
+from app.core.tracing import TracingMiddleware
+from app.core.request_context import RequestContextMiddleware
+from app.models.llm_client import llm_client
+from app.services.context_builder import context_builder
+from app.services.embeddings import embedding_service
+from app.services.notes_service import notes_service
+from app.services.generator_service import generator_service
+from app.services.export_service import export_service
+from app.services.warmup import warmup_service
+from app.services.item_pool import item_pool
 
 app = FastAPI(title=settings.PROJECT_NAME)
 
@@ -13,6 +26,32 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(TracingMiddleware, enabled=settings.TRACING_ENABLED)
+# Outside tracing so the trace log line still carries the request id
+app.add_middleware(RequestContextMiddleware)
+app.add_middleware(ProfilingMiddleware, admin_token=settings.ADMIN_TOKEN)
+
+CACHE_HIT_RATIO = metrics.registry.gauge("cache_hit_ratio", "Lookup hit ratio since start", ["cache"])
+LLM_CACHE_TOKENS_SAVED = metrics.registry.gauge("llm_cache_tokens_saved", "Tokens not spent thanks to cached responses")
+LLM_INFLIGHT = metrics.registry.gauge("llm_inflight_calls", "Distinct LLM calls currently in flight")
+LLM_QUEUED = metrics.registry.gauge("llm_admission_queued", "Requests waiting for upstream quota", ["priority"])
+LLM_CIRCUIT_OPEN = metrics.registry.gauge("llm_circuit_open", "1 while the OpenAI circuit breaker is not closed")
+LOG_RECORDS_DROPPED = metrics.registry.gauge("log_records_dropped", "Log records discarded because the log queue was full")
+
+def collect_service_stats():
+    """Copy cache, single-flight and admission stats into gauges at scrape time"""
+    llm_cache = llm_client.cache.stats()
+    CACHE_HIT_RATIO.set(llm_cache["hit_rate"], cache="llm")
+    CACHE_HIT_RATIO.set(embedding_service.cache.stats()["hit_rate"], cache="embedding")
+    LLM_CACHE_TOKENS_SAVED.set(llm_cache["tokens_saved"])
+    LLM_INFLIGHT.set(llm_client.inflight.in_flight())
+    for priority, queued in llm_client.admission.stats()["queued"].items():
+        LLM_QUEUED.set(queued, priority=priority)
+    LLM_CIRCUIT_OPEN.set(0 if llm_client.breaker.state == llm_client.breaker.CLOSED else 1)
+    LOG_RECORDS_DROPPED.set(dropped_records())
+
+metrics.registry.add_collector(collect_service_stats)
 
 @app.get("/")
 async def root():
@@ -30,15 +69,33 @@ async def health_check():
         "status": "ok",
         "service": "AI Resume Analyzer",
         "upload_dir": settings.UPLOAD_DIR,
-        "max_upload_mb": settings.MAX_UPLOAD_MB
+        "max_upload_mb": settings.MAX_UPLOAD_MB,
+        "embedding_cache": embedding_service.cache.stats(),
+        "llm_cache": llm_client.cache.stats(),
+        "llm_inflight": llm_client.inflight.stats(),
+        "llm_admission": llm_client.admission.stats(),
+        "llm_routing": llm_client.router.stats(),
+        "prompt_context": context_builder.stats(),
+        "notes_partials": notes_service.stats(),
+        "generator_sections": generator_service.stats(),
+        "exports": export_service.stats(),
+        "warmup": warmup_service.stats(),
+        "item_pools": item_pool.stats()
     })
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
 app.include_router(upload.router, prefix="/api")
 app.include_router(notes.router, prefix="/api")
 app.include_router(flashcards.router, prefix="/api")
 app.include_router(quiz.router, prefix="/api")
 app.include_router(generator.router, prefix="/api")
 app.include_router(ats.router, prefix="/api")
+app.include_router(files.router, prefix="/api")
+app.include_router(study_pack.router, prefix="/api")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Optional, Set, Tuple
+from app.core.cache import LRUCache, SQLiteStore
+from app.core.config import settings
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+class LLMResponseCache:
+    """Memory LRU plus SQLite cache for chat completion results, with TTL and tag invalidation"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        memory_items: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        enabled: Optional[bool] = None
+    ):
+        self.enabled = settings.LLM_CACHE_ENABLED if enabled is None else enabled
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.LLM_CACHE_TTL_SECONDS
+        self.memory = LRUCache(max_entries=memory_items or settings.LLM_CACHE_MEMORY_ITEMS, ttl_seconds=self.ttl_seconds)
+        self.disk = SQLiteStore(path or settings.LLM_CACHE_PATH, table="llm_responses")
+        # tag -> keys held in memory, so invalidation can clear both tiers
+        self._tag_keys: Dict[str, Set[str]] = {}
+        # invalidate() runs in worker threads (asyncio.to_thread) while set() runs on the loop
+        self._tag_lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.tokens_saved = 0
+
+    @staticmethod
+    def make_key(
+        model: str,
+        system_prompt: Optional[str],
+        prompt: str,
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        response_format: Optional[Dict]
+    ) -> str:
+        """Fingerprint of everything that determines a completion"""
+        payload = json.dumps(
+            [model, system_prompt, prompt, temperature, max_tokens, response_format],
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Return a cached result or None"""
+        if not self.enabled:
+            return None
+
+        entry: Optional[Tuple[Any, int]] = self.memory.get(key)
+        if entry is not None:
+            self.memory_hits += 1
+        else:
+            try:
+                rows = await asyncio.to_thread(self.disk.get_many, [key], self.ttl_seconds)
+            except Exception as e:
+                logger.warning("LLM cache disk lookup failed: %s", e)
+                rows = {}
+            if key not in rows:
+                self.misses += 1
+                return None
+            blob, stored_at = rows[key]
+            record = json.loads(blob)
+            entry = (record["result"], record.get("tokens", 0))
+            self.memory.set(key, entry, stored_at=stored_at)
+            self.disk_hits += 1
+
+        result, tokens = entry
+        self.tokens_saved += tokens
+        return result
+
+    async def set(self, key: str, result: Any, tokens: int = 0, tag: Optional[str] = None):
+        """Store a completion result in both tiers"""
+        if not self.enabled:
+            return
+        self.memory.set(key, (result, tokens))
+        if tag:
+            with self._tag_lock:
+                self._tag_keys.setdefault(tag, set()).add(key)
+        blob = json.dumps({"result": result, "tokens": tokens}, ensure_ascii=False).encode("utf-8")
+        try:
+            await asyncio.to_thread(self.disk.put_many, [(key, blob, tag)])
+        except Exception as e:
+            logger.warning("LLM cache disk write failed: %s", e)
+
+    def record_bypass(self):
+        self.bypassed += 1
+
+    def invalidate(self, tag: str) -> int:
+        """Drop every entry stored under a tag (e.g. a file_id whose documents changed)"""
+        with self._tag_lock:
+            keys = self._tag_keys.pop(tag, set())
+        try:
+            keys.update(self.disk.delete_tag(tag))
+        except Exception as e:
+            logger.warning("LLM cache disk invalidation failed: %s", e)
+        for key in keys:
+            self.memory.delete(key)
+        if keys:
+            logger.info("Invalidated %s cached LLM responses for %s", len(keys), tag)
+        return len(keys)
+
+    def stats(self) -> Dict:
+        """Hit rate and tokens saved"""
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "tokens_saved": self.tokens_saved,
+            "memory_entries": len(self.memory)
+        }
@@ -1,7 +1,23 @@
-from openai import AsyncOpenAI
-from typing import List, Dict, Any, Optional
+import asyncio
+import time
+from functools import cached_property
+from typing import TYPE_CHECKING, AsyncIterator, List, Dict, Any, Optional, Tuple
 from app.core.config import settings
+from app.core.lazy import LazySingleton
 from app.core.logger import get_logger
+from app.core.metrics import LLM_CALLS, LLM_REQUEST_LATENCY, LLM_REQUESTS, LLM_RETRIES, LLM_TOKENS
+from app.core.request_context import Priority, cache_bypass, cache_refresh, request_priority, tenant_id
+from app.core.rate_limiter import AdmissionScheduler
+from app.core.singleflight import SingleFlight
+from app.core.tokens import estimate_tokens, estimate_total_tokens
+from app.core.tracing import span
+from app.core.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, ServiceUnavailableError, call_with_retries
+from app.models.llm_cache import LLMResponseCache
+from app.models.router import ModelRouter
+
+if TYPE_CHECKING:
+    import httpx
+    from openai import AsyncOpenAI
 
 logger = get_logger(__name__)
 
@@ -9,19 +25,205 @@ class LLMClient:
     """Abstraction layer for LLM API calls"""
     
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY) if settings.OPENAI_API_KEY else None
+        self._client: Optional["AsyncOpenAI"] = None
+        self.retry_policy = RetryPolicy(
+            max_retries=settings.OPENAI_MAX_RETRIES,
+            base_delay=settings.OPENAI_RETRY_BASE_DELAY,
+            max_delay=settings.OPENAI_RETRY_MAX_DELAY
+        )
+        self.breaker = CircuitBreaker(
+            "OpenAI API",
+            failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.CIRCUIT_BREAKER_RESET_SECONDS
+        )
+        self.hedge_delay = settings.LLM_HEDGE_DELAY_MS / 1000.0
+        self.admission = AdmissionScheduler(
+            rpm=settings.LLM_RPM_LIMIT,
+            tpm=settings.LLM_TPM_LIMIT,
+            queue_timeouts={
+                Priority.INTERACTIVE: settings.LLM_QUEUE_TIMEOUT_INTERACTIVE,
+                Priority.BACKGROUND: settings.LLM_QUEUE_TIMEOUT_BACKGROUND,
+                Priority.WARMUP: settings.LLM_QUEUE_TIMEOUT_WARMUP
+            }
+        )
         self.model = settings.OPENAI_MODEL
         self.embedding_model = settings.EMBEDDING_MODEL
+        # Picks OPENAI_MODEL or OPENAI_FAST_MODEL per call
+        self.router = ModelRouter(self.model, settings.OPENAI_FAST_MODEL)
+        self.cache = LLMResponseCache()
+        # Identical concurrent requests share one upstream call
+        self.inflight = SingleFlight()
+    
+    @property
+    def client(self) -> Optional["AsyncOpenAI"]:
+        """OpenAI client, created on first use so importing the app doesn't load the SDK"""
+        if self._client is None:
+            self._client = self._build_client()
+        return self._client
+    
+    @cached_property
+    def chat_timeout(self) -> "httpx.Timeout":
+        import httpx
+        return httpx.Timeout(settings.OPENAI_CHAT_TIMEOUT, connect=settings.OPENAI_CONNECT_TIMEOUT)
+    
+    @cached_property
+    def embedding_timeout(self) -> "httpx.Timeout":
+        import httpx
+        return httpx.Timeout(settings.OPENAI_EMBEDDING_TIMEOUT, connect=settings.OPENAI_CONNECT_TIMEOUT)
+    
+    @staticmethod
+    def _build_client() -> Optional["AsyncOpenAI"]:
+        """OpenAI client on a tuned connection pool; retries are handled by _request"""
+        if not settings.OPENAI_API_KEY:
+            return None
+        import httpx
+        from openai import AsyncOpenAI
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(settings.OPENAI_CHAT_TIMEOUT, connect=settings.OPENAI_CONNECT_TIMEOUT)
+        )
+        return AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL or None,
+            max_retries=0,
+            http_client=http_client
+        )
+    
+    @staticmethod
+    def _is_retryable(exc: BaseException) -> bool:
+        """Connection problems, timeouts, 408/409/429 and 5xx are worth retrying"""
+        import openai
+        if isinstance(exc, openai.APIConnectionError):
+            return True
+        if isinstance(exc, openai.APIStatusError):
+            return exc.status_code in (408, 409, 429) or exc.status_code >= 500
+        return False
+    
+    @staticmethod
+    def _estimate_request_tokens(messages: List[Dict[str, str]], max_tokens: Optional[int]) -> int:
+        """Prompt size plus the completion budget, for TPM accounting"""
+        return estimate_total_tokens(message["content"] for message in messages) + (max_tokens or 1000)
+    
+    async def _request(
+        self,
+        make_call,
+        hedge: bool = False,
+        tokens: int = 0,
+        kind: str = "chat",
+        model: Optional[str] = None,
+        caller: str = "unknown"
+    ):
+        """Send one upstream request with admission control, retries, circuit breaking and optional hedging"""
+        labels = {"kind": kind, "model": model or self.model, "caller": caller}
+        
+        def log_retry(attempt: int, exc: BaseException, delay: float):
+            LLM_RETRIES.inc(**labels)
+            logger.warning("OpenAI request failed (%s), retry %s in %.2fs", exc, attempt, delay)
+        
+        async def admitted_call():
+            # Every attempt (including retries and hedges) spends quota
+            with span("llm_queue"):
+                await self.admission.acquire(tokens, priority=request_priority.get(), tenant=tenant_id.get())
+            with span("openai", kind=kind):
+                return await make_call()
+        
+        started = time.perf_counter()
+        result = "error"
+        try:
+            response = await call_with_retries(
+                admitted_call,
+                self.retry_policy,
+                breaker=self.breaker,
+                is_retryable=self._is_retryable,
+                hedge_delay=self.hedge_delay if hedge and self.hedge_delay > 0 else None,
+                on_retry=log_retry
+            )
+            result = "ok"
+            self._record_usage(response, labels)
+            if kind != "chat_stream":
+                # A stream returns at its first byte, which says little about generation time
+                self.router.observe(labels["model"], caller, time.perf_counter() - started)
+            return response
+        except asyncio.CancelledError:
+            result = "cancelled"
+            raise
+        except CircuitOpenError:
+            result = "circuit_open"
+            raise
+        except ServiceUnavailableError:
+            result = "shed"
+            raise
+        finally:
+            LLM_REQUEST_LATENCY.observe(time.perf_counter() - started, **labels)
+            LLM_REQUESTS.inc(**labels, result=result)
+    
+    @staticmethod
+    def _record_usage(response, labels: Dict[str, str]):
+        """Count the prompt and completion tokens the provider billed for"""
+        usage = getattr(response, "usage", None)
+        for token_type in ("prompt", "completion"):
+            count = getattr(usage, f"{token_type}_tokens", 0) or 0
+            if count:
+                LLM_TOKENS.inc(count, **labels, type=token_type)
+    
+    def _refund_unused(self, estimated_tokens: int, response):
+        """Give back TPM budget that the completion did not actually use"""
+        used = self._total_tokens(response)
+        if used:
+            self.admission.refund(estimated_tokens - used)
+    
+    def _cache_flags(self, use_cache: bool, force_refresh: bool):
+        """Combine per-call cache flags with the per-request Cache-Control header"""
+        return use_cache and not cache_bypass.get(), force_refresh or cache_refresh.get()
+    
+    async def _cache_lookup(self, key: str, use_cache: bool, force_refresh: bool) -> Tuple[Optional[Any], str]:
+        """Return a cached result (unless the caller bypasses or refreshes the cache) and the cache status"""
+        if not use_cache:
+            self.cache.record_bypass()
+            return None, "bypass"
+        if force_refresh:
+            return None, "refresh"
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return cached, "hit"
+        # Joining an identical in-flight call costs nothing upstream either
+        return None, "coalesced" if self.inflight.is_running(key) else "miss"
+    
+    @staticmethod
+    def _total_tokens(response) -> int:
+        usage = getattr(response, "usage", None)
+        return getattr(usage, "total_tokens", 0) or 0
+    
+    def invalidate_cache(self, tag: str) -> int:
+        """Forget cached responses tied to a tag, e.g. when a file_id's documents change"""
+        return self.cache.invalidate(tag)
     
     async def generate_text(
         self,
         prompt: str,
         system_prompt: Optional[str] = None,
         temperature: float = 0.7,
-        max_tokens: int = 1000
+        max_tokens: int = 1000,
+        use_cache: bool = True,
+        force_refresh: bool = False,
+        cache_tag: Optional[str] = None,
+        hedge: bool = False,
+        caller: str = "unknown"
     ) -> str:
         """Generate text using LLM"""
         try:
+            use_cache, force_refresh = self._cache_flags(use_cache, force_refresh)
+            model = self.router.route(caller, estimate_tokens((system_prompt or "") + prompt), max_tokens)
+            cache_key = self.cache.make_key(model, system_prompt, prompt, temperature, max_tokens, None)
+            cached, cache_status = await self._cache_lookup(cache_key, use_cache, force_refresh)
+            LLM_CALLS.inc(kind="chat", model=model, caller=caller, cache=cache_status)
+            if cached is not None:
+                return cached
+            
             if not self.client:
                 raise ValueError("OpenAI API key not configured")
             
@@ -30,41 +232,166 @@ class LLMClient:
                 messages.append({"role": "system", "content": system_prompt})
             messages.append({"role": "user", "content": prompt})
             
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
+            estimated_tokens = self._estimate_request_tokens(messages, max_tokens)
+            
+            async def complete() -> str:
+                response = await self._request(
+                    lambda: self.client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        timeout=self.chat_timeout
+                    ),
+                    hedge=hedge,
+                    tokens=estimated_tokens,
+                    model=model,
+                    caller=caller
+                )
+                self._refund_unused(estimated_tokens, response)
+                content = response.choices[0].message.content.strip()
+                if use_cache:
+                    await self.cache.set(cache_key, content, tokens=self._total_tokens(response), tag=cache_tag)
+                return content
             
-            return response.choices[0].message.content.strip()
+            return await self.inflight.do(cache_key, complete)
         except Exception as e:
-            logger.error(f"Error generating text: {str(e)}")
+            logger.error("Error generating text: %s", e)
             raise
     
-    async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+    async def stream_text(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        use_cache: bool = True,
+        force_refresh: bool = False,
+        cache_tag: Optional[str] = None,
+        caller: str = "unknown"
+    ) -> AsyncIterator[str]:
+        """Stream generated text as it arrives; shares its cache entries with generate_text"""
+        use_cache, force_refresh = self._cache_flags(use_cache, force_refresh)
+        model = self.router.route(caller, estimate_tokens((system_prompt or "") + prompt), max_tokens)
+        cache_key = self.cache.make_key(model, system_prompt, prompt, temperature, max_tokens, None)
+        cached, cache_status = await self._cache_lookup(cache_key, use_cache, force_refresh)
+        if cache_status == "coalesced":
+            # Streams are never shared, so this one goes upstream regardless
+            cache_status = "miss"
+        LLM_CALLS.inc(kind="chat_stream", model=model, caller=caller, cache=cache_status)
+        if cached is not None:
+            yield cached
+            return
+        
+        if not self.client:
+            raise ValueError("OpenAI API key not configured")
+        
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        
+        try:
+            stream = await self._request(
+                lambda: self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True,
+                    timeout=self.chat_timeout
+                ),
+                tokens=self._estimate_request_tokens(messages, max_tokens),
+                kind="chat_stream",
+                model=model,
+                caller=caller
+            )
+        except Exception as e:
+            logger.error("Error starting text stream: %s", e)
+            raise
+        
+        parts = []
+        completed = False
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
+            completed = True
+        finally:
+            if not completed:
+                # Consumer stopped early (e.g. client disconnected): drop the upstream request
+                await stream.response.aclose()
+        
+        # Streaming responses carry no usage block, so estimate
+        prompt_tokens = estimate_tokens((system_prompt or "") + prompt)
+        completion_tokens = estimate_tokens("".join(parts))
+        labels = {"kind": "chat_stream", "model": model, "caller": caller}
+        LLM_TOKENS.inc(prompt_tokens, **labels, type="prompt")
+        LLM_TOKENS.inc(completion_tokens, **labels, type="completion")
+        
+        content = "".join(parts).strip()
+        if use_cache and content:
+            await self.cache.set(cache_key, content, tokens=prompt_tokens + completion_tokens, tag=cache_tag)
+    
+    async def generate_embeddings(self, texts: List[str], caller: str = "embeddings") -> List[List[float]]:
         """Generate embeddings for a list of texts"""
         try:
             if not self.client:
                 raise ValueError("OpenAI API key not configured")
             
-            response = await self.client.embeddings.create(
+            # Caching happens in EmbeddingService, so every call here goes upstream
+            LLM_CALLS.inc(kind="embedding", model=self.embedding_model, caller=caller, cache="miss")
+            # Embedding calls are cheap and latency-sensitive, so they may be hedged
+            response = await self._request(
+                lambda: self.client.embeddings.create(
+                    model=self.embedding_model,
+                    input=texts,
+                    timeout=self.embedding_timeout,
+                    # openai==1.3.0 has no `dimensions` argument, so it goes in the body
+                    extra_body={"dimensions": settings.EMBEDDING_DIMENSIONS} if settings.EMBEDDING_DIMENSIONS else None
+                ),
+                hedge=True,
+                tokens=estimate_total_tokens(texts),
+                kind="embedding",
                 model=self.embedding_model,
-                input=texts
+                caller=caller
             )
             return [item.embedding for item in response.data]
         except Exception as e:
-            logger.error(f"Error generating embeddings: {str(e)}")
+            logger.error("Error generating embeddings: %s", e)
             raise
     
     async def generate_structured_output(
         self,
         prompt: str,
         system_prompt: Optional[str] = None,
-        json_mode: bool = True
+        json_mode: bool = True,
+        use_cache: bool = True,
+        force_refresh: bool = False,
+        cache_tag: Optional[str] = None,
+        hedge: bool = False,
+        caller: str = "unknown",
+        expected_output_tokens: Optional[int] = None
     ) -> Dict[str, Any]:
-        """Generate structured JSON output"""
+        """Generate structured JSON output
+
+        The completion is not capped; `expected_output_tokens` (e.g. from the
+        number of items asked for) sizes the call for routing and TPM admission.
+        """
         try:
+            response_format = {"type": "json_object"} if json_mode else None
+            use_cache, force_refresh = self._cache_flags(use_cache, force_refresh)
+            model = self.router.route(caller, estimate_tokens((system_prompt or "") + prompt), expected_output_tokens)
+            cache_key = self.cache.make_key(model, system_prompt, prompt, 0.3, None, response_format)
+            cached, cache_status = await self._cache_lookup(cache_key, use_cache, force_refresh)
+            LLM_CALLS.inc(kind="structured", model=model, caller=caller, cache=cache_status)
+            if cached is not None:
+                return cached
+            
             if not self.client:
                 raise ValueError("OpenAI API key not configured. Please set OPENAI_API_KEY in your .env file.")
             
@@ -79,48 +406,69 @@ class LLMClient:
             
             messages.append({"role": "user", "content": enhanced_prompt})
             
-            response_format = {"type": "json_object"} if json_mode else None
-            
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=0.3,
-                response_format=response_format
-            )
-            
-            content = response.choices[0].message.content.strip()
+            estimated_tokens = self._estimate_request_tokens(messages, expected_output_tokens)
             
-            # Clean up content if it has markdown code blocks
-            if content.startswith("```json"):
-                content = content[7:]  # Remove ```json
-            if content.startswith("```"):
-                content = content[3:]  # Remove ```
-            if content.endswith("```"):
-                content = content[:-3]  # Remove closing ```
-            content = content.strip()
+            async def complete() -> Dict[str, Any]:
+                response = await self._request(
+                    lambda: self.client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=0.3,
+                        response_format=response_format,
+                        timeout=self.chat_timeout
+                    ),
+                    hedge=hedge,
+                    tokens=estimated_tokens,
+                    kind="structured",
+                    model=model,
+                    caller=caller
+                )
+                self._refund_unused(estimated_tokens, response)
+                
+                content = response.choices[0].message.content.strip()
+                
+                # Clean up content if it has markdown code blocks
+                if content.startswith("```json"):
+                    content = content[7:]  # Remove ```json
+                if content.startswith("```"):
+                    content = content[3:]  # Remove ```
+                if content.endswith("```"):
+                    content = content[:-3]  # Remove closing ```
+                content = content.strip()
+                
+                result = self._parse_json(content)
+                if use_cache:
+                    await self.cache.set(cache_key, result, tokens=self._total_tokens(response), tag=cache_tag)
+                return result
             
-            import json
-            try:
-                return json.loads(content)
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse JSON response: {content[:200]}")
-                # Try to extract JSON from the response
-                import re
-                json_match = re.search(r'\{.*\}', content, re.DOTALL)
-                if json_match:
-                    try:
-                        return json.loads(json_match.group())
-                    except:
-                        pass
-                raise ValueError(f"Invalid JSON response from LLM: {str(e)}")
+            return await self.inflight.do(cache_key, complete)
         except ValueError:
             raise
         except Exception as e:
-            logger.error(f"Error generating structured output: {str(e)}")
+            logger.error("Error generating structured output: %s", e)
             if "API key" in str(e) or "authentication" in str(e).lower():
                 raise ValueError("OpenAI API key is invalid or not configured. Please check your OPENAI_API_KEY in .env file.")
             raise
 
+    @staticmethod
+    def _parse_json(content: str) -> Dict[str, Any]:
+        """Parse a JSON completion, salvaging an embedded object if needed"""
+        import json
+        try:
+            return json.loads(content)
+        except json.JSONDecodeError as e:
+            logger.error("Failed to parse JSON response (%d chars)", len(content))
+            logger.debug("Unparseable JSON response: %.200s", content)
+            # Try to extract JSON from the response
+            import re
+            json_match = re.search(r'\{.*\}', content, re.DOTALL)
+            if json_match:
+                try:
+                    return json.loads(json_match.group())
+                except:
+                    pass
+            raise ValueError(f"Invalid JSON response from LLM: {str(e)}")
+
 # Global instance
-llm_client = LLMClient()
+llm_client: LLMClient = LazySingleton(LLMClient)
 
@@ -0,0 +1,123 @@
+import math
+import threading
+import time
+from collections import Counter, deque
+from typing import Deque, Dict, Optional, Tuple
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.core.metrics import LLM_ROUTES
+
+logger = get_logger(__name__)
+
+# Per caller: requests of up to `fast_max_tokens` (prompt plus requested output) go to the
+# fast model; larger ones go to the primary model unless its recent p95 is over `slo_seconds`
+ROUTE_PROFILES: Dict[str, Dict[str, float]] = {
+    "flashcards": {"fast_max_tokens": 2500, "slo_seconds": 8.0},
+    "quiz": {"fast_max_tokens": 2500, "slo_seconds": 8.0},
+    "notes_map": {"fast_max_tokens": 2500, "slo_seconds": 8.0},
+    "notes": {"fast_max_tokens": 1200, "slo_seconds": 10.0},
+    "generate": {"fast_max_tokens": 1000, "slo_seconds": 12.0},
+    "profile": {"fast_max_tokens": 4000, "slo_seconds": 15.0},
+    # Detailed analysis: only leaves the primary model when it is too slow
+    "ats": {"fast_max_tokens": 0, "slo_seconds": 20.0},
+}
+
+# Completion budget assumed when a call does not cap it (structured output)
+DEFAULT_OUTPUT_TOKENS = 1000
+
+def _parse_overrides(spec: str) -> Dict[str, Dict[str, float]]:
+    """LLM_ROUTES entries like "quiz=3000/6,ats=0/30" (fast_max_tokens/slo_seconds)"""
+    overrides = {}
+    for part in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            caller, values = part.split("=", 1)
+            fast_max_tokens, slo_seconds = values.split("/", 1)
+            overrides[caller.strip()] = {"fast_max_tokens": int(fast_max_tokens), "slo_seconds": float(slo_seconds)}
+        except ValueError:
+            logger.warning("Ignoring invalid LLM_ROUTES entry: %s", part)
+    return overrides
+
+class ModelRouter:
+    """Choose the chat model per call from the task, the request size and recent latency
+
+    Routing is active only when OPENAI_FAST_MODEL names a model different from
+    OPENAI_MODEL; otherwise every call keeps using OPENAI_MODEL. Latencies of
+    completed non-streaming calls are kept for LLM_ROUTER_WINDOW_SECONDS per
+    model and caller. A caller whose primary-model p95 is over its SLO falls
+    back to the fast model until those samples age out, which lets the
+    primary model be tried again.
+    """
+
+    def __init__(self, primary: str, fast: Optional[str] = None):
+        self.primary = primary
+        self.fast = fast if fast and fast != primary else None
+        self.profiles = {**ROUTE_PROFILES, **_parse_overrides(settings.LLM_ROUTES)}
+        self.window = settings.LLM_ROUTER_WINDOW_SECONDS
+        self.min_samples = max(1, settings.LLM_ROUTER_MIN_SAMPLES)
+        self._latencies: Dict[Tuple[str, str], Deque[Tuple[float, float]]] = {}
+        self._lock = threading.Lock()
+        self._routes: Counter = Counter()
+
+    @property
+    def enabled(self) -> bool:
+        return self.fast is not None
+
+    def route(self, caller: str, prompt_tokens: int, max_tokens: Optional[int]) -> str:
+        """Model for one call; `max_tokens` is the completion cap, or its expected size when uncapped"""
+        profile = self.profiles.get(caller)
+        if not self.enabled or profile is None:
+            return self.primary
+        size = prompt_tokens + (max_tokens or DEFAULT_OUTPUT_TOKENS)
+        if size <= profile["fast_max_tokens"]:
+            model, reason = self.fast, "small"
+        elif self._over_slo(self.primary, caller, profile["slo_seconds"]):
+            model, reason = self.fast, "slo_fallback"
+        else:
+            model, reason = self.primary, "default"
+        self._routes[(caller, reason)] += 1
+        LLM_ROUTES.inc(caller=caller, model=model, reason=reason)
+        return model
+
+    def observe(self, model: str, caller: str, seconds: float):
+        """Record the latency of a completed call"""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self._lock:
+            samples = self._latencies.setdefault((model, caller), deque(maxlen=1000))
+            samples.append((now, seconds))
+
+    def p95(self, model: str, caller: str) -> Optional[float]:
+        """p95 latency over the window, or None with too few recent samples"""
+        cutoff = time.monotonic() - self.window
+        with self._lock:
+            samples = self._latencies.get((model, caller))
+            if not samples:
+                return None
+            while samples and samples[0][0] < cutoff:
+                samples.popleft()
+            latencies = sorted(seconds for _, seconds in samples)
+        if len(latencies) < self.min_samples:
+            return None
+        return latencies[math.ceil(0.95 * len(latencies)) - 1]
+
+    def _over_slo(self, model: str, caller: str, slo_seconds: float) -> bool:
+        p95 = self.p95(model, caller)
+        return p95 is not None and p95 > slo_seconds
+
+    def stats(self) -> Dict:
+        callers = sorted({caller for caller, _ in self._routes})
+        return {
+            "enabled": self.enabled,
+            "primary": self.primary,
+            "fast": self.fast,
+            "routes": {
+                caller: {reason: count for (name, reason), count in self._routes.items() if name == caller}
+                for caller in callers
+            },
+            "p95_seconds": {
+                f"{model}:{caller}": round(p95, 3)
+                for model, caller in list(self._latencies)
+                if (p95 := self.p95(model, caller)) is not None
+            },
+        }
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional, Any, Dict
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional, Any, Dict, Union
 
 # Upload Schemas
 class UploadResponse(BaseModel):
@@ -56,6 +56,38 @@ class EvalResponse(BaseModel):
     score: float
     feedback: str
 
+# Profile Schemas
+class Position(BaseModel):
+    title: Optional[str] = None
+    employer: Optional[str] = None
+    start: Optional[str] = None  # YYYY-MM
+    end: Optional[str] = None  # YYYY-MM or "present"
+
+class EducationEntry(BaseModel):
+    degree: Optional[str] = None
+    institution: Optional[str] = None
+    year: Optional[int] = None
+
+class CandidateProfile(BaseModel):
+    file_id: str
+    skills: List[str]
+    titles: List[str]
+    employers: List[str]
+    positions: List[Position]
+    total_years_experience: float
+    education: List[EducationEntry]
+    sections: List[str]
+    source: str  # "rules" or "rules+llm"
+
+# Study Pack Schemas
+class StudyPackRequest(BaseModel):
+    file_id: str
+    style: Optional[str] = "concise"
+    flashcard_count: Optional[int] = 10
+    quiz_count: Optional[int] = 5
+    difficulty: Optional[str] = "medium"
+    artifacts: Optional[List[Literal["notes", "flashcards", "quiz"]]] = None  # default all three
+
 # Generator Schemas
 class GeneratePayload(BaseModel):
     name: Optional[str] = None
@@ -70,11 +102,13 @@ class GeneratePayload(BaseModel):
 class GenerateResponse(BaseModel):
     resume: str
     format: str
+    id: Optional[str] = None  # download as GET /api/generate/{id}.pdf or .docx
 
 # ATS Schemas
 class ATSRequest(BaseModel):
     file_id: str
     job_description: str
+    use_llm: Optional[bool] = False  # add LLM-written feedback on top of the local score
 
 class ATSResponse(BaseModel):
     score: float
@@ -82,3 +116,12 @@ class ATSResponse(BaseModel):
     missing_keywords: List[str]
     suggestions: List[str]
     file_id: str
+    matched_keywords: List[str] = []
+    engine: str = "local"  # "local", or "local+llm" when the feedback was written by the LLM
+    degraded: bool = False  # use_llm was set but the LLM feedback failed; local feedback returned
+
+class ATSBatchRequest(BaseModel):
+    job_description: str
+    file_ids: Union[Literal["all"], List[str]] = "all"
+    top_n: Optional[int] = Field(0, ge=0)  # best-ranked candidates that also get LLM feedback
+    limit: Optional[int] = Field(None, ge=0)  # ranked results to return, default (or 0) all
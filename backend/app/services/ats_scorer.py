@@ -0,0 +1,356 @@
+import hashlib
+import math
+import re
+from collections import Counter, deque
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.lazy import LazySingleton
+from app.core.logger import get_logger
+from app.services.chunker import detect_section
+from app.services.embedding_backends import STOPWORDS, TOKEN_PATTERN
+
+logger = get_logger(__name__)
+
+# Built-in skills lexicon: canonical name followed by aliases. Extend it with
+# ATS_SKILLS_PATH (one skill per line, aliases comma-separated, `#` comments).
+DEFAULT_SKILLS = """
+python; java; javascript, js; typescript, ts; golang, go lang; rust; c++, cpp; c#, csharp; ruby; php; scala; kotlin
+swift; objective-c; r programming; matlab; perl; bash, shell scripting; powershell; sql; nosql; graphql
+html, html5; css, css3; sass; react, react.js, reactjs; angular, angularjs; vue, vue.js, vuejs; next.js, nextjs
+svelte; redux; jquery; node.js, nodejs; express.js, expressjs; django; flask; fastapi; spring boot, spring framework
+rails, ruby on rails; .net, dotnet, asp.net; laravel; rest api, rest apis, restful, restful api; grpc; websockets
+microservices; serverless; event-driven architecture; distributed systems; system design; design patterns
+object-oriented programming, oop; functional programming; data structures; algorithms
+aws, amazon web services; azure, microsoft azure; gcp, google cloud, google cloud platform; aws lambda
+ec2; s3; cloudformation; terraform; ansible; puppet; chef; docker; kubernetes, k8s; helm; openshift
+ci/cd, continuous integration, continuous delivery, continuous deployment; jenkins; github actions; gitlab ci
+circleci; git; github; gitlab; bitbucket; linux; unix; nginx; apache; devops; sre, site reliability engineering
+observability; prometheus; grafana; datadog; splunk; elk, elasticsearch; kibana; new relic
+postgresql, postgres; mysql; sqlite; oracle; sql server, mssql; mongodb; redis; cassandra; dynamodb; neo4j
+snowflake; bigquery; redshift; databricks; spark, apache spark, pyspark; hadoop; hive; kafka, apache kafka
+rabbitmq; airflow, apache airflow; dbt; etl; data pipelines, data pipeline; data warehousing, data warehouse
+data modeling; data analysis; data visualization; tableau; power bi; looker; microsoft excel; pandas; numpy; scipy
+machine learning, ml; deep learning; natural language processing, nlp; computer vision; reinforcement learning
+tensorflow; pytorch; keras; scikit-learn, sklearn; xgboost; llm, llms, large language models; generative ai
+prompt engineering; mlops; hugging face, huggingface; langchain; statistics; a/b testing; feature engineering
+jira; confluence; agile; scrum; kanban; unit testing; test automation; tdd, test-driven development; selenium
+cypress; jest; pytest; junit; performance testing; security; oauth; owasp; penetration testing; networking
+tcp/ip; ios; android; react native; flutter; figma; ux design, ui/ux; product management; project management
+stakeholder management; communication; leadership; mentoring; cross-functional collaboration; problem solving
+"""
+
+# Boilerplate that shows up in almost every job description and says nothing about the role.
+# A fixed stoplist stands in for document frequency: there is no job-description corpus
+# to compute IDF from, so n-grams are ranked by (sublinear) term frequency alone and any
+# n-gram containing one of these words is dropped.
+GENERIC_TERMS = frozenset("""
+experience experienced years year strong ability able work working team teams role position candidate candidates
+skills skill knowledge understanding excellent good great proven track record plus preferred required requirements
+responsibilities responsible including include includes using use based looking join company opportunity environment
+new well etc must nice have need high level highly e.g i.e ideal ideally demonstrated familiarity familiar hands-on hands
+minimum least one two three more other across within help build building develop developing ensure support
+scalable robust deliver drive fast-paced design designing passionate passion self-starter
+""".split())
+
+# Relative strength of evidence, by the resume section a keyword was found in
+SECTION_WEIGHTS = {
+    "experience": 1.0,
+    "projects": 0.9,
+    "skills": 0.8,
+    "summary": 0.7,
+    "certifications": 0.7,
+    "education": 0.5,
+    "other": 0.6,
+}
+
+# Requirement strength, from cue words in the sentence a keyword came from
+REQUIRED_CUES = re.compile(r"\b(required|must|minimum|essential|mandatory|need to|you have)\b")
+OPTIONAL_CUES = re.compile(r"\b(nice to have|preferred|bonus|a plus|is a plus|ideally|optional)\b")
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?;])\s+|\n+")
+
+SKILL_BOOST = 2.0
+BIGRAM_BOOST = 1.2
+MAX_NGRAM_TERMS = 25
+
+class AhoCorasick:
+    """Multi-pattern matcher: finds every lexicon phrase in one pass over the text"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, str]]] = [[]]
+        self._built = False
+
+    def add(self, pattern: str, value: str):
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append((len(pattern), value))
+        self._built = False
+
+    def build(self):
+        """Compute failure links breadth-first"""
+        queue = deque(self._goto[0].values())
+        for node in queue:
+            self._fail[node] = 0
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+        self._built = True
+
+    def find(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """Yield (start, end, value) for every occurrence that sits on word boundaries"""
+        if not self._built:
+            self.build()
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for length, value in self._output[node]:
+                start, end = index - length + 1, index + 1
+                if _is_boundary(text, start - 1) and _is_boundary(text, end):
+                    yield start, end, value
+
+def _is_boundary(text: str, index: int) -> bool:
+    return index < 0 or index >= len(text) or not text[index].isalnum()
+
+class SkillLexicon:
+    """Canonical skill names, their aliases and the automaton that finds them"""
+
+    def __init__(self, path: str = ""):
+        self.canonical: Dict[str, str] = {}  # alias -> canonical name
+        self._load(DEFAULT_SKILLS.replace("\n", ";"))
+        if path:
+            try:
+                with open(path, encoding="utf-8") as handle:
+                    extra = [line for line in handle.read().splitlines() if not line.strip().startswith("#")]
+                self._load(";".join(extra))
+                logger.info("Loaded ATS skills lexicon from %s", path)
+            except OSError as e:
+                logger.warning("Could not read ATS skills lexicon %s: %s", path, e)
+
+        self.automaton = AhoCorasick()
+        for alias, name in self.canonical.items():
+            self.automaton.add(alias, name)
+        self.automaton.build()
+
+    def _load(self, spec: str):
+        for entry in spec.split(";"):
+            aliases = [alias.strip().lower() for alias in entry.split(",") if alias.strip()]
+            if aliases:
+                for alias in aliases:
+                    self.canonical.setdefault(alias, aliases[0])
+
+    def find(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        return self.automaton.find(text)
+
+class Keyword:
+    __slots__ = ("term", "kind", "weight")
+
+    def __init__(self, term: str, kind: str, weight: float):
+        self.term = term  # canonical skill, or space-joined stemmed n-gram
+        self.kind = kind  # "skill" or "ngram"
+        self.weight = weight
+
+class ResumeProfile:
+    """Everything about one resume the scorer needs, computed once per stored version"""
+
+    def __init__(self, documents: List[Dict], skills: Dict[str, Set[str]], ngrams: Dict[str, Set[str]],
+                 sections: Set[str]):
+        self.documents = documents
+        self.skills = skills  # canonical skill -> sections it appears in
+        self.ngrams = ngrams  # stemmed unigram/bigram -> sections it appears in
+        self.sections = sections
+
+def _stem(token: str) -> str:
+    """Fold simple plurals so 'pipelines' matches 'pipeline'"""
+    if len(token) > 4 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+def _tokens(text: str) -> List[str]:
+    return [_stem(token.strip(".-")) for token in TOKEN_PATTERN.findall(text.lower())]
+
+def _is_content(token: str) -> bool:
+    return len(token) > 1 and token not in STOPWORDS and any(char.isalpha() for char in token)
+
+def _ngrams(tokens: List[str]) -> Iterator[str]:
+    for i, token in enumerate(tokens):
+        if _is_content(token):
+            yield token
+            if i + 1 < len(tokens) and _is_content(tokens[i + 1]):
+                yield f"{token} {tokens[i + 1]}"
+
+class ATSScorer:
+    """Deterministic, local ATS scoring: keyword extraction, lexicon matching and section weighting
+
+    Scores take milliseconds and never touch the network. A job description is
+    reduced to weighted keywords (lexicon skills plus n-grams ranked by term
+    frequency, with boilerplate removed by a stoplist), each keyword is looked
+    up in the resume, and a keyword found only in a weak section (education, a
+    bare skills list) counts for less than one backed by experience or projects.
+    """
+
+    def __init__(self):
+        self.lexicon = SkillLexicon(settings.ATS_SKILLS_PATH)
+        self._keywords = LRUCache(max_entries=256)
+        # Keyed by file_id; an entry is stale once the store holds a different document list
+        self._profiles = LRUCache(max_entries=2048)
+
+    def extract_keywords(self, job_description: str) -> List[Keyword]:
+        """Weighted keywords of a job description, most important first"""
+        key = hashlib.sha256(job_description.encode("utf-8")).hexdigest()
+        cached = self._keywords.get(key)
+        if cached is not None:
+            return cached
+
+        skill_weights: Counter = Counter()
+        ngram_tf: Counter = Counter()
+        skill_tokens: Set[str] = set()
+        for sentence in SENTENCE_SPLIT.split(job_description.lower()):
+            if not sentence.strip():
+                continue
+            emphasis = 1.5 if REQUIRED_CUES.search(sentence) else 0.5 if OPTIONAL_CUES.search(sentence) else 1.0
+            for _, _, skill in self.lexicon.find(sentence):
+                skill_weights[skill] += emphasis
+                skill_tokens.update(_tokens(skill))
+            for gram in _ngrams(_tokens(sentence)):
+                ngram_tf[gram] += emphasis
+
+        keywords = [Keyword(skill, "skill", SKILL_BOOST * (1 + math.log(tf))) for skill, tf in skill_weights.items()]
+        ngram_keywords = []
+        for gram, tf in ngram_tf.items():
+            parts = gram.split(" ")
+            # Already represented by a lexicon skill, or boilerplate
+            if all(part in skill_tokens for part in parts) or any(part in GENERIC_TERMS for part in parts):
+                continue
+            weight = (1 + math.log(tf)) * (BIGRAM_BOOST if len(parts) > 1 else 1.0)
+            ngram_keywords.append(Keyword(gram, "ngram", weight))
+        ngram_keywords.sort(key=lambda keyword: (-keyword.weight, keyword.term))
+
+        # A word already covered by a selected phrase adds nothing on its own
+        selected: List[Keyword] = []
+        phrase_words: Set[str] = set()
+        for keyword in ngram_keywords:
+            if " " in keyword.term:
+                phrase_words.update(keyword.term.split(" "))
+        for keyword in ngram_keywords:
+            if " " in keyword.term or keyword.term not in phrase_words:
+                selected.append(keyword)
+            if len(selected) == MAX_NGRAM_TERMS:
+                break
+        keywords.extend(selected)
+        keywords.sort(key=lambda keyword: (-keyword.weight, keyword.term))
+
+        self._keywords.set(key, keywords)
+        return keywords
+
+    def profile(self, file_id: str, documents: List[Dict]) -> ResumeProfile:
+        """Skills and n-grams of a stored resume, rebuilt only when its documents change"""
+        cached = self._profiles.get(file_id)
+        if cached is not None and cached.documents is documents:
+            return cached
+
+        skills: Dict[str, Set[str]] = {}
+        ngrams: Dict[str, Set[str]] = {}
+        sections: Set[str] = set()
+        for doc in documents:
+            text = doc["text"]
+            section = doc.get("metadata", {}).get("section") or detect_section(text)
+            sections.add(section)
+            lowered = text.lower()
+            for _, _, skill in self.lexicon.find(lowered):
+                skills.setdefault(skill, set()).add(section)
+            for gram in _ngrams(_tokens(lowered)):
+                ngrams.setdefault(gram, set()).add(section)
+
+        profile = ResumeProfile(documents, skills, ngrams, sections)
+        self._profiles.set(file_id, profile)
+        return profile
+
+    def score(self, job_description: str, file_id: str, documents: List[Dict],
+              keywords: Optional[List[Keyword]] = None) -> Dict:
+        """Score a resume against a job description
+
+        Returns score (0-100), matched and missing keywords (most important
+        first), deterministic feedback and suggestions, and per-kind coverage.
+        """
+        keywords = keywords if keywords is not None else self.extract_keywords(job_description)
+        profile = self.profile(file_id, documents)
+
+        total = earned = 0.0
+        matched: List[str] = []
+        missing: List[str] = []
+        weak: List[str] = []
+        skills_found = skills_total = 0
+        for keyword in keywords:
+            found_in = (profile.skills if keyword.kind == "skill" else profile.ngrams).get(keyword.term)
+            total += keyword.weight
+            if keyword.kind == "skill":
+                skills_total += 1
+            if not found_in:
+                missing.append(keyword.term)
+                continue
+            strength = max(SECTION_WEIGHTS.get(section, SECTION_WEIGHTS["other"]) for section in found_in)
+            earned += keyword.weight * strength
+            matched.append(keyword.term)
+            if keyword.kind == "skill":
+                skills_found += 1
+                if found_in <= {"skills", "education"}:
+                    weak.append(keyword.term)
+
+        score = round(100.0 * earned / total, 1) if total else 0.0
+        return {
+            "score": score,
+            "matched_keywords": matched,
+            "missing_keywords": missing,
+            "feedback": self._feedback(keywords, matched, skills_found, skills_total, weak),
+            "suggestions": self._suggestions(missing, weak, profile),
+            "coverage": {
+                "keywords": f"{len(matched)}/{len(keywords)}",
+                "skills": f"{skills_found}/{skills_total}",
+            },
+        }
+
+    def _feedback(self, keywords: List[Keyword], matched: List[str], skills_found: int, skills_total: int,
+                  weak: List[str]) -> List[str]:
+        if not keywords:
+            return ["The job description has too little content to extract keywords from."]
+        feedback = [f"Matches {len(matched)} of {len(keywords)} key terms from the job description."]
+        if skills_total:
+            feedback.append(f"Covers {skills_found} of {skills_total} skills the job description names.")
+        if matched:
+            feedback.append(f"Strongest matches: {', '.join(matched[:6])}.")
+        if weak:
+            feedback.append(f"Listed but not demonstrated in experience or projects: {', '.join(weak[:6])}.")
+        return feedback
+
+    def _suggestions(self, missing: List[str], weak: List[str], profile: ResumeProfile) -> List[str]:
+        suggestions = []
+        if missing:
+            suggestions.append(f"Add the missing terms where they truthfully apply: {', '.join(missing[:6])}.")
+        if weak:
+            suggestions.append(f"Show {', '.join(weak[:4])} in action in an experience or project bullet.")
+        if "skills" not in profile.sections:
+            suggestions.append("Add a dedicated Skills section so ATS parsers can find your keywords.")
+        if "experience" not in profile.sections:
+            suggestions.append("Use a clearly labelled Experience section header.")
+        return suggestions
+
+# Global instance
+ats_scorer: ATSScorer = LazySingleton(ATSScorer)
@@ -1,9 +1,29 @@
 from typing import List
 from app.core.config import settings
 from app.core.logger import get_logger
+from app.core.tracing import span
 
 logger = get_logger(__name__)
 
+# Canonical resume sections and the header words that introduce them
+SECTION_HEADERS = (
+    ("experience", ("experience", "employment", "work history", "professional background")),
+    ("projects", ("project",)),
+    ("skills", ("skill", "technologies", "technical", "tools", "competenc")),
+    ("summary", ("summary", "objective", "profile", "about")),
+    ("certifications", ("certification", "licens", "award", "achievement")),
+    ("education", ("education", "academic", "coursework")),
+)
+
+def detect_section(text: str) -> str:
+    """Canonical section of a chunk, from its first line (chunks start at section headers)"""
+    header = text.strip().split("\n", 1)[0].strip().lower()
+    if len(header) < 50:
+        for section, cues in SECTION_HEADERS:
+            if any(cue in header for cue in cues):
+                return section
+    return "other"
+
 class TextChunker:
     """Intelligently chunk text for embeddings"""
     
@@ -16,6 +36,14 @@ class TextChunker:
         if not text:
             return []
         
+        with span("chunk", strategy="window") as attrs:
+            chunks = self._window_chunks(text)
+            attrs["chunks"] = len(chunks)
+        
+        logger.info("Chunked text into %s chunks", len(chunks))
+        return chunks
+    
+    def _window_chunks(self, text: str) -> List[str]:
         chunks = []
         start = 0
         text_length = len(text)
@@ -41,11 +69,22 @@ class TextChunker:
             if start >= text_length:
                 break
         
-        logger.info(f"Chunked text into {len(chunks)} chunks")
         return chunks
     
     def chunk_by_sections(self, text: str) -> List[str]:
         """Chunk text by sections (for resumes)"""
+        with span("chunk", strategy="sections") as attrs:
+            sections = self._split_sections(text)
+            attrs["chunks"] = len(sections)
+        
+        # If no sections found, use regular chunking
+        if len(sections) <= 1:
+            return self.chunk_text(text)
+        
+        logger.info("Chunked text into %s sections", len(sections))
+        return sections
+    
+    def _split_sections(self, text: str) -> List[str]:
         sections = []
         current_section = ""
         
@@ -71,11 +110,6 @@ class TextChunker:
         if current_section:
             sections.append(current_section.strip())
         
-        # If no sections found, use regular chunking
-        if len(sections) <= 1:
-            return self.chunk_text(text)
-        
-        logger.info(f"Chunked text into {len(sections)} sections")
         return sections
 
 # Global instance
@@ -0,0 +1,169 @@
+import re
+from typing import Dict, List, Optional, Set
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.core.tokens import CHARS_PER_TOKEN, estimate_tokens
+from app.core.tracing import span
+from app.services.chunker import detect_section
+from app.services.vectorstore import vectorstore
+
+logger = get_logger(__name__)
+
+# What each task needs from a resume: a retrieval query and how much each section matters
+TASK_PROFILES: Dict[str, Dict] = {
+    "notes": {
+        "query": "key skills, work experience highlights, education, certifications and notable achievements",
+        "sections": {"experience": 1.0, "summary": 0.9, "skills": 0.9, "projects": 0.8, "education": 0.7,
+                     "certifications": 0.6, "other": 0.5},
+    },
+    "quiz": {
+        "query": "technologies, tools, projects, responsibilities and measurable results",
+        "sections": {"experience": 1.0, "projects": 1.0, "skills": 0.8, "certifications": 0.6, "education": 0.5,
+                     "summary": 0.4, "other": 0.4},
+    },
+    "flashcards": {
+        "query": "skills, technologies, concepts and achievements worth remembering",
+        "sections": {"skills": 1.0, "experience": 0.9, "projects": 0.9, "certifications": 0.7, "education": 0.6,
+                     "summary": 0.5, "other": 0.4},
+    },
+    # One context shared by the notes, flashcards and quiz of a study pack
+    "study_pack": {
+        "query": "key skills, technologies, projects, work experience and notable achievements",
+        "sections": {"experience": 1.0, "skills": 0.9, "projects": 0.9, "summary": 0.7, "certifications": 0.6,
+                     "education": 0.6, "other": 0.4},
+    },
+}
+
+# Share of embedding similarity in a chunk's relevance; the rest is the section prior
+SIMILARITY_WEIGHT = 0.6
+# Chunks sharing this much of their word 3-grams are treated as duplicates
+DUPLICATE_THRESHOLD = 0.8
+# Smallest leftover budget worth filling with a truncated chunk
+MIN_PARTIAL_TOKENS = 64
+
+WORD = re.compile(r"\w+")
+
+def _shingles(text: str) -> Set[str]:
+    words = WORD.findall(text.lower())
+    if len(words) < 3:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + 3]) for i in range(len(words) - 2)}
+
+def _truncate(text: str, max_chars: int) -> str:
+    """Cut at the last sentence or line break that fits"""
+    cut = text[:max_chars]
+    boundary = max(cut.rfind(". "), cut.rfind("\n"))
+    return cut[:boundary + 1].strip() if boundary > max_chars // 2 else cut.strip()
+
+class ContextBuilder:
+    """Assemble the resume text for a task's prompt within a token budget
+
+    Chunks are ranked by similarity to the task's query blended with a section
+    prior, near-duplicates (e.g. window overlaps) are dropped, the best chunk
+    of every relevant section is taken first so no section goes missing, and
+    the rest of the budget is filled by relevance. The selection is emitted in
+    document order and cached per (file_id, task) until the file changes.
+    """
+
+    def __init__(self, token_budget: Optional[int] = None):
+        self.token_budget = token_budget or settings.CONTEXT_TOKEN_BUDGET
+        self._cache = LRUCache(max_entries=settings.CONTEXT_CACHE_ITEMS)
+        self.builds = 0
+        self.hits = 0
+        self.tokens_available = 0
+        self.tokens_selected = 0
+
+    async def build(self, file_id: str, task: str) -> str:
+        """Resume context for a task; raises ValueError for unknown files"""
+        documents = vectorstore.get_documents(file_id)
+        if not documents:
+            raise ValueError(f"No documents found for file_id: {file_id}")
+        profile = TASK_PROFILES[task]
+
+        key = f"{file_id}:{task}"
+        cached = self._cache.get(key)
+        # The store swaps in a new list when a file is re-indexed
+        if cached is not None and cached[0] is documents:
+            self.hits += 1
+            return cached[1]
+
+        with span("context", task=task, chunks=len(documents)) as attrs:
+            similarities = await vectorstore.document_similarities(profile["query"], file_id)
+            context = self._select(documents, similarities, profile["sections"])
+            attrs["tokens"] = estimate_tokens(context)
+
+        self.builds += 1
+        self.tokens_available += sum(estimate_tokens(doc["text"]) for doc in documents)
+        self.tokens_selected += estimate_tokens(context)
+        self._cache.set(key, (documents, context))
+        return context
+
+    def _select(self, documents: List[Dict], similarities: List[float], section_weights: Dict[str, float]) -> str:
+        top_similarity = max(similarities, default=0.0)
+        candidates = []
+        for index, doc in enumerate(documents):
+            text = doc["text"].strip()
+            if not text:
+                continue
+            section = doc.get("metadata", {}).get("section") or detect_section(text)
+            similarity = similarities[index] / top_similarity if top_similarity > 0 else 0.0
+            relevance = (SIMILARITY_WEIGHT * max(0.0, similarity)
+                         + (1 - SIMILARITY_WEIGHT) * section_weights.get(section, section_weights["other"]))
+            candidates.append({"index": index, "text": text, "section": section, "relevance": relevance,
+                               "tokens": estimate_tokens(text), "shingles": _shingles(text)})
+        candidates.sort(key=lambda candidate: -candidate["relevance"])
+
+        # Near-duplicate removal: keep the more relevant of two overlapping chunks
+        unique: List[Dict] = []
+        for candidate in candidates:
+            if not any(self._overlap(candidate["shingles"], kept["shingles"]) >= DUPLICATE_THRESHOLD for kept in unique):
+                unique.append(candidate)
+
+        selected: Dict[int, str] = {}
+        remaining = self.token_budget
+
+        # Coverage first: the best chunk of each section, most important sections first
+        best_per_section: Dict[str, Dict] = {}
+        for candidate in unique:
+            best_per_section.setdefault(candidate["section"], candidate)
+        for section in sorted(best_per_section, key=lambda name: -section_weights.get(name, section_weights["other"])):
+            candidate = best_per_section[section]
+            if candidate["tokens"] <= remaining:
+                selected[candidate["index"]] = candidate["text"]
+                remaining -= candidate["tokens"]
+
+        # Then by relevance; the first chunk that does not fit is cut to the leftover budget
+        for candidate in unique:
+            if candidate["index"] in selected:
+                continue
+            if candidate["tokens"] <= remaining:
+                selected[candidate["index"]] = candidate["text"]
+                remaining -= candidate["tokens"]
+            elif remaining >= MIN_PARTIAL_TOKENS:
+                selected[candidate["index"]] = _truncate(candidate["text"], remaining * CHARS_PER_TOKEN)
+                remaining = 0
+            if remaining < MIN_PARTIAL_TOKENS:
+                break
+
+        return "\n\n".join(selected[index] for index in sorted(selected))
+
+    @staticmethod
+    def _overlap(a: Set[str], b: Set[str]) -> float:
+        """Share of the smaller chunk's shingles found in the other, so contained chunks count as duplicates"""
+        if not a or not b:
+            return 0.0
+        return len(a & b) / min(len(a), len(b))
+
+    def stats(self) -> Dict:
+        lookups = self.builds + self.hits
+        return {
+            "builds": self.builds,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "tokens_available": self.tokens_available,
+            "tokens_selected": self.tokens_selected,
+        }
+
+# Global instance
+context_builder = ContextBuilder()
@@ -0,0 +1,193 @@
+import io
+import re
+import textwrap
+import zipfile
+from typing import List, Tuple
+from xml.sax.saxutils import escape
+
+# Letter paper in points, with 0.75in margins
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+MARGIN = 54
+# (font resource, size, leading) per line kind
+PDF_STYLES = {
+    "name": ("F2", 16, 22),
+    "heading": ("F2", 12, 18),
+    "bullet": ("F1", 10.5, 14),
+    "text": ("F1", 10.5, 14),
+    "blank": ("F1", 10.5, 8),
+}
+# Helvetica averages about half an em per character; wrap conservatively below that
+WRAP_CHARS = 92
+BULLET_PREFIXES = ("• ", "- ", "* ", "· ")
+# Section titles recognised as headings even without an underline (e.g. the minimal template)
+SECTION_TITLES = {"professional summary", "summary", "skills", "experience", "education", "projects", "certifications"}
+
+RULE = re.compile(r"^\s*([=\-_─])\1{2,}\s*$")
+XML_INVALID = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+# Writers are pure functions of the text, so they can run in a process pool and their
+# output can be cached by content hash (the DOCX zip uses fixed timestamps for that)
+
+def parse_lines(text: str) -> List[Tuple[str, str]]:
+    """Classify lines as name, heading, bullet, text or blank; rule lines mark the heading above them"""
+    lines = text.replace("\r\n", "\n").split("\n")
+    blocks: List[Tuple[str, str]] = []
+    for index, line in enumerate(lines):
+        if RULE.match(line):
+            continue
+        stripped = line.strip()
+        if not stripped:
+            if blocks and blocks[-1][0] != "blank":
+                blocks.append(("blank", ""))
+            continue
+        underlined = index + 1 < len(lines) and RULE.match(lines[index + 1])
+        if not blocks:
+            kind = "name"
+        elif underlined or stripped.lower() in SECTION_TITLES or (
+            stripped.isupper() and len(stripped) < 40 and not stripped.startswith(BULLET_PREFIXES)
+        ):
+            kind = "heading"
+        elif stripped.startswith(BULLET_PREFIXES):
+            kind = "bullet"
+        else:
+            kind = "text"
+        blocks.append((kind, stripped))
+    while blocks and blocks[-1][0] == "blank":
+        blocks.pop()
+    return blocks
+
+def _pdf_string(text: str) -> bytes:
+    data = text.encode("cp1252", errors="replace")  # WinAnsiEncoding, which covers bullets and dashes
+    return b"(" + data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+def _pdf_lines(blocks: List[Tuple[str, str]]) -> List[Tuple[str, str, float]]:
+    """Wrap blocks into (kind, text, x offset) lines; bullets get a hanging indent"""
+    lines = []
+    for kind, text in blocks:
+        if kind == "blank":
+            lines.append((kind, "", 0.0))
+        elif kind == "bullet":
+            marker, body = "•", text[2:].strip()
+            wrapped = textwrap.wrap(body, WRAP_CHARS - 3) or [""]
+            lines.append((kind, f"{marker} {wrapped[0]}", 0.0))
+            lines.extend((kind, rest, 10.0) for rest in wrapped[1:])
+        else:
+            width = WRAP_CHARS if kind == "text" else WRAP_CHARS * 2 // 3
+            lines.extend((kind, part, 0.0) for part in textwrap.wrap(text, width) or [""])
+    return lines
+
+def render_pdf(text: str) -> bytes:
+    """A text-based PDF (selectable, ATS-parsable) using the standard Helvetica fonts"""
+    pages: List[List[bytes]] = [[]]
+    y = PAGE_HEIGHT - MARGIN
+    for kind, line, indent in _pdf_lines(parse_lines(text)):
+        font, size, leading = PDF_STYLES[kind]
+        if y - leading < MARGIN:
+            pages.append([])
+            y = PAGE_HEIGHT - MARGIN
+            if kind == "blank":
+                continue
+        y -= leading
+        ops = pages[-1]
+        if line:
+            ops.append(b"BT /%s %g Tf %g %g Td %s Tj ET" % (
+                font.encode(), size, MARGIN + indent, y, _pdf_string(line)
+            ))
+        if kind == "heading":
+            ops.append(b"0.6 w %g %g m %g %g l S" % (MARGIN, y - 4, PAGE_WIDTH - MARGIN, y - 4))
+            y -= 4
+
+    # 1 catalog, 2 page tree, 3-4 fonts, then a page and its content stream per page
+    objects: List[bytes] = [b"", b"", (
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+    ), (
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>"
+    )]
+    page_refs = []
+    for ops in pages:
+        stream = b"\n".join(ops)
+        page_number = len(objects) + 1
+        page_refs.append(b"%d 0 R" % page_number)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> "
+            b"/Contents %d 0 R >>" % (PAGE_WIDTH, PAGE_HEIGHT, page_number + 1)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(page_refs), len(page_refs))
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    out.writelines(b"%010d 00000 n \n" % offset for offset in offsets)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+DOCX_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+</Types>"""
+
+DOCX_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+</Relationships>"""
+
+# Run properties (half-point sizes) and paragraph properties per line kind
+DOCX_STYLES = {
+    "name": ("<w:b/><w:sz w:val=\"32\"/>", "<w:spacing w:after=\"120\"/>"),
+    "heading": (
+        "<w:b/><w:sz w:val=\"24\"/>",
+        "<w:pBdr><w:bottom w:val=\"single\" w:sz=\"6\" w:space=\"1\" w:color=\"auto\"/></w:pBdr>"
+        "<w:spacing w:before=\"240\" w:after=\"80\"/>",
+    ),
+    "bullet": ("<w:sz w:val=\"21\"/>", "<w:ind w:left=\"360\" w:hanging=\"240\"/>"),
+    "text": ("<w:sz w:val=\"21\"/>", ""),
+    "blank": ("", ""),
+}
+
+def _docx_paragraph(kind: str, text: str) -> str:
+    run_props, para_props = DOCX_STYLES[kind]
+    if kind == "bullet":
+        text = "• " + text[2:].strip()
+    body = escape(XML_INVALID.sub("", text))
+    run = f'<w:r><w:rPr><w:rFonts w:ascii="Calibri" w:hAnsi="Calibri"/>{run_props}</w:rPr><w:t xml:space="preserve">{body}</w:t></w:r>' if body else ""
+    return f"<w:p><w:pPr>{para_props}</w:pPr>{run}</w:p>"
+
+def render_docx(text: str) -> bytes:
+    """A minimal WordprocessingML document with one paragraph per line"""
+    paragraphs = "".join(_docx_paragraph(kind, line) for kind, line in parse_lines(text))
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+        f"{paragraphs}"
+        '<w:sectPr><w:pgSz w:w="12240" w:h="15840"/>'
+        '<w:pgMar w:top="1080" w:right="1080" w:bottom="1080" w:left="1080" w:header="720" w:footer="720" w:gutter="0"/>'
+        "</w:sectPr></w:body></w:document>"
+    )
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in (
+            ("[Content_Types].xml", DOCX_CONTENT_TYPES),
+            ("_rels/.rels", DOCX_RELS),
+            ("word/document.xml", document),
+        ):
+            # Fixed timestamps keep the bytes a pure function of the text
+            info = zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0))
+            info.compress_type = zipfile.ZIP_DEFLATED
+            archive.writestr(info, content)
+    return out.getvalue()
+
+RENDERERS = {"pdf": render_pdf, "docx": render_docx}
+
+MEDIA_TYPES = {
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
@@ -0,0 +1,168 @@
+import asyncio
+import math
+import re
+import zlib
+from collections import Counter
+from typing import Awaitable, Callable, List, Optional
+from app.models.llm_client import llm_client
+from app.core.config import settings
+from app.core.lazy import optional_import
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+def _numpy():
+    """numpy is only needed by the local backend, so it is imported on first use"""
+    return optional_import("numpy", "numpy not available. Local embeddings will be disabled.")
+
+class EmbeddingBackend:
+    """Interface for anything that can turn texts into fixed-size vectors"""
+
+    name = "base"
+    # Whether results are worth keeping in the persistent embedding cache
+    cacheable = True
+
+    @property
+    def model(self) -> str:
+        raise NotImplementedError
+
+    @property
+    def dimensions(self) -> int:
+        return 0
+
+    def is_available(self) -> bool:
+        return True
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+class OpenAIEmbeddingBackend(EmbeddingBackend):
+    """Remote embeddings through the OpenAI API"""
+
+    name = "openai"
+
+    def __init__(self, embed_fn: Callable[[List[str]], Awaitable[List[List[float]]]]):
+        # Usually EmbeddingScheduler.embed, so calls are batched and coalesced
+        self.embed_fn = embed_fn
+
+    @property
+    def model(self) -> str:
+        return llm_client.embedding_model
+
+    @property
+    def dimensions(self) -> int:
+        return settings.EMBEDDING_DIMENSIONS
+
+    def is_available(self) -> bool:
+        return bool(settings.OPENAI_API_KEY)
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        return await self.embed_fn(texts)
+
+# Words that carry almost no retrieval signal in resumes and job descriptions
+STOPWORDS = frozenset("""
+a an and are as at be been but by for from has have i in is it its of on or our that the their this to was
+were will with we you your my me he she they them his her not no so if than then there these those which who
+whom what when where how all any can could would should may might also into over under about after before
+""".split())
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.\-]*[a-z0-9+#]|[a-z0-9]")
+
+class LocalHashingEmbeddingBackend(EmbeddingBackend):
+    """Offline embeddings: hashed unigram/bigram features randomly projected to a dense vector
+
+    Features are weighted by sublinear term frequency times a fixed heuristic
+    (stopwords and digits down, bigrams up). This is not IDF: nothing is fitted
+    to a corpus, so a text always gets the same vector.
+    """
+
+    name = "local"
+    # Computing is cheaper than a cache round trip
+    cacheable = False
+
+    # Size of the hashed feature space before projection
+    N_FEATURES = 2 ** 15
+    SEED = 1729
+
+    def __init__(self, dimensions: Optional[int] = None):
+        self._dimensions = dimensions or settings.LOCAL_EMBEDDING_DIM
+        self._projection = None
+
+    @property
+    def model(self) -> str:
+        return f"local-hash-v1-{self._dimensions}"
+
+    @property
+    def dimensions(self) -> int:
+        return self._dimensions
+
+    def is_available(self) -> bool:
+        return _numpy() is not None
+
+    def _get_projection(self):
+        """Sparse {-1, 0, +1} random projection matrix, built once per process"""
+        if self._projection is None:
+            np = _numpy()
+            rng = np.random.default_rng(self.SEED)
+            self._projection = rng.choice(
+                np.array([-1, 0, 1], dtype=np.int8),
+                size=(self.N_FEATURES, self._dimensions),
+                p=[1 / 6, 2 / 3, 1 / 6]
+            )
+        return self._projection
+
+    @staticmethod
+    def _features(text: str) -> Counter:
+        """Unigram and bigram counts for a text"""
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        features = Counter(tokens)
+        features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+        return features
+
+    @staticmethod
+    def _feature_weight(feature: str) -> float:
+        """Heuristic informativeness of a feature; fixed, so vectors never drift as new documents arrive"""
+        if " " in feature:
+            first, second = feature.split(" ", 1)
+            if first in STOPWORDS and second in STOPWORDS:
+                return 0.1
+            return 1.2
+        if feature in STOPWORDS:
+            return 0.1
+        if feature.isdigit():
+            return 0.5
+        return 1.0
+
+    def embed_sync(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts on the calling thread"""
+        np = _numpy()
+        if np is None:
+            raise ValueError("numpy is not installed. Cannot compute local embeddings.")
+
+        projection = self._get_projection()
+        mask = self.N_FEATURES - 1
+        output = np.zeros((len(texts), self._dimensions), dtype=np.float32)
+
+        for row, text in enumerate(texts):
+            weights = {}
+            for feature, count in self._features(text).items():
+                hashed = zlib.crc32(feature.encode("utf-8"))
+                index = hashed & mask
+                sign = 1.0 if hashed & 0x80000000 else -1.0
+                weight = sign * (1.0 + math.log(count)) * self._feature_weight(feature)
+                weights[index] = weights.get(index, 0.0) + weight
+            if not weights:
+                continue
+            indices = np.fromiter(weights.keys(), dtype=np.int64, count=len(weights))
+            values = np.fromiter(weights.values(), dtype=np.float32, count=len(weights))
+            output[row] = values @ projection[indices].astype(np.float32)
+
+        norms = np.linalg.norm(output, axis=1, keepdims=True)
+        np.divide(output, norms, out=output, where=norms > 0)
+        return output.tolist()
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        # Small batches are faster inline than the thread hand-off
+        if len(texts) <= 64:
+            return self.embed_sync(texts)
+        return await asyncio.to_thread(self.embed_sync, texts)
@@ -0,0 +1,112 @@
+import asyncio
+import hashlib
+from array import array
+from typing import Dict, List, Optional
+from app.core.cache import LRUCache, SQLiteStore
+from app.core.config import settings
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different copies share a cache entry"""
+    return " ".join(text.split())
+
+class EmbeddingCache:
+    """Two-tier embedding cache: in-process LRU in front of a SQLite table"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        memory_items: Optional[int] = None,
+        enabled: Optional[bool] = None
+    ):
+        self.enabled = settings.EMBEDDING_CACHE_ENABLED if enabled is None else enabled
+        self.memory = LRUCache(max_entries=memory_items or settings.EMBEDDING_CACHE_MEMORY_ITEMS)
+        self.disk = SQLiteStore(path or settings.EMBEDDING_CACHE_PATH, table="embeddings")
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.api_seconds = 0.0
+        self.api_texts = 0
+
+    def make_key(self, text: str, model: str, dimensions: int = 0) -> str:
+        """Cache key for (embedding model, dimensions, normalized text hash)"""
+        digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+        return f"{model}:{dimensions}:{digest}"
+
+    @staticmethod
+    def _pack(embedding: List[float]) -> bytes:
+        return array("f", embedding).tobytes()
+
+    @staticmethod
+    def _unpack(blob: bytes) -> List[float]:
+        values = array("f")
+        values.frombytes(blob)
+        return values.tolist()
+
+    async def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Look keys up in memory, then fetch the rest from disk in one query"""
+        if not self.enabled or not keys:
+            return {}
+
+        found: Dict[str, List[float]] = {}
+        disk_keys = []
+        for key in keys:
+            embedding = self.memory.get(key)
+            if embedding is not None:
+                found[key] = embedding
+            else:
+                disk_keys.append(key)
+        self.memory_hits += len(found)
+
+        if disk_keys:
+            try:
+                rows = await asyncio.to_thread(self.disk.get_many, disk_keys)
+            except Exception as e:
+                logger.warning("Embedding cache disk lookup failed: %s", e)
+                rows = {}
+            for key, (blob, _) in rows.items():
+                embedding = self._unpack(blob)
+                self.memory.set(key, embedding)
+                found[key] = embedding
+            self.disk_hits += len(rows)
+
+        self.misses += len(keys) - len(found)
+        return found
+
+    async def put_many(self, entries: Dict[str, List[float]]):
+        """Store freshly computed embeddings in both tiers"""
+        if not self.enabled or not entries:
+            return
+        for key, embedding in entries.items():
+            self.memory.set(key, embedding)
+        try:
+            await asyncio.to_thread(
+                self.disk.put_many,
+                [(key, self._pack(embedding), None) for key, embedding in entries.items() if embedding]
+            )
+        except Exception as e:
+            logger.warning("Embedding cache disk write failed: %s", e)
+
+    def record_api_call(self, seconds: float, text_count: int):
+        """Track API time spent on misses so saved time can be estimated"""
+        self.api_seconds += seconds
+        self.api_texts += text_count
+
+    def stats(self) -> Dict:
+        """Hit rate and estimated API time saved"""
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        seconds_per_text = self.api_seconds / self.api_texts if self.api_texts else 0.0
+        return {
+            "enabled": self.enabled,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "api_seconds": round(self.api_seconds, 3),
+            "saved_api_seconds": round(hits * seconds_per_text, 3)
+        }
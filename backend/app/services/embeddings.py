@@ -1,25 +1,223 @@
-from typing import List
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
 from app.models.llm_client import llm_client
+from app.core.config import settings
+from app.core.lazy import LazySingleton
 from app.core.logger import get_logger
+from app.core.tokens import estimate_tokens
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embedding_backends import (
+    EmbeddingBackend, OpenAIEmbeddingBackend, LocalHashingEmbeddingBackend
+)
 
 logger = get_logger(__name__)
 
+EmbedFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+class EmbeddingScheduler:
+    """Batch, coalesce and concurrency-limit embedding requests to the provider"""
+
+    def __init__(
+        self,
+        embed_fn: Optional[EmbedFn] = None,
+        max_items: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        coalesce_window_ms: Optional[float] = None
+    ):
+        self.embed_fn = embed_fn or llm_client.generate_embeddings
+        self.max_items = max(1, max_items or settings.EMBEDDING_BATCH_MAX_ITEMS)
+        self.max_tokens = max(1, max_tokens or settings.EMBEDDING_BATCH_MAX_TOKENS)
+        self.coalesce_window = (
+            coalesce_window_ms if coalesce_window_ms is not None else settings.EMBEDDING_COALESCE_WINDOW_MS
+        ) / 1000.0
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency or settings.EMBEDDING_MAX_CONCURRENCY))
+
+        # Small requests waiting to be merged into a single API call
+        self._pending: List[Tuple[List[str], asyncio.Future]] = []
+        self._pending_tokens = 0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.api_calls = 0
+        self.coalesced_requests = 0
+
+    def split_batches(self, texts: List[str]) -> List[List[str]]:
+        """Split texts into consecutive batches under the item and token limits"""
+        batches = []
+        current: List[str] = []
+        current_tokens = 0
+        for text in texts:
+            tokens = estimate_tokens(text)
+            if current and (len(current) >= self.max_items or current_tokens + tokens > self.max_tokens):
+                batches.append(current)
+                current = []
+                current_tokens = 0
+            # A single oversized text still goes out on its own; the provider decides how to handle it
+            current.append(text)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, merging small concurrent calls and splitting large ones"""
+        if not texts:
+            return []
+
+        batches = self.split_batches(texts)
+        if len(batches) == 1 and self.coalesce_window > 0:
+            return await self._enqueue(texts)
+
+        results = await asyncio.gather(*(self._run_batch(batch) for batch in batches))
+        return [embedding for batch_result in results for embedding in batch_result]
+
+    async def _run_batch(self, texts: List[str]) -> List[List[float]]:
+        """Send one batch to the provider behind the concurrency limit"""
+        async with self._semaphore:
+            self.api_calls += 1
+            embeddings = await self.embed_fn(texts)
+        if len(embeddings) != len(texts):
+            raise ValueError(f"Expected {len(texts)} embeddings, got {len(embeddings)}")
+        return embeddings
+
+    async def _enqueue(self, texts: List[str]) -> List[List[float]]:
+        """Queue a small request to be sent together with others in the coalescing window"""
+        loop = asyncio.get_running_loop()
+        tokens = sum(estimate_tokens(text) for text in texts)
+
+        # Flush first if this request would push the pending batch over its limits
+        pending_items = sum(len(item_texts) for item_texts, _ in self._pending)
+        if self._pending and (
+            pending_items + len(texts) > self.max_items
+            or self._pending_tokens + tokens > self.max_tokens
+        ):
+            self._flush()
+
+        future = loop.create_future()
+        self._pending.append((texts, future))
+        self._pending_tokens += tokens
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.coalesce_window, self._flush)
+        return await future
+
+    def _flush(self):
+        """Send everything pending as one batch and fan the results back out"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        pending = [(texts, future) for texts, future in self._pending if not future.done()]
+        self._pending = []
+        self._pending_tokens = 0
+        if not pending:
+            return
+
+        if len(pending) > 1:
+            self.coalesced_requests += len(pending)
+        task = asyncio.ensure_future(self._dispatch(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, pending: List[Tuple[List[str], asyncio.Future]]):
+        """Run a coalesced batch and hand each caller its own slice, in order"""
+        texts = [text for item_texts, _ in pending for text in item_texts]
+        try:
+            embeddings = await self._run_batch(texts)
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        offset = 0
+        for item_texts, future in pending:
+            if not future.done():
+                future.set_result(embeddings[offset:offset + len(item_texts)])
+            offset += len(item_texts)
+
 class EmbeddingService:
     """Service for generating embeddings"""
-    
-    async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for a list of texts"""
+
+    def __init__(self):
+        self.scheduler = EmbeddingScheduler()
+        self.cache = EmbeddingCache()
+        self.backends: Dict[str, EmbeddingBackend] = {
+            "openai": OpenAIEmbeddingBackend(self.scheduler.embed),
+            "local": LocalHashingEmbeddingBackend()
+        }
+
+    def get_backend(self, name: Optional[str] = None) -> EmbeddingBackend:
+        """Resolve a backend by name; "auto" prefers OpenAI when a key is configured"""
+        name = (name or settings.EMBEDDING_BACKEND).lower()
+        if name == "auto":
+            remote = self.backends["openai"]
+            return remote if remote.is_available() else self.backends["local"]
+        if name not in self.backends:
+            raise ValueError(f"Unknown embedding backend: {name}")
+        return self.backends[name]
+
+    def backend_for_model(self, model: str) -> EmbeddingBackend:
+        """Find the backend that produced vectors for a given model name"""
+        for backend in self.backends.values():
+            if backend.model == model:
+                return backend
+        raise ValueError(f"No embedding backend available for model: {model}")
+
+    async def generate_embeddings(
+        self,
+        texts: List[str],
+        backend: Optional[EmbeddingBackend] = None
+    ) -> List[List[float]]:
+        """Generate embeddings for a list of texts, serving repeats from the cache"""
         try:
             if not texts:
                 return []
-            
-            embeddings = await llm_client.generate_embeddings(texts)
-            logger.info(f"Generated {len(embeddings)} embeddings")
+
+            backend = backend or self.get_backend()
+            if not backend.cacheable:
+                return await backend.embed(texts)
+
+            keys = [self.cache.make_key(text, backend.model, backend.dimensions) for text in texts]
+            cached = await self.cache.get_many(list(dict.fromkeys(keys)))
+
+            # Only send each distinct missing text to the API once
+            missing: Dict[str, str] = {}
+            for key, text in zip(keys, texts):
+                if key not in cached and key not in missing:
+                    missing[key] = text
+
+            if missing:
+                started = time.perf_counter()
+                fresh = await backend.embed(list(missing.values()))
+                self.cache.record_api_call(time.perf_counter() - started, len(missing))
+                fresh_by_key = dict(zip(missing.keys(), fresh))
+                await self.cache.put_many(fresh_by_key)
+                cached.update(fresh_by_key)
+
+            embeddings = [cached[key] for key in keys]
+            logger.info("Generated %s embeddings (%s computed, rest from cache)", len(embeddings), len(missing))
             return embeddings
         except Exception as e:
-            logger.error(f"Error generating embeddings: {str(e)}")
+            logger.error("Error generating embeddings: %s", e)
             raise
 
-# Global instance
-embedding_service = EmbeddingService()
+    async def embed_documents(self, texts: List[str]) -> Tuple[List[List[float]], str]:
+        """Embed documents for storage, falling back to the local backend if the primary fails
 
+        Returns the embeddings together with the model name that produced them,
+        so queries can later be embedded into the same space.
+        """
+        backend = self.get_backend()
+        try:
+            return await self.generate_embeddings(texts, backend=backend), backend.model
+        except Exception as e:
+            local = self.backends["local"]
+            if backend is local or not settings.EMBEDDING_LOCAL_FALLBACK or not local.is_available():
+                raise
+            logger.warning("%s embeddings failed (%s), falling back to local embeddings", backend.name, e)
+            return await self.generate_embeddings(texts, backend=local), local.model
+
+# Global instance
+embedding_service: EmbeddingService = LazySingleton(EmbeddingService)
@@ -0,0 +1,142 @@
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.core.tracing import span
+from app.services.document_export import RENDERERS
+
+logger = get_logger(__name__)
+
+EXPORT_ID = re.compile(r"[0-9a-f]{32}")
+PRUNE_INTERVAL_SECONDS = 600
+
+def _prune_expired(export_dir: Path, max_age: float) -> int:
+    """Delete files not written or used for max_age seconds; returns how many"""
+    cutoff = time.time() - max_age
+    removed = 0
+    for path in export_dir.iterdir():
+        try:
+            if path.is_file() and path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+def _write_atomic(path: Path, data: bytes):
+    """Write through a temporary file so readers never see a partial file"""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+class ExportService:
+    """Render generated resumes to PDF and DOCX files, once per distinct content
+
+    A generated resume is stored under the hash of its text, which is the id
+    returned by /api/generate. Rendering runs in a process pool so CPU-bound
+    layout never blocks the event loop, concurrent requests for the same file
+    share one render, and rendered files are kept on disk next to the text so
+    later downloads are plain file responses. Files unused for
+    EXPORT_TTL_SECONDS are deleted, so their ids stop resolving.
+    """
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._rendering: Dict[str, asyncio.Future] = {}
+        self._pruned_at = 0.0
+        self.renders = 0
+        self.hits = 0
+        self.pruned = 0
+
+    def _export_dir(self) -> Path:
+        export_dir = Path(settings.EXPORT_DIR).resolve()
+        export_dir.mkdir(parents=True, exist_ok=True)
+        return export_dir
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that runs threads (logging, to_thread workers) can deadlock
+            self._executor = ProcessPoolExecutor(
+                max_workers=max(1, settings.EXPORT_WORKERS),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def register(self, text: str) -> str:
+        """Store a generated resume and return its export id"""
+        export_id = hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+        source = self._export_dir() / f"{export_id}.txt"
+        if source.exists():
+            # Generated again: restart its expiry
+            await asyncio.to_thread(os.utime, source)
+        else:
+            await asyncio.to_thread(_write_atomic, source, text.encode("utf-8"))
+        await self._prune()
+        return export_id
+
+    async def _prune(self):
+        """Drop expired exports, at most once per PRUNE_INTERVAL_SECONDS"""
+        ttl = settings.EXPORT_TTL_SECONDS
+        now = time.monotonic()
+        if ttl <= 0 or now - self._pruned_at < min(ttl, PRUNE_INTERVAL_SECONDS):
+            return
+        self._pruned_at = now
+        removed = await asyncio.to_thread(_prune_expired, self._export_dir(), ttl)
+        if removed:
+            self.pruned += removed
+            logger.info("Pruned %d expired export files", removed)
+
+    async def render(self, export_id: str, fmt: str) -> Path:
+        """Path of the rendered file; raises ValueError for unknown ids or formats"""
+        if fmt not in RENDERERS or not EXPORT_ID.fullmatch(export_id):
+            raise ValueError(f"No export found for {export_id}.{fmt}")
+        target = self._export_dir() / f"{export_id}.{fmt}"
+        try:
+            # Touched on every download, so files in use do not expire
+            os.utime(target)
+        except FileNotFoundError:
+            pass
+        else:
+            self.hits += 1
+            return target
+
+        key = target.name
+        future = self._rendering.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._render(export_id, fmt, target))
+            self._rendering[key] = future
+            future.add_done_callback(lambda _: self._rendering.pop(key, None))
+        # Shielded: one client disconnecting must not cancel a render others wait for
+        return await asyncio.shield(future)
+
+    async def _render(self, export_id: str, fmt: str, target: Path) -> Path:
+        source = target.with_suffix(".txt")
+        try:
+            text = await asyncio.to_thread(source.read_text, encoding="utf-8")
+        except FileNotFoundError:
+            raise ValueError(f"No generated resume found for id: {export_id}")
+        with span("export_render", format=fmt):
+            data = await asyncio.get_running_loop().run_in_executor(self._pool(), RENDERERS[fmt], text)
+        await asyncio.to_thread(_write_atomic, target, data)
+        self.renders += 1
+        logger.info("Rendered %s (%d bytes)", target.name, len(data))
+        return target
+
+    def stats(self) -> Dict:
+        return {
+            "renders": self.renders,
+            "hits": self.hits,
+            "pruned": self.pruned,
+            "rendering": len(self._rendering),
+            "workers": settings.EXPORT_WORKERS,
+        }
+
+# Global instance
+export_service = ExportService()
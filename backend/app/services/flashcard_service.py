@@ -1,23 +1,55 @@
-from typing import List
+from typing import List, Optional, Sequence
 from app.models.llm_client import llm_client
-from app.services.vectorstore import vectorstore
+from app.services.context_builder import context_builder
+from app.services.profile_service import profile_service
+from app.services.generation import generate_sharded, variation_instructions
 from app.core.logger import get_logger
+from app.core.tracing import span
 
 logger = get_logger(__name__)
 
+# Rough completion size of one flashcard
+TOKENS_PER_FLASHCARD = 50
+
 class FlashcardService:
     """Service for generating flashcards from resume"""
     
-    async def generate_flashcards(self, file_id: str, count: int = 10) -> List[dict]:
-        """Generate flashcards from resume content"""
+    async def generate_flashcards(
+        self,
+        file_id: str,
+        count: int = 10,
+        focus: Optional[str] = None,
+        avoid: Sequence[str] = (),
+        context: Optional[str] = None
+    ) -> List[dict]:
+        """Generate flashcards from resume content
+
+        Sharding, `focus`, `avoid` and `context` work as for quizzes.
+        """
+        flashcards = await generate_sharded(
+            file_id,
+            count,
+            lambda size, shard_focus, shard_avoid: self._generate_batch(
+                file_id, size, focus or shard_focus, [*avoid, *shard_avoid], context
+            ),
+            "flashcards"
+        )
+        logger.info("Generated %s flashcards for file_id: %s", len(flashcards), file_id)
+        return flashcards
+    
+    async def _generate_batch(
+        self,
+        file_id: str,
+        count: int,
+        focus: Optional[str],
+        avoid: Sequence[str],
+        context: Optional[str] = None
+    ) -> List[dict]:
+        """One LLM call for up to `count` validated flashcards"""
         try:
-            # Get documents from vector store
-            documents = vectorstore.get_documents(file_id)
-            if not documents:
-                raise ValueError(f"No documents found for file_id: {file_id}")
-            
-            # Combine all text
-            full_text = "\n\n".join([doc["text"] for doc in documents])
+            if context is None:
+                # Most relevant resume text within the token budget (raises ValueError for unknown files)
+                context = await context_builder.build(file_id, "flashcards")
             
             # Generate flashcards using LLM
             system_prompt = """You are an expert at creating educational flashcards. Generate flashcards that help someone learn and remember key information from a resume.
@@ -28,9 +60,9 @@ Each flashcard should have:
 Focus on important skills, technologies, achievements, and concepts mentioned in the resume."""
             
             user_prompt = f"""Generate exactly {count} flashcards from the following resume content. Return a JSON array with objects containing "front" and "back" fields.
-
-Resume content:
-{full_text[:4000]}
+{variation_instructions(focus, avoid, "flashcards")}
+{profile_service.prompt_context(file_id)}Resume content:
+{context}
 
 Return format:
 [
@@ -39,10 +71,15 @@ Return format:
 ]"""
             
             try:
-                response = await llm_client.generate_structured_output(
-                    prompt=user_prompt,
-                    system_prompt=system_prompt
-                )
+                with span("llm"):
+                    response = await llm_client.generate_structured_output(
+                        prompt=user_prompt,
+                        system_prompt=system_prompt,
+                        # Asking again must give new items, so these are never served from the cache
+                        use_cache=False,
+                        caller="flashcards",
+                        expected_output_tokens=count * TOKENS_PER_FLASHCARD
+                    )
             except ValueError as e:
                 # If OpenAI API key is not configured, provide helpful error
                 if "API key" in str(e):
@@ -74,7 +111,9 @@ Return format:
                     try:
                         flashcards = json.loads(response)
                     except:
-                        logger.warning(f"Could not parse response as JSON: {response[:100]}")
+                        # Resume-derived content: keep it out of logs unless debugging
+                        logger.warning("Could not parse response as JSON (%d chars)", len(response))
+                        logger.debug("Unparseable response: %.100s", response)
             
             # Ensure we have the right format
             formatted_flashcards = []
@@ -88,10 +127,9 @@ Return format:
             if not formatted_flashcards:
                 raise ValueError("No valid flashcards were generated. Please try again or check your OpenAI API configuration.")
             
-            logger.info(f"Generated {len(formatted_flashcards)} flashcards for file_id: {file_id}")
             return formatted_flashcards
         except Exception as e:
-            logger.error(f"Error generating flashcards: {str(e)}")
+            logger.error("Error generating flashcards: %s", e)
             raise
 
 # Global instance
@@ -0,0 +1,146 @@
+import asyncio
+import math
+from typing import Awaitable, Callable, Dict, FrozenSet, List, Optional, Sequence
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.core.tracing import span
+from app.services.chunker import detect_section
+from app.services.embedding_backends import STOPWORDS, TOKEN_PATTERN
+from app.services.vectorstore import vectorstore
+
+logger = get_logger(__name__)
+
+# generate(count, focus, avoid) -> validated items; one LLM call
+BatchGenerator = Callable[[int, Optional[str], Sequence[str]], Awaitable[List[dict]]]
+
+# What to ask for when a generation call is narrowed to one section of the resume
+SECTION_FOCUS: Dict[str, str] = {
+    "experience": "work experience: roles, responsibilities, tools used and measurable results",
+    "projects": "projects: what was built, the technologies involved and the outcomes",
+    "skills": "technical skills: languages, frameworks, tools and the concepts behind them",
+    "certifications": "certifications, awards and achievements",
+    "education": "education: degrees, institutions and relevant coursework",
+    "summary": "the professional summary and career goals",
+    "other": "details not covered by the main sections",
+}
+
+# Angles for a section that more than one concurrent call focuses on. Identical prompts
+# would be coalesced into one call (and cached), so every shard's prompt must differ
+SHARD_ANGLES = (
+    "definitions and key facts",
+    "how and why things were done",
+    "applying the same knowledge to a new situation",
+    "comparisons, trade-offs and alternatives",
+    "scale, numbers and measurable impact",
+)
+
+# Most existing items listed in a prompt as "do not repeat"; keeps prompts bounded
+MAX_AVOID_ITEMS = 30
+MAX_AVOID_CHARS = 120
+
+# Items sharing this much of their content words (Jaccard) ask the same thing
+NEAR_DUPLICATE_THRESHOLD = 0.75
+
+def item_text(item: dict) -> str:
+    """The prompt side of an item: a quiz question or the front of a flashcard"""
+    return str(item.get("question") or item.get("front") or "")
+
+def _content_words(item: dict) -> FrozenSet[str]:
+    return frozenset(token for token in TOKEN_PATTERN.findall(item_text(item).lower()) if token not in STOPWORDS)
+
+def merge_unique(items: List[dict], candidates: Sequence[dict]) -> int:
+    """Append the candidates that are not near-duplicates of an existing item; returns how many were added"""
+    seen = [_content_words(item) for item in items]
+    added = 0
+    for candidate in candidates:
+        words = _content_words(candidate)
+        if not words or any(len(words & other) / len(words | other) >= NEAR_DUPLICATE_THRESHOLD for other in seen):
+            continue
+        items.append(candidate)
+        seen.append(words)
+        added += 1
+    return added
+
+def focus_areas(file_id: str) -> List[str]:
+    """Focus descriptions for the sections present in a file, most substantial first"""
+    sizes: Dict[str, int] = {}
+    for doc in vectorstore.get_documents(file_id):
+        section = doc.get("metadata", {}).get("section") or detect_section(doc.get("text", ""))
+        sizes[section] = sizes.get(section, 0) + len(doc.get("text", ""))
+    ordered = sorted(sizes, key=lambda section: -sizes[section])
+    return [SECTION_FOCUS.get(section, SECTION_FOCUS["other"]) for section in ordered] or [SECTION_FOCUS["other"]]
+
+def shard_focuses(focuses: Sequence[str], shards: int, offset: int = 0) -> List[str]:
+    """A different focus for each of `shards` concurrent calls, cycling through the sections from `offset`
+
+    With more shards than sections, the repeats of a section each get their
+    own angle (and a set number once the angles run out).
+    """
+    result = []
+    for shard in range(shards):
+        focus = focuses[(offset + shard) % len(focuses)]
+        repeat = shard // len(focuses)
+        if repeat:
+            focus += f", with an emphasis on {SHARD_ANGLES[(repeat - 1) % len(SHARD_ANGLES)]}"
+            if repeat > len(SHARD_ANGLES):
+                focus += f" (set {repeat})"
+        result.append(focus)
+    return result
+
+def variation_instructions(focus: Optional[str], avoid: Sequence[str], noun: str) -> str:
+    """Prompt lines narrowing a generation call to one area and away from existing items"""
+    lines = []
+    if focus:
+        lines.append(f"Focus only on the resume's {focus}.")
+    if avoid:
+        recent = [text[:MAX_AVOID_CHARS] for text in list(avoid)[-MAX_AVOID_ITEMS:]]
+        lines.append(f"Do not repeat or rephrase any of these existing {noun}:")
+        lines.extend(f"- {text}" for text in recent)
+    return "\n".join(lines) + "\n" if lines else ""
+
+async def generate_sharded(file_id: str, count: int, generate: BatchGenerator, noun: str) -> List[dict]:
+    """Generate `count` items in concurrent calls of at most GENERATION_SHARD_SIZE each
+
+    Each shard focuses on a different section of the resume, or a different
+    angle on one when there are fewer sections than shards, so wall time is
+    about one small generation. Near-duplicates across shards are dropped and
+    only the shortfall is requested again, up to GENERATION_RETRY_ROUNDS
+    times, telling the model which items already exist. Small counts are a
+    single call, as before.
+    """
+    shard_size = max(1, settings.GENERATION_SHARD_SIZE)
+    if count <= shard_size:
+        return await generate(count, None, ())
+
+    focuses = focus_areas(file_id)
+    items: List[dict] = []
+    failure: Optional[BaseException] = None
+    for round_number in range(1 + max(0, settings.GENERATION_RETRY_ROUNDS)):
+        missing = count - len(items)
+        if missing <= 0:
+            break
+        shards = min(math.ceil(missing / shard_size), max(1, settings.GENERATION_MAX_SHARDS))
+        # Spread the remainder evenly, e.g. 12 over 3 shards -> 4, 4, 4
+        sizes = [missing // shards + (1 if shard < missing % shards else 0) for shard in range(shards)]
+        avoid = [item_text(item) for item in items]
+        with span("generate_shards", shards=shards, round=round_number):
+            results = await asyncio.gather(*(
+                generate(size, focus, avoid)
+                for size, focus in zip(sizes, shard_focuses(focuses, shards, round_number * shards))
+            ), return_exceptions=True)
+        for result in results:
+            if isinstance(result, asyncio.CancelledError):
+                raise result
+            if isinstance(result, BaseException):
+                failure = failure or result
+                logger.warning("Shard of %s for %s failed: %s", noun, file_id, result)
+                continue
+            merge_unique(items, result)
+
+    if not items:
+        if failure is not None:
+            raise failure
+        raise ValueError(f"No valid {noun} were generated. Please try again or check your OpenAI API configuration.")
+    if len(items) < count:
+        logger.warning("Generated %s of %s %s for file_id: %s", len(items), count, noun, file_id)
+    return items[:count]
@@ -1,13 +1,41 @@
-from typing import Dict, Any, Optional
+import asyncio
+import hashlib
+import re
+from typing import AsyncIterator, Awaitable, Dict, Any, List, Optional, Tuple
 from app.models.llm_client import llm_client
+from app.services.resume_renderer import TEMPLATES, resume_renderer
+from app.core.cache import LRUCache
+from app.core.config import settings
 from app.core.logger import get_logger
+from app.core.request_context import cache_bypass, cache_refresh
+from app.core.tracing import span
 
 logger = get_logger(__name__)
 
+SECTION_SYSTEM_PROMPT = """You are an expert resume writer specializing in ATS-friendly resumes.
+Write only the requested text for one resume section: no headings, no commentary, no markdown.
+Never invent employers, dates, degrees, skills or numbers that are not in the input."""
+
+# "- ", "* ", "• ", "1. " and similar list markers at the start of a generated line
+LIST_MARKER = re.compile(r"^\s*(?:[-*•▪]|\d+[.)])\s*")
+
 class GeneratorService:
-    """Service for generating ATS-friendly resumes"""
+    """Service for generating ATS-friendly resumes
+
+    For the built-in templates each section (summary, every experience
+    entry, skills) is written by its own small LLM call, all running
+    concurrently and cached by a hash of the section's prompt, i.e. its
+    input plus the job description; header and education need no LLM, and
+    the layout is rendered locally. Editing one field therefore re-runs
+    only that field's section. Other templates get one free-form generation.
+    """
     
-    async def generate_resume(
+    def __init__(self):
+        self._sections = LRUCache(max_entries=settings.GENERATOR_SECTION_CACHE_ITEMS)
+        self.section_hits = 0
+        self.section_misses = 0
+    
+    def _build_prompts(
         self,
         name: Optional[str] = None,
         contact: Optional[str] = None,
@@ -17,57 +45,56 @@ class GeneratorService:
         education: Optional[list] = None,
         template: str = "modern",
         job_description: Optional[str] = None
-    ) -> str:
-        """Generate an ATS-friendly resume"""
-        try:
-            # Build context from provided information
-            context_parts = []
-            
-            if name:
-                context_parts.append(f"Name: {name}")
-            if contact:
-                context_parts.append(f"Contact: {contact}")
-            if summary:
-                context_parts.append(f"Summary: {summary}")
-            if skills:
-                context_parts.append(f"Skills: {', '.join(skills)}")
-            if experiences:
-                exp_text = "\n".join([
-                    f"- {exp.get('title', '')} at {exp.get('company', '')} ({exp.get('duration', '')}): {exp.get('description', '')}"
-                    for exp in experiences
-                ])
-                context_parts.append(f"Experience:\n{exp_text}")
-            if education:
-                edu_text = "\n".join([
-                    f"- {edu.get('degree', '')} from {edu.get('institution', '')} ({edu.get('year', '')})"
-                    for edu in education
-                ])
-                context_parts.append(f"Education:\n{edu_text}")
-            
-            context = "\n\n".join(context_parts)
-            
-            # Generate resume using LLM
-            system_prompt = f"""You are an expert resume writer specializing in ATS-friendly resumes. Generate a professional resume in {template} format.
+    ) -> Tuple[str, str]:
+        """Build the system and user prompts for a resume"""
+        # Build context from provided information
+        context_parts = []
+        
+        if name:
+            context_parts.append(f"Name: {name}")
+        if contact:
+            context_parts.append(f"Contact: {contact}")
+        if summary:
+            context_parts.append(f"Summary: {summary}")
+        if skills:
+            context_parts.append(f"Skills: {', '.join(skills)}")
+        if experiences:
+            exp_text = "\n".join([
+                f"- {exp.get('title', '')} at {exp.get('company', '')} ({exp.get('duration', '')}): {exp.get('description', '')}"
+                for exp in experiences
+            ])
+            context_parts.append(f"Experience:\n{exp_text}")
+        if education:
+            edu_text = "\n".join([
+                f"- {edu.get('degree', '')} from {edu.get('institution', '')} ({edu.get('year', '')})"
+                for edu in education
+            ])
+            context_parts.append(f"Education:\n{edu_text}")
+        
+        context = "\n\n".join(context_parts)
+        
+        # Prompts for the LLM
+        system_prompt = f"""You are an expert resume writer specializing in ATS-friendly resumes. Generate a professional resume in {template} format.
 The resume should be:
 - ATS-friendly (use standard section headers, keywords, and formatting)
 - Well-structured and easy to read
 - Professional and polished
 - Optimized for applicant tracking systems"""
-            
-            user_prompt = f"""Generate a complete ATS-friendly resume based on the following information:
+        
+        user_prompt = f"""Generate a complete ATS-friendly resume based on the following information:
 
 {context}
 
 """
-            
-            if job_description:
-                user_prompt += f"""
+        
+        if job_description:
+            user_prompt += f"""
 Additionally, optimize this resume for the following job description:
 {job_description[:2000]}
 
 Make sure to incorporate relevant keywords from the job description while maintaining accuracy."""
-            
-            user_prompt += """
+        
+        user_prompt += """
 Generate the resume in plain text format with clear sections:
 - Header (Name, Contact Info)
 - Professional Summary
@@ -77,19 +104,212 @@ Generate the resume in plain text format with clear sections:
 - (Any other relevant sections)
 
 Use clear section headers and bullet points for readability."""
-            
-            resume = await llm_client.generate_text(
-                prompt=user_prompt,
-                system_prompt=system_prompt,
+        
+        return system_prompt, user_prompt
+    
+    async def _section(self, kind: str, prompt: str, max_tokens: int) -> str:
+        """One section's text, from cache when the same input was generated before"""
+        key = f"{kind}:{hashlib.sha256(prompt.encode('utf-8')).hexdigest()}"
+        # Cache-Control: no-cache / no-store ask for a fresh generation
+        if not (cache_bypass.get() or cache_refresh.get()):
+            text = self._sections.get(key)
+            if text is not None:
+                self.section_hits += 1
+                return text
+        self.section_misses += 1
+        with span("llm", section=kind):
+            text = await llm_client.generate_text(
+                prompt=prompt,
+                system_prompt=SECTION_SYSTEM_PROMPT,
                 temperature=0.3,
-                max_tokens=2000
+                max_tokens=max_tokens,
+                caller="generate"
             )
+        text = (text or "").strip()
+        if text and not cache_bypass.get():
+            self._sections.set(key, text)
+        return text
+    
+    @staticmethod
+    def _role_text(experience: Dict) -> str:
+        """Role as given in prompts; independent of the template so cached sections survive a layout switch"""
+        parts = [str(experience.get(key) or "").strip() for key in ("title", "company", "duration")]
+        return ", ".join(part for part in parts if part)
+    
+    @staticmethod
+    def _job_block(job_description: Optional[str]) -> str:
+        if not job_description:
+            return ""
+        return f"""
+Target job description (use its keywords where they truthfully apply):
+{job_description[:2000]}
+"""
+    
+    async def _summary_block(
+        self,
+        template: str,
+        summary: Optional[str],
+        experiences: List[Dict],
+        job_description: Optional[str]
+    ) -> str:
+        roles = [self._role_text(exp) for exp in experiences]
+        if not summary and not any(roles):
+            return ""
+        prompt = f"""Write a 2-3 sentence professional summary for a resume.
+
+Candidate's own summary: {summary or "(none)"}
+Roles: {"; ".join(role for role in roles if role) or "(none)"}
+{self._job_block(job_description)}
+Return only the summary paragraph."""
+        text = await self._section("summary", prompt, max_tokens=200)
+        return resume_renderer.section(template, "Professional Summary", [text or summary or ""])
+    
+    async def _skills_block(self, template: str, skills: List[str], job_description: Optional[str]) -> str:
+        if not skills:
+            return ""
+        if job_description:
+            prompt = f"""Order these skills for a resume, most relevant to the target job first. Do not add skills that are not listed.
+
+Skills: {", ".join(skills)}
+{self._job_block(job_description)}
+Return only a comma-separated list."""
+            text = await self._section("skills", prompt, max_tokens=150)
+            ordered = [LIST_MARKER.sub("", part).strip() for part in re.split(r"[,\n]", text)]
+            skills = [skill for skill in ordered if skill] or skills
+        return resume_renderer.section(template, "Skills", [", ".join(skills)])
+    
+    async def _experience_entry(self, template: str, experience: Dict, job_description: Optional[str]) -> str:
+        role = resume_renderer.role(template, experience)
+        description = str(experience.get("description") or "").strip()
+        if not description:
+            return role
+        prompt = f"""Rewrite this role as 3-5 ATS-friendly resume bullets that start with strong action verbs and keep every fact and number.
+
+Role: {self._role_text(experience)}
+Description: {description}
+{self._job_block(job_description)}
+Return only the bullets, one per line."""
+        text = await self._section("experience", prompt, max_tokens=300)
+        bullets = [LIST_MARKER.sub("", line).strip() for line in text.splitlines()] if text else [description]
+        return "\n".join([role] + resume_renderer.bullets(template, [bullet for bullet in bullets if bullet]))
+    
+    async def _experience_block(self, template: str, experiences: List[Dict], job_description: Optional[str]) -> str:
+        entries = await asyncio.gather(*(
+            self._experience_entry(template, experience, job_description) for experience in experiences
+        ))
+        lines = "\n\n".join(entry for entry in entries if entry)
+        return resume_renderer.section(template, "Experience", [lines] if lines else [])
+    
+    async def _static(self, block: str) -> str:
+        return block
+    
+    def _section_blocks(
+        self,
+        name: Optional[str] = None,
+        contact: Optional[str] = None,
+        summary: Optional[str] = None,
+        experiences: Optional[list] = None,
+        skills: Optional[list] = None,
+        education: Optional[list] = None,
+        template: str = "modern",
+        job_description: Optional[str] = None
+    ) -> List[Awaitable[str]]:
+        """Rendered blocks in layout order; the ones needing the LLM run when awaited"""
+        experiences = experiences or []
+        return [
+            self._static(resume_renderer.header(template, name, contact)),
+            self._summary_block(template, summary, experiences, job_description),
+            self._skills_block(template, skills or [], job_description),
+            self._experience_block(template, experiences, job_description),
+            self._static(resume_renderer.section(template, "Education", resume_renderer.education(template, education or []))),
+        ]
+    
+    async def _stream_sections(self, **kwargs) -> AsyncIterator[str]:
+        tasks = [asyncio.create_task(block) for block in self._section_blocks(**kwargs)]
+        try:
+            for task in tasks:
+                block = await task
+                if block:
+                    yield block + "\n\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def stats(self) -> Dict:
+        lookups = self.section_hits + self.section_misses
+        return {
+            "cached_sections": len(self._sections),
+            "section_hits": self.section_hits,
+            "section_misses": self.section_misses,
+            "section_hit_rate": round(self.section_hits / lookups, 3) if lookups else 0.0,
+        }
+    
+    async def generate_resume(
+        self,
+        name: Optional[str] = None,
+        contact: Optional[str] = None,
+        summary: Optional[str] = None,
+        experiences: Optional[list] = None,
+        skills: Optional[list] = None,
+        education: Optional[list] = None,
+        template: str = "modern",
+        job_description: Optional[str] = None
+    ) -> str:
+        """Generate an ATS-friendly resume"""
+        try:
+            if template in TEMPLATES:
+                with span("generate_sections", template=template):
+                    blocks = await asyncio.gather(*self._section_blocks(
+                        name=name,
+                        contact=contact,
+                        summary=summary,
+                        experiences=experiences,
+                        skills=skills,
+                        education=education,
+                        template=template,
+                        job_description=job_description
+                    ))
+                logger.info("Generated resume from sections")
+                return resume_renderer.join(blocks)
+            
+            system_prompt, user_prompt = self._build_prompts(
+                name=name,
+                contact=contact,
+                summary=summary,
+                experiences=experiences,
+                skills=skills,
+                education=education,
+                template=template,
+                job_description=job_description
+            )
+            
+            with span("llm"):
+                resume = await llm_client.generate_text(
+                    prompt=user_prompt,
+                    system_prompt=system_prompt,
+                    temperature=0.3,
+                    max_tokens=2000,
+                    caller="generate"
+                )
             
             logger.info("Generated resume successfully")
             return resume
         except Exception as e:
-            logger.error(f"Error generating resume: {str(e)}")
+            logger.error("Error generating resume: %s", e)
             raise
+    
+    def stream_resume(self, **kwargs) -> AsyncIterator[str]:
+        """Stream a resume as it is generated; accepts the same arguments as generate_resume"""
+        if kwargs.get("template", "modern") in TEMPLATES:
+            return self._stream_sections(**kwargs)
+        system_prompt, user_prompt = self._build_prompts(**kwargs)
+        return llm_client.stream_text(
+            prompt=user_prompt,
+            system_prompt=system_prompt,
+            temperature=0.3,
+            max_tokens=2000,
+            caller="generate"
+        )
 
 # Global instance
 generator_service = GeneratorService()
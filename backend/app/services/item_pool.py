@@ -0,0 +1,178 @@
+import asyncio
+import math
+import random
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from app.core import metrics
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.core.request_context import Priority, cache_bypass, cache_refresh, use_priority
+from app.core.tracing import span
+from app.services.flashcard_service import flashcard_service
+from app.services.generation import focus_areas, item_text, merge_unique, shard_focuses
+from app.services.quiz_service import quiz_service
+from app.services.vectorstore import vectorstore
+
+logger = get_logger(__name__)
+
+class ItemPool:
+    """Generated items for one file, kind and difficulty, and which are still unserved"""
+
+    def __init__(self):
+        self.items: List[dict] = []
+        self.unserved: List[int] = []  # indexes into items
+        self.fill: Optional[asyncio.Task] = None
+        self.rounds = 0
+        self.exhausted = False  # the last fill found nothing new
+
+class ItemPoolService:
+    """Serve quiz questions and flashcards by sampling a pre-generated per-file pool
+
+    A pool is filled with ITEM_POOL_SIZE items from concurrent LLM calls of
+    ITEM_POOL_SHARD_SIZE items each, every call focused on a different
+    section of the resume (or angle on one) and told which items already exist;
+    near-duplicates are dropped. Requests draw items at random without replacement, so
+    regenerating gives new items in milliseconds, and a background top-up
+    starts once fewer than ITEM_POOL_LOW_WATERMARK remain. Only the first
+    request for a pool waits for generation. When a file yields nothing new,
+    its items are served again in a fresh random order.
+    """
+
+    def __init__(self):
+        self.enabled = settings.ITEM_POOL_ENABLED
+        self.size = max(1, settings.ITEM_POOL_SIZE)
+        self.low_watermark = settings.ITEM_POOL_LOW_WATERMARK
+        self.shard_size = max(1, settings.ITEM_POOL_SHARD_SIZE)
+        self._pools: Dict[Tuple[str, str, str], ItemPool] = {}
+        self._events: Counter = Counter()
+
+    def _record(self, kind: str, event: str, amount: int = 1):
+        self._events[event] += amount
+        metrics.ITEM_POOL.inc(amount, kind=kind, event=event)
+
+    async def take(self, file_id: str, kind: str, count: int, difficulty: str = "") -> Optional[List[dict]]:
+        """`count` unserved items of a kind ("quiz" or "flashcards"), or None when the caller should generate"""
+        if not self.enabled or count > self.size:
+            return None
+        # Cache-Control: no-cache / no-store ask for a fresh generation
+        if cache_bypass.get() or cache_refresh.get():
+            return None
+        if not vectorstore.get_documents(file_id):
+            raise ValueError(f"No documents found for file_id: {file_id}")
+
+        key = (file_id, kind, difficulty)
+        pool = self._pools.setdefault(key, ItemPool())
+        if len(pool.unserved) < count and not pool.exhausted:
+            self._record(kind, "wait")
+            await self._join_fill(key, pool)
+        else:
+            self._record(kind, "hit")
+
+        if len(pool.unserved) < count:
+            if not pool.items:
+                raise ValueError(f"No {kind} items could be generated for file_id: {file_id}")
+            # Nothing new left to generate: start another pass over everything
+            pool.unserved = list(range(len(pool.items)))
+            self._record(kind, "recycled")
+
+        picked = random.sample(pool.unserved, min(count, len(pool.unserved)))
+        chosen = set(picked)
+        pool.unserved = [index for index in pool.unserved if index not in chosen]
+        self._record(kind, "served", len(picked))
+
+        if len(pool.unserved) < self.low_watermark and not pool.exhausted and pool.fill is None:
+            with use_priority(Priority.BACKGROUND):
+                self._start_fill(key, pool)
+        return [dict(pool.items[index]) for index in picked]
+
+    def _start_fill(self, key: Tuple[str, str, str], pool: ItemPool) -> asyncio.Task:
+        task = asyncio.create_task(self._fill(key, pool))
+        pool.fill = task
+
+        def finished(done: asyncio.Task):
+            if pool.fill is done:
+                pool.fill = None
+            if not done.cancelled() and done.exception() is not None:
+                logger.warning("Filling %s pool for %s failed: %s", key[1], key[0], done.exception())
+        task.add_done_callback(finished)
+        return task
+
+    async def _join_fill(self, key: Tuple[str, str, str], pool: ItemPool):
+        """Wait for the pool's running fill, starting one if needed"""
+        task = pool.fill or self._start_fill(key, pool)
+        # Shielded: a client disconnect must not cancel a fill other requests share
+        try:
+            await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+            raise ValueError(f"No documents found for file_id: {key[0]}")  # deleted meanwhile
+
+    async def _fill(self, key: Tuple[str, str, str], pool: ItemPool):
+        file_id, kind, difficulty = key
+        missing = self.size - len(pool.unserved)
+        shards = max(1, math.ceil(missing / self.shard_size))
+        focuses = focus_areas(file_id)
+        avoid = [item_text(item) for item in pool.items]
+
+        with span("item_pool_fill", kind=kind, shards=shards):
+            results = await asyncio.gather(*(
+                self._generate(file_id, kind, difficulty, focus, avoid)
+                for focus in shard_focuses(focuses, shards, pool.rounds)
+            ), return_exceptions=True)
+        pool.rounds += 1
+
+        failures = [result for result in results if isinstance(result, BaseException)]
+        if failures:
+            self._record(kind, "failed_shard", len(failures))
+            if len(failures) == len(results):
+                raise failures[0]
+        # The file may have been deleted while the calls were in flight
+        if self._pools.get(key) is not pool:
+            return
+
+        added = 0
+        for result in results:
+            if isinstance(result, BaseException):
+                continue
+            start = len(pool.items)
+            new_items = merge_unique(pool.items, result)
+            pool.unserved.extend(range(start, start + new_items))
+            self._record(kind, "duplicate", len(result) - new_items)
+            added += new_items
+        pool.exhausted = added == 0
+        self._record(kind, "generated", added)
+        logger.info("Added %s %s items to pool for %s (%s unserved)", added, kind, file_id, len(pool.unserved))
+
+    async def _generate(self, file_id: str, kind: str, difficulty: str, focus: str, avoid: List[str]) -> List[dict]:
+        if kind == "quiz":
+            return await quiz_service.generate_quiz(
+                file_id=file_id, count=self.shard_size, difficulty=difficulty, focus=focus, avoid=avoid
+            )
+        return await flashcard_service.generate_flashcards(
+            file_id=file_id, count=self.shard_size, focus=focus, avoid=avoid
+        )
+
+    def cancel(self, file_id: str):
+        """Drop a file's pools and stop their fills"""
+        for key in [key for key in self._pools if key[0] == file_id]:
+            pool = self._pools.pop(key)
+            if pool.fill is not None:
+                pool.fill.cancel()
+
+    def stats(self) -> Dict:
+        served_requests = self._events["hit"] + self._events["wait"]
+        return {
+            "enabled": self.enabled,
+            "pools": len(self._pools),
+            "items": sum(len(pool.items) for pool in self._pools.values()),
+            "unserved": sum(len(pool.unserved) for pool in self._pools.values()),
+            "filling": sum(1 for pool in self._pools.values() if pool.fill is not None),
+            **{event: self._events[event] for event in
+               ("hit", "wait", "recycled", "served", "generated", "duplicate", "failed_shard")},
+            # Share of requests answered without waiting for generation
+            "hit_rate": round(self._events["hit"] / served_requests, 3) if served_requests else 0.0,
+        }
+
+# Global instance
+item_pool = ItemPoolService()
@@ -1,26 +1,47 @@
-from typing import Optional
+import asyncio
+import hashlib
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
 from app.models.llm_client import llm_client
+from app.services.context_builder import context_builder
+from app.services.profile_service import profile_service
 from app.services.vectorstore import vectorstore
+from app.core.cache import LRUCache
+from app.core.config import settings
 from app.core.logger import get_logger
+from app.core.request_context import cache_bypass, cache_refresh
+from app.core.tokens import CHARS_PER_TOKEN, estimate_tokens, estimate_total_tokens
+from app.core.tracing import span
 
 logger = get_logger(__name__)
 
+PARTIAL_SYSTEM_PROMPT = """You condense part of a resume into dense factual notes for a later summary.
+Keep every skill, technology, employer, role, date, degree, certification and measurable result.
+Drop filler. Do not add anything that is not in the text."""
+
 class NotesService:
     """Service for generating short notes from resume"""
     
-    async def generate_notes(self, file_id: str, style: str = "concise") -> str:
-        """Generate short notes from resume content"""
-        try:
-            # Get documents from vector store
-            documents = vectorstore.get_documents(file_id)
-            if not documents:
-                raise ValueError(f"No documents found for file_id: {file_id}")
-            
-            # Combine all text
-            full_text = "\n\n".join([doc["text"] for doc in documents])
-            
-            # Generate notes using LLM
-            system_prompt = f"""You are an expert resume analyzer. Generate {style} notes summarizing the key points from the resume.
+    def __init__(self):
+        # Partial summaries by hash of their input, shared by any file containing the same text
+        self._partials = LRUCache(max_entries=settings.NOTES_PARTIAL_CACHE_ITEMS)
+        self._file_partials: Dict[str, Set[str]] = {}
+        self._semaphore = asyncio.Semaphore(max(1, settings.NOTES_MAP_CONCURRENCY))
+        self.partial_hits = 0
+        self.partial_misses = 0
+    
+    async def _build_prompts(self, file_id: str, style: str, context: Optional[str] = None) -> Tuple[str, str]:
+        """Build the system and user prompts for a file's notes; a long resume is always summarized in full"""
+        documents = vectorstore.get_documents(file_id)
+        texts = [doc.get("text", "") for doc in documents]
+        if estimate_total_tokens(texts) > settings.NOTES_MAP_REDUCE_MIN_TOKENS:
+            # Too long for one prompt: the final call reduces summaries of the whole document
+            partials = await self._summarize_hierarchically(file_id, texts)
+            context = "Summaries of consecutive parts of the resume:\n\n" + "\n\n".join(partials)
+        elif context is None:
+            # Most relevant resume text within the token budget (raises ValueError for unknown files)
+            context = await context_builder.build(file_id, "notes")
+        
+        system_prompt = f"""You are an expert resume analyzer. Generate {style} notes summarizing the key points from the resume.
 Focus on:
 - Key skills and competencies
 - Work experience highlights
@@ -28,18 +49,130 @@ Focus on:
 - Notable achievements
 
 Format the notes in a clear, bullet-point style."""
-            
-            user_prompt = f"""Please generate {style} notes from the following resume content:
+        
+        user_prompt = f"""Please generate {style} notes from the following resume content:
+
+{profile_service.prompt_context(file_id)}{context}"""
+        
+        return system_prompt, user_prompt
+    
+    async def _summarize_hierarchically(self, file_id: str, texts: List[str]) -> List[str]:
+        """Summarize groups of chunks concurrently, then groups of summaries, until they fit one prompt
+
+        Each level runs its groups in parallel, so latency grows with the depth
+        of the tree rather than with the length of the document.
+        """
+        budget = max(1, settings.NOTES_MAP_GROUP_TOKENS)
+        # Half a group each, so an oversized chunk (e.g. the chunker's whole-text fallback) still maps in pairs
+        level = self._split([text for text in texts if text.strip()], budget // 2)
+        depth = 0
+        while len(level) > 1 and estimate_total_tokens(level) > budget:
+            groups = self._group(level, budget)
+            with span("notes_map", depth=depth, groups=len(groups)):
+                level = list(await asyncio.gather(*(self._summarize_group(file_id, group) for group in groups)))
+            depth += 1
+        logger.info("Summarized %s chunks for file_id %s in %s levels", len(texts), file_id, depth)
+        return level
+    
+    @staticmethod
+    def _split(texts: List[str], budget: int) -> List[str]:
+        """Texts with any longer than `budget` tokens cut into windows, at line or word breaks where possible"""
+        size = max(1, budget) * CHARS_PER_TOKEN
+        windows: List[str] = []
+        for text in texts:
+            while len(text) > size:
+                cut = max(text.rfind("\n", 0, size), text.rfind(" ", 0, size))
+                if cut <= size // 2:
+                    cut = size
+                windows.append(text[:cut])
+                text = text[cut:].lstrip()
+            if text:
+                windows.append(text)
+        return windows
+    
+    @staticmethod
+    def _group(texts: List[str], budget: int) -> List[List[str]]:
+        """Consecutive runs of texts of at most `budget` tokens
 
-{full_text[:3000]}"""
+        Groups always take at least two texts, so every level at least halves
+        and the tree stays logarithmic even when summaries come back long.
+        """
+        groups: List[List[str]] = []
+        current: List[str] = []
+        used = 0
+        for text in texts:
+            tokens = estimate_tokens(text)
+            if len(current) >= 2 and used + tokens > budget:
+                groups.append(current)
+                current, used = [], 0
+            current.append(text)
+            used += tokens
+        if current:
+            groups.append(current)
+        return groups
+    
+    async def _summarize_group(self, file_id: str, group: List[str]) -> str:
+        text = "\n\n".join(group)
+        key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        self._file_partials.setdefault(file_id, set()).add(key)
+        # Cache-Control: no-cache / no-store ask for a fresh generation
+        if not (cache_bypass.get() or cache_refresh.get()):
+            summary = self._partials.get(key)
+            if summary is not None:
+                self.partial_hits += 1
+                return summary
+        self.partial_misses += 1
+        
+        async with self._semaphore:
+            try:
+                with span("llm"):
+                    summary = await llm_client.generate_text(
+                        prompt=f"Condense this part of a resume into notes:\n\n{text}",
+                        system_prompt=PARTIAL_SYSTEM_PROMPT,
+                        temperature=0.2,
+                        max_tokens=settings.NOTES_PARTIAL_MAX_TOKENS,
+                        cache_tag=file_id,
+                        caller="notes_map"
+                    )
+            except ValueError as e:
+                if "API key" in str(e):
+                    raise ValueError("OpenAI API key is not configured. Please set OPENAI_API_KEY in your .env file to generate notes.")
+                raise
+        summary = (summary or "").strip() or text
+        if not cache_bypass.get():
+            self._partials.set(key, summary)
+        return summary
+    
+    def forget(self, file_id: str):
+        """Drop cached partial summaries built from a deleted file"""
+        for key in self._file_partials.pop(file_id, ()):
+            self._partials.delete(key)
+    
+    def stats(self) -> Dict:
+        lookups = self.partial_hits + self.partial_misses
+        return {
+            "cached_partials": len(self._partials),
+            "partial_hits": self.partial_hits,
+            "partial_misses": self.partial_misses,
+            "partial_hit_rate": round(self.partial_hits / lookups, 3) if lookups else 0.0,
+        }
+    
+    async def generate_notes(self, file_id: str, style: str = "concise", context: Optional[str] = None) -> str:
+        """Generate short notes from resume content, from `context` instead of selected resume text if given"""
+        try:
+            system_prompt, user_prompt = await self._build_prompts(file_id, style, context)
             
+            # Generate notes using LLM
             try:
-                notes = await llm_client.generate_text(
-                    prompt=user_prompt,
-                    system_prompt=system_prompt,
-                    temperature=0.5,
-                    max_tokens=1500
-                )
+                with span("llm"):
+                    notes = await llm_client.generate_text(
+                        prompt=user_prompt,
+                        system_prompt=system_prompt,
+                        temperature=0.5,
+                        max_tokens=1500,
+                        cache_tag=file_id,
+                        caller="notes"
+                    )
             except ValueError as e:
                 # If OpenAI API key is not configured, provide helpful error
                 if "API key" in str(e):
@@ -49,11 +182,23 @@ Format the notes in a clear, bullet-point style."""
             if not notes or len(notes.strip()) < 10:
                 raise ValueError("Generated notes are too short or empty. Please try again.")
             
-            logger.info(f"Generated notes for file_id: {file_id}")
+            logger.info("Generated notes for file_id: %s", file_id)
             return notes
         except Exception as e:
-            logger.error(f"Error generating notes: {str(e)}")
+            logger.error("Error generating notes: %s", e)
             raise
+    
+    async def stream_notes(self, file_id: str, style: str = "concise") -> AsyncIterator[str]:
+        """Stream notes as they are generated; raises ValueError up front for unknown files"""
+        system_prompt, user_prompt = await self._build_prompts(file_id, style)
+        return llm_client.stream_text(
+            prompt=user_prompt,
+            system_prompt=system_prompt,
+            temperature=0.5,
+            max_tokens=1500,
+            cache_tag=file_id,
+            caller="notes"
+        )
 
 # Global instance
 notes_service = NotesService()
@@ -1,87 +1,88 @@
 import os
 from typing import Optional
 from app.core.config import settings
+from app.core.lazy import LazySingleton, optional_import
 from app.core.logger import get_logger
+from app.core.tracing import span
 
 logger = get_logger(__name__)
 
-# Try to import OCR dependencies (optional)
-try:
-    import pytesseract
-    TESSERACT_AVAILABLE = True
-except ImportError:
-    TESSERACT_AVAILABLE = False
-    logger.warning("pytesseract not available. OCR features will be limited.")
+# OCR and PDF dependencies are optional and heavy, so they are only imported
+# (and reported missing) the first time a document needs them
+def _pytesseract():
+    return optional_import("pytesseract", "pytesseract not available. OCR features will be limited.")
 
-try:
-    from PIL import Image
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
-    logger.warning("PIL/Pillow not available. Image processing will be limited.")
+def _pil_image():
+    return optional_import("PIL.Image", "PIL/Pillow not available. Image processing will be limited.")
 
-try:
-    import PyPDF2
-    PYPDF2_AVAILABLE = True
-except ImportError:
-    PYPDF2_AVAILABLE = False
-    logger.warning("PyPDF2 not available. PDF text extraction will be limited.")
+def _pypdf2():
+    return optional_import("PyPDF2", "PyPDF2 not available. PDF text extraction will be limited.")
 
-try:
-    import pdf2image
-    PDF2IMAGE_AVAILABLE = True
-except ImportError:
-    PDF2IMAGE_AVAILABLE = False
-    logger.warning("pdf2image not available. PDF OCR will be limited.")
+def _pdf2image():
+    return optional_import("pdf2image", "pdf2image not available. PDF OCR will be limited.")
 
 class DocumentParser:
     """Parse PDFs and images to extract text"""
     
     def __init__(self):
-        if TESSERACT_AVAILABLE and settings.TESSERACT_CMD:
-            try:
-                pytesseract.pytesseract.tesseract_cmd = settings.TESSERACT_CMD
-            except Exception as e:
-                logger.warning(f"Could not set Tesseract command: {str(e)}")
+        self._tesseract_configured = False
+    
+    def _tesseract(self):
+        """pytesseract pointed at the configured binary, or None if it is not installed"""
+        pytesseract = _pytesseract()
+        if pytesseract and not self._tesseract_configured:
+            self._tesseract_configured = True
+            if settings.TESSERACT_CMD:
+                try:
+                    pytesseract.pytesseract.tesseract_cmd = settings.TESSERACT_CMD
+                except Exception as e:
+                    logger.warning("Could not set Tesseract command: %s", e)
+        return pytesseract
     
     def parse_pdf(self, file_path: str) -> str:
         """Extract text from PDF file"""
         text = ""
+        PyPDF2 = _pypdf2()
         
         # Try PyPDF2 first (faster for text-based PDFs)
-        if PYPDF2_AVAILABLE:
+        if PyPDF2:
             try:
-                with open(file_path, 'rb') as file:
+                with span("pdf_text") as attrs, open(file_path, 'rb') as file:
                     pdf_reader = PyPDF2.PdfReader(file)
+                    attrs["pages"] = len(pdf_reader.pages)
                     for page in pdf_reader.pages:
                         page_text = page.extract_text()
                         if page_text:
                             text += page_text + "\n"
                 
                 if text.strip():
-                    logger.info(f"Extracted text from PDF using PyPDF2: {len(text)} characters")
+                    logger.info("Extracted text from PDF using PyPDF2: %s characters", len(text))
                     return text.strip()
             except Exception as e:
-                logger.warning(f"PyPDF2 extraction failed: {str(e)}")
+                logger.warning("PyPDF2 extraction failed: %s", e)
         
         # Fallback to OCR for scanned PDFs
-        if PDF2IMAGE_AVAILABLE and TESSERACT_AVAILABLE:
+        pdf2image = _pdf2image()
+        pytesseract = self._tesseract()
+        if pdf2image and pytesseract:
             try:
-                images = pdf2image.convert_from_path(file_path)
+                with span("pdf_rasterize"):
+                    images = pdf2image.convert_from_path(file_path)
                 ocr_text = ""
-                for image in images:
-                    ocr_text += pytesseract.image_to_string(image) + "\n"
+                with span("ocr", pages=len(images)):
+                    for image in images:
+                        ocr_text += pytesseract.image_to_string(image) + "\n"
                 
                 if ocr_text.strip():
-                    logger.info(f"Extracted text from PDF using OCR: {len(ocr_text)} characters")
+                    logger.info("Extracted text from PDF using OCR: %s characters", len(ocr_text))
                     return ocr_text.strip()
             except Exception as e:
-                logger.warning(f"OCR extraction failed: {str(e)}")
+                logger.warning("OCR extraction failed: %s", e)
         
         # If both methods failed
         if not text.strip():
             error_msg = "Could not extract text from PDF. "
-            if not PYPDF2_AVAILABLE and not TESSERACT_AVAILABLE:
+            if not PyPDF2 and not pytesseract:
                 error_msg += "PDF parsing dependencies are not installed."
             else:
                 error_msg += "The PDF might be corrupted or image-based. Please ensure Tesseract OCR is installed for scanned PDFs."
@@ -91,23 +92,26 @@ class DocumentParser:
     
     def parse_image(self, file_path: str) -> str:
         """Extract text from image using OCR"""
-        if not PIL_AVAILABLE:
+        Image = _pil_image()
+        if not Image:
             raise ValueError("PIL/Pillow is not installed. Cannot process images.")
         
-        if not TESSERACT_AVAILABLE:
+        pytesseract = self._tesseract()
+        if not pytesseract:
             raise ValueError("Tesseract OCR is not installed. Cannot extract text from images. Please install Tesseract OCR.")
         
         try:
             image = Image.open(file_path)
-            text = pytesseract.image_to_string(image)
-            logger.info(f"Extracted text from image: {len(text)} characters")
+            with span("ocr", pages=1):
+                text = pytesseract.image_to_string(image)
+            logger.info("Extracted text from image: %s characters", len(text))
             
             if not text.strip():
                 raise ValueError("No text could be extracted from the image. The image might not contain readable text.")
             
             return text.strip()
         except Exception as e:
-            logger.error(f"Error parsing image: {str(e)}")
+            logger.error("Error parsing image: %s", e)
             if "TesseractNotFoundError" in str(type(e).__name__):
                 raise ValueError("Tesseract OCR is not installed or not found. Please install Tesseract OCR to process images.")
             raise
@@ -127,5 +131,5 @@ class DocumentParser:
             raise ValueError(f"Unsupported file type: {file_type}")
 
 # Global instance
-parser = DocumentParser()
+parser: DocumentParser = LazySingleton(DocumentParser)
 
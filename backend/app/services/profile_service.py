@@ -0,0 +1,322 @@
+import asyncio
+import re
+from datetime import date
+from typing import Dict, List, Optional, Set, Tuple
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.core.request_context import Priority, use_priority
+from app.core.tracing import span
+from app.models.llm_client import llm_client
+from app.services.ats_scorer import ats_scorer
+from app.services.chunker import detect_section
+from app.services.vectorstore import vectorstore
+
+logger = get_logger(__name__)
+
+MONTHS = {
+    name: index
+    for index, names in enumerate((
+        ("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"), ("may",), ("jun", "june"),
+        ("jul", "july"), ("aug", "august"), ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"),
+        ("dec", "december"),
+    ), start=1)
+    for name in names
+}
+
+_MONTH = r"(?:%s)\.?" % "|".join(sorted(MONTHS, key=len, reverse=True))
+_DATE = rf"(?:{_MONTH}\s+\d{{4}}|\d{{1,2}}/\d{{4}}|\d{{4}})"
+DATE_RANGE = re.compile(
+    rf"(?P<start>{_DATE})\s*(?:-|–|—|to|until)\s*(?P<end>{_DATE}|present|current|now|today)",
+    re.IGNORECASE
+)
+
+TITLE_WORDS = re.compile(
+    r"\b(engineer|developer|manager|analyst|scientist|designer|consultant|intern|architect|director|specialist|"
+    r"administrator|lead|officer|coordinator|programmer|technician|researcher|head|vp|president|founder|"
+    r"co-founder|cto|ceo|associate|assistant|teacher|instructor|accountant|recruiter)s?\b",
+    re.IGNORECASE
+)
+DEGREE = re.compile(
+    r"\b(Ph\.?\s?D|Doctorate|Master(?:'s)?|M\.?Sc|M\.S\.|M\.?Tech|MBA|Bachelor(?:'s)?|B\.?Sc|B\.S\.|B\.?Tech|"
+    r"B\.E\.|B\.A\.|Associate(?:'s)? [Dd]egree|Diploma)\b"
+)
+INSTITUTION = re.compile(r"\b(University|College|Institute|School|Academy|Polytechnic)\b|\bIIT\b|\bMIT\b")
+YEAR = re.compile(r"\b(19[5-9]\d|20\d\d)\b")
+FIELD_SEPARATORS = re.compile(r"\s+(?:at|@)\s+|\s*[|,–—•·]\s*|\s+-\s+")
+CONNECTIVES = frozenset({"of", "and", "&", "for", "the", "in", "to", "/"})
+
+def _llm_year(value) -> Optional[int]:
+    """A year reported by the LLM (int, "2019" or "2019-2023"; the latest wins), or None"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        value = str(int(value))
+    years = YEAR.findall(value) if isinstance(value, str) else []
+    return int(max(years)) if years else None
+
+def _llm_text(value) -> Optional[str]:
+    """A string field reported by the LLM, or None for anything else"""
+    return value.strip() or None if isinstance(value, str) else None
+
+def _parse_date(text: str, is_end: bool) -> Optional[Tuple[int, int]]:
+    """(year, month) of a resume date; a bare year spans the whole year"""
+    text = text.strip().lower().rstrip(".")
+    if text in ("present", "current", "now", "today"):
+        today = date.today()
+        return today.year, today.month
+    if "/" in text:
+        month, year = text.split("/")
+        return int(year), min(12, max(1, int(month)))
+    parts = text.split()
+    if len(parts) == 2:
+        return int(parts[1]), MONTHS.get(parts[0].rstrip("."), 1)
+    return int(text), 12 if is_end else 1
+
+def _month_index(value: str) -> int:
+    """Months since year 0 of a YYYY-MM date (today for present)"""
+    if value == "present":
+        today = date.today()
+        return today.year * 12 + today.month - 1
+    year, month = value.split("-")
+    return int(year) * 12 + int(month) - 1
+
+def _format_date(value: Tuple[int, int]) -> str:
+    return f"{value[0]:04d}-{value[1]:02d}"
+
+def _is_title(part: str) -> bool:
+    """A short, capitalised phrase containing a job-title word"""
+    words = part.split()
+    if not words or len(words) > 7 or not TITLE_WORDS.search(part):
+        return False
+    return all(word[0].isupper() or not word[0].isalpha() or word.lower() in CONNECTIVES for word in words)
+
+def _is_name(part: str) -> bool:
+    words = part.split()
+    return 0 < len(words) <= 6 and part[0].isupper() and not YEAR.search(part)
+
+class ProfileService:
+    """Structured profile of a resume, extracted once at ingestion
+
+    Rule-based extractors (skills lexicon, date ranges, title and degree
+    patterns) run in a few milliseconds during upload. With PROFILE_LLM_ENABLED
+    one LLM pass per file fills in what the rules missed; its response goes
+    through the regular LLM cache.
+    """
+
+    def __init__(self):
+        # Keeps background enrichment tasks alive until they finish
+        self._tasks: Set[asyncio.Task] = set()
+
+    def extract(self, chunks: List[str]) -> Dict:
+        """Rule-based profile of a resume from its section chunks"""
+        sections: Dict[str, List[str]] = {}
+        for chunk in chunks:
+            sections.setdefault(detect_section(chunk), []).append(chunk)
+
+        skills: Dict[str, int] = {}
+        for chunk in chunks:
+            for _, _, skill in ats_scorer.lexicon.find(chunk.lower()):
+                skills[skill] = skills.get(skill, 0) + 1
+
+        # Without a recognisable experience header, anything but education may hold the jobs
+        job_chunks = sections.get("experience") or [
+            chunk for section, section_chunks in sections.items() if section != "education"
+            for chunk in section_chunks
+        ]
+        positions = self._positions(job_chunks)
+
+        return {
+            "skills": sorted(skills, key=lambda skill: (-skills[skill], skill)),
+            "titles": list(dict.fromkeys(p["title"] for p in positions if p["title"])),
+            "employers": list(dict.fromkeys(p["employer"] for p in positions if p["employer"])),
+            "positions": positions,
+            "total_years_experience": self._total_years(positions),
+            "education": self._education(sections.get("education", [])),
+            "sections": sorted(sections),
+            "source": "rules",
+        }
+
+    def _positions(self, chunks: List[str]) -> List[Dict]:
+        positions: List[Dict] = []
+        for chunk in chunks:
+            lines = [line.strip() for line in chunk.split("\n") if line.strip()]
+            for index, line in enumerate(lines):
+                if len(line) > 150:
+                    continue
+                dates = DATE_RANGE.search(line)
+                parts = [part.strip(" ()") for part in FIELD_SEPARATORS.split(DATE_RANGE.sub(" ", line))]
+                parts = [part for part in parts if part]
+                title = next((part for part in parts if _is_title(part)), None)
+                if title is None:
+                    continue
+                employer = next((part for part in parts if part != title and _is_name(part)), None)
+                if dates is None and index + 1 < len(lines):
+                    # Dates often sit on the line below the title
+                    dates = DATE_RANGE.search(lines[index + 1])
+                position = {"title": title, "employer": employer, "start": None, "end": None}
+                if dates:
+                    try:
+                        position["start"] = _format_date(_parse_date(dates.group("start"), is_end=False))
+                        end = dates.group("end")
+                        position["end"] = ("present" if end.lower() in ("present", "current", "now", "today")
+                                           else _format_date(_parse_date(end, is_end=True)))
+                    except ValueError:
+                        pass
+                positions.append(position)
+        return positions
+
+    def _total_years(self, positions: List[Dict]) -> float:
+        """Years covered by the union of position date ranges, so overlapping jobs count once"""
+        spans = []
+        for position in positions:
+            if not position["start"] or not position["end"]:
+                continue
+            start, end = _month_index(position["start"]), _month_index(position["end"])
+            if end >= start:
+                spans.append((start, end + 1))
+        months = 0
+        current_start = current_end = None
+        for start, end in sorted(spans):
+            if current_end is None or start > current_end:
+                if current_end is not None:
+                    months += current_end - current_start
+                current_start, current_end = start, end
+            else:
+                current_end = max(current_end, end)
+        if current_end is not None:
+            months += current_end - current_start
+        return round(months / 12, 1)
+
+    def _education(self, chunks: List[str]) -> List[Dict]:
+        entries: List[Dict] = []
+        for chunk in chunks:
+            lines = [line.strip() for line in chunk.split("\n") if line.strip()]
+            for index, line in enumerate(lines):
+                degree = DEGREE.search(line)
+                if not degree:
+                    continue
+                nearby = lines[max(0, index - 1):index + 2]
+                institution = next(
+                    (part.strip() for text in nearby for part in FIELD_SEPARATORS.split(text)
+                     if INSTITUTION.search(part)),
+                    None
+                )
+                years = [year for text in nearby for year in YEAR.findall(text)]
+                entries.append({
+                    "degree": FIELD_SEPARATORS.split(line[degree.start():])[0].strip(),
+                    "institution": institution,
+                    "year": int(max(years)) if years else None,
+                })
+        return entries
+
+    def build_profile(self, file_id: str, chunks: List[str]) -> Dict:
+        """Extract and store the rule-based profile of a newly ingested file"""
+        with span("profile"):
+            profile = self.extract(chunks)
+        vectorstore.set_profile(file_id, profile)
+        logger.info("Extracted profile for %s: %s skills, %s positions", file_id, len(profile["skills"]),
+                    len(profile["positions"]))
+        return profile
+
+    def get_profile(self, file_id: str) -> Dict:
+        """Stored profile, extracted on demand for files ingested before profiles existed"""
+        profile = vectorstore.get_profile(file_id)
+        if profile is not None:
+            return profile
+        documents = vectorstore.get_documents(file_id)
+        if not documents:
+            raise ValueError(f"No documents found for file_id: {file_id}")
+        return self.build_profile(file_id, [doc["text"] for doc in documents])
+
+    def prompt_context(self, file_id: str) -> str:
+        """Dense summary block to put ahead of resume text in LLM prompts ("" when nothing is known)"""
+        try:
+            profile = self.get_profile(file_id)
+        except ValueError:
+            return ""
+        lines = []
+        if profile["titles"]:
+            roles = ", ".join(profile["titles"][:5])
+            if profile["employers"]:
+                roles += f" (at {', '.join(profile['employers'][:5])})"
+            lines.append(f"Roles: {roles}")
+        if profile["total_years_experience"]:
+            lines.append(f"Experience: {profile['total_years_experience']} years")
+        if profile["skills"]:
+            lines.append(f"Skills: {', '.join(profile['skills'][:25])}")
+        if profile["education"]:
+            lines.append("Education: " + "; ".join(
+                ", ".join(str(value) for value in entry.values() if value) for entry in profile["education"][:3]
+            ))
+        return "Candidate profile:\n" + "\n".join(lines) + "\n\n" if lines else ""
+
+    def schedule_enrichment(self, file_id: str, text: str):
+        """Run the optional LLM pass in the background; the upload does not wait for it"""
+        if not settings.PROFILE_LLM_ENABLED:
+            return
+        with use_priority(Priority.BACKGROUND):
+            task = asyncio.create_task(self.enrich(file_id, text))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def enrich(self, file_id: str, text: str) -> Optional[Dict]:
+        """Merge one LLM extraction into the stored profile; rule-based values win where both exist"""
+        profile = vectorstore.get_profile(file_id)
+        if profile is None:
+            return None
+        system_prompt = "You extract structured data from resumes. Only report what the resume states."
+        user_prompt = f"""Extract the candidate profile from this resume.
+
+RESUME:
+{text[:6000]}
+
+Provide a JSON response with:
+- "skills": array of strings
+- "titles": array of strings (job titles, most recent first)
+- "employers": array of strings
+- "total_years_experience": number
+- "education": array of objects with "degree", "institution" and "year\""""
+        try:
+            with span("llm"):
+                extracted = await llm_client.generate_structured_output(
+                    prompt=user_prompt,
+                    system_prompt=system_prompt,
+                    cache_tag=file_id,
+                    caller="profile"
+                )
+        except Exception as e:
+            logger.warning("Profile enrichment failed for %s: %s", file_id, e)
+            return None
+
+        # The file may have been deleted or replaced while the call was in flight
+        if vectorstore.get_profile(file_id) is not profile:
+            return None
+        merged = dict(profile)
+        for field in ("skills", "titles", "employers"):
+            values = extracted.get(field) or []
+            if isinstance(values, list):
+                normalized = [ats_scorer.lexicon.canonical.get(str(v).strip().lower(), str(v).strip().lower())
+                              if field == "skills" else str(v).strip() for v in values]
+                merged[field] = list(dict.fromkeys(profile[field] + [v for v in normalized if v]))
+        if not profile["total_years_experience"]:
+            try:
+                merged["total_years_experience"] = round(float(extracted.get("total_years_experience") or 0), 1)
+            except (TypeError, ValueError):
+                pass
+        if not profile["education"] and isinstance(extracted.get("education"), list):
+            # The model may answer "2019-2023" or a list; CandidateProfile only accepts a year or null
+            merged["education"] = [
+                {
+                    "degree": _llm_text(entry.get("degree")),
+                    "institution": _llm_text(entry.get("institution")),
+                    "year": _llm_year(entry.get("year")),
+                }
+                for entry in extracted["education"] if isinstance(entry, dict)
+            ]
+        merged["source"] = "rules+llm"
+        vectorstore.set_profile(file_id, merged)
+        logger.info("Enriched profile for %s with the LLM", file_id)
+        return merged
+
+# Global instance
+profile_service = ProfileService()
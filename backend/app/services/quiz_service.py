@@ -1,23 +1,61 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Sequence
 from app.models.llm_client import llm_client
-from app.services.vectorstore import vectorstore
+from app.services.context_builder import context_builder
+from app.services.profile_service import profile_service
+from app.services.generation import generate_sharded, variation_instructions
 from app.core.logger import get_logger
+from app.core.tracing import span
 
 logger = get_logger(__name__)
 
+# Rough completion size of one question with four options and an explanation
+TOKENS_PER_QUESTION = 120
+
 class QuizService:
     """Service for generating quizzes from resume"""
     
-    async def generate_quiz(self, file_id: str, count: int = 5, difficulty: str = "medium") -> List[dict]:
-        """Generate quiz questions from resume content"""
+    async def generate_quiz(
+        self,
+        file_id: str,
+        count: int = 5,
+        difficulty: str = "medium",
+        focus: Optional[str] = None,
+        avoid: Sequence[str] = (),
+        context: Optional[str] = None
+    ) -> List[dict]:
+        """Generate quiz questions from resume content
+
+        Large counts are split into concurrent calls on different sections
+        (see generate_sharded). `focus` narrows the questions to one area of
+        the resume and `avoid` lists existing questions not to repeat, so
+        repeated calls for the same file produce new material. `context`
+        replaces the resume text the quiz would otherwise select for itself.
+        """
+        questions = await generate_sharded(
+            file_id,
+            count,
+            lambda size, shard_focus, shard_avoid: self._generate_batch(
+                file_id, size, difficulty, focus or shard_focus, [*avoid, *shard_avoid], context
+            ),
+            "quiz questions"
+        )
+        logger.info("Generated %s quiz questions for file_id: %s", len(questions), file_id)
+        return questions
+    
+    async def _generate_batch(
+        self,
+        file_id: str,
+        count: int,
+        difficulty: str,
+        focus: Optional[str],
+        avoid: Sequence[str],
+        context: Optional[str] = None
+    ) -> List[dict]:
+        """One LLM call for up to `count` validated questions"""
         try:
-            # Get documents from vector store
-            documents = vectorstore.get_documents(file_id)
-            if not documents:
-                raise ValueError(f"No documents found for file_id: {file_id}")
-            
-            # Combine all text
-            full_text = "\n\n".join([doc["text"] for doc in documents])
+            if context is None:
+                # Most relevant resume text within the token budget (raises ValueError for unknown files)
+                context = await context_builder.build(file_id, "quiz")
             
             # Generate quiz using LLM
             system_prompt = """You are an expert at creating educational quiz questions. Generate multiple-choice questions (MCQs) based on resume content.
@@ -30,9 +68,9 @@ Each question should have:
 Make questions that test understanding of skills, technologies, and experiences mentioned in the resume."""
             
             user_prompt = f"""Generate exactly {count} multiple-choice questions from the following resume content with {difficulty} difficulty level.
-
-Resume content:
-{full_text[:4000]}
+{variation_instructions(focus, avoid, "questions")}
+{profile_service.prompt_context(file_id)}Resume content:
+{context}
 
 Return a JSON array with objects containing:
 - "question": string
@@ -52,10 +90,15 @@ Return format:
 ]"""
             
             try:
-                response = await llm_client.generate_structured_output(
-                    prompt=user_prompt,
-                    system_prompt=system_prompt
-                )
+                with span("llm"):
+                    response = await llm_client.generate_structured_output(
+                        prompt=user_prompt,
+                        system_prompt=system_prompt,
+                        # Asking again must give new items, so these are never served from the cache
+                        use_cache=False,
+                        caller="quiz",
+                        expected_output_tokens=count * TOKENS_PER_QUESTION
+                    )
             except ValueError as e:
                 # If OpenAI API key is not configured, provide helpful error
                 if "API key" in str(e):
@@ -82,7 +125,9 @@ Return format:
                     try:
                         questions = json.loads(response)
                     except:
-                        logger.warning(f"Could not parse response as JSON: {response[:100]}")
+                        # Resume-derived content: keep it out of logs unless debugging
+                        logger.warning("Could not parse response as JSON (%d chars)", len(response))
+                        logger.debug("Unparseable response: %.100s", response)
             
             # Validate and format questions
             formatted_questions = []
@@ -112,10 +157,9 @@ Return format:
             if not formatted_questions:
                 raise ValueError("No valid quiz questions were generated. Please try again or check your OpenAI API configuration.")
             
-            logger.info(f"Generated {len(formatted_questions)} quiz questions for file_id: {file_id}")
             return formatted_questions
         except Exception as e:
-            logger.error(f"Error generating quiz: {str(e)}")
+            logger.error("Error generating quiz: %s", e)
             raise
     
     def evaluate_answer(self, user_answer: str, correct_answer: str) -> Dict:
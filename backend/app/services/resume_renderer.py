@@ -0,0 +1,72 @@
+from typing import Dict, List, Optional
+
+# Plain-text layouts; only characters every ATS parses (no tables, columns or icons)
+TEMPLATE_STYLES: Dict[str, Dict[str, str]] = {
+    "modern": {"name": "upper", "heading": "upper", "rule": "=", "bullet": "•", "separator": " | "},
+    "classic": {"name": "title", "heading": "title", "rule": "-", "bullet": "-", "separator": ", "},
+    "minimal": {"name": "keep", "heading": "keep", "rule": "", "bullet": "-", "separator": " · "},
+}
+
+TEMPLATES = tuple(TEMPLATE_STYLES)
+
+def _case(text: str, mode: str) -> str:
+    if mode == "upper":
+        return text.upper()
+    if mode == "title":
+        return text.title()
+    return text
+
+class ResumeRenderer:
+    """Lay out resume sections as text for a template, without an LLM
+
+    Sections are rendered independently so a generated resume can be
+    streamed block by block, in layout order, as its sections complete.
+    """
+
+    def _style(self, template: str) -> Dict[str, str]:
+        return TEMPLATE_STYLES.get(template, TEMPLATE_STYLES["modern"])
+
+    def header(self, template: str, name: Optional[str], contact: Optional[str]) -> str:
+        style = self._style(template)
+        lines = [_case(name.strip(), style["name"])] if name and name.strip() else []
+        if contact and contact.strip():
+            lines.append(contact.strip())
+        return "\n".join(lines)
+
+    def section(self, template: str, title: str, lines: List[str]) -> str:
+        """A titled section; empty sections render as nothing"""
+        lines = [line for line in lines if line is not None]
+        if not any(line.strip() for line in lines):
+            return ""
+        style = self._style(template)
+        heading = [_case(title, style["heading"])]
+        if style["rule"]:
+            heading.append(style["rule"] * len(title))
+        return "\n".join(heading + lines)
+
+    def bullets(self, template: str, items: List[str]) -> List[str]:
+        bullet = self._style(template)["bullet"]
+        return [f"{bullet} {item}" for item in items if item]
+
+    def role(self, template: str, experience: Dict) -> str:
+        """Title, company and dates of one experience entry on a single line"""
+        parts = [str(experience.get(key) or "").strip() for key in ("title", "company", "duration")]
+        return self._style(template)["separator"].join(part for part in parts if part)
+
+    def education(self, template: str, education: List[Dict]) -> List[str]:
+        lines = []
+        for entry in education:
+            line = self.role(template, {
+                "title": entry.get("degree"),
+                "company": entry.get("institution"),
+                "duration": entry.get("year"),
+            })
+            if line:
+                lines.append(line)
+        return lines
+
+    def join(self, blocks: List[str]) -> str:
+        return "\n\n".join(block for block in blocks if block) + "\n"
+
+# Global instance
+resume_renderer = ResumeRenderer()
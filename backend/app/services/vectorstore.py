@@ -1,18 +1,62 @@
 import os
 import json
-from typing import List, Dict, Optional
+import asyncio
+from typing import Iterable, List, Dict, Optional, Tuple
 from app.core.config import settings
+from app.core.lazy import LazySingleton, optional_import
 from app.core.logger import get_logger
+from app.core.tracing import span
+from app.models.llm_client import llm_client
 from app.services.embeddings import embedding_service
 
 logger = get_logger(__name__)
 
+class EmbeddingIndex:
+    """All chunk embeddings of one embedding model stacked into a matrix, rows grouped by file"""
+
+    def __init__(self, rows: List[Tuple[str, List[float]]]):
+        self.file_ids: List[str] = []
+        self.offsets: List[int] = []  # first row of each file
+        for row, (file_id, _) in enumerate(rows):
+            if not self.file_ids or self.file_ids[-1] != file_id:
+                self.file_ids.append(file_id)
+                self.offsets.append(row)
+        self._np = optional_import("numpy")
+        if self._np is not None:
+            matrix = self._np.asarray([embedding for _, embedding in rows], dtype=self._np.float32)
+            norms = self._np.linalg.norm(matrix, axis=1, keepdims=True)
+            self.matrix = self._np.divide(matrix, norms, out=self._np.zeros_like(matrix), where=norms > 0)
+        else:
+            self.matrix = [embedding for _, embedding in rows]
+
+    def best_per_file(self, query: List[float]) -> Dict[str, float]:
+        """Highest cosine similarity of any chunk of each file to the query"""
+        if self._np is None:
+            similarities = [VectorStore._cosine_similarity(query, row) for row in self.matrix]
+            bounds = self.offsets + [len(similarities)]
+            return {
+                file_id: max(similarities[bounds[i]:bounds[i + 1]])
+                for i, file_id in enumerate(self.file_ids)
+            }
+        np = self._np
+        vector = np.asarray(query, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if not norm or vector.shape[0] != self.matrix.shape[1]:
+            return {}
+        similarities = self.matrix @ (vector / norm)
+        return dict(zip(self.file_ids, np.maximum.reduceat(similarities, self.offsets).tolist()))
+
 class VectorStore:
     """In-memory vector store with simple similarity search"""
     
     def __init__(self):
         self.store_path = settings.VECTOR_STORE_PATH
         self.documents: Dict[str, List[Dict]] = {}  # file_id -> [{"text": str, "embedding": List[float], "metadata": dict}]
+        self.profiles: Dict[str, Dict] = {}  # file_id -> structured profile extracted at ingestion
+        # Bumped on every change; the stacked embedding indexes are rebuilt lazily when it moves
+        self._version = 0
+        self._indexes: Dict[str, EmbeddingIndex] = {}
+        self._indexes_version = -1
         self._ensure_store_dir()
     
     def _ensure_store_dir(self):
@@ -28,16 +72,18 @@ class VectorStore:
         """Add documents to vector store"""
         try:
             if not texts:
-                logger.warning(f"No texts provided for file_id: {file_id}")
+                logger.warning("No texts provided for file_id: %s", file_id)
                 return
             
             # Try to generate embeddings, but don't fail if it doesn't work
             embeddings = []
+            embedding_model = ""
             try:
-                embeddings = await embedding_service.generate_embeddings(texts)
-                logger.info(f"Generated {len(embeddings)} embeddings")
+                with span("embed", texts=len(texts)):
+                    embeddings, embedding_model = await embedding_service.embed_documents(texts)
+                logger.info("Generated %s embeddings with %s", len(embeddings), embedding_model)
             except Exception as e:
-                logger.warning(f"Failed to generate embeddings: {str(e)}. Storing documents without embeddings.")
+                logger.warning("Failed to generate embeddings: %s. Storing documents without embeddings.", e)
                 # Create empty embeddings as fallback
                 embeddings = [[] for _ in texts]
             
@@ -48,14 +94,18 @@ class VectorStore:
                 doc = {
                     "text": text,
                     "embedding": embedding,
+                    "embedding_model": embedding_model if embedding else "",
                     "metadata": metadata[i] if metadata and i < len(metadata) else {}
                 }
                 documents.append(doc)
             
             self.documents[file_id] = documents
-            logger.info(f"Added {len(documents)} documents to vector store for file_id: {file_id}")
+            self._version += 1
+            with span("invalidate_cache"):
+                await asyncio.to_thread(llm_client.invalidate_cache, file_id)
+            logger.info("Added %s documents to vector store for file_id: %s", len(documents), file_id)
         except Exception as e:
-            logger.error(f"Error adding documents: {str(e)}")
+            logger.error("Error adding documents: %s", e)
             # Even if embeddings fail, store the text so services can still work
             try:
                 documents = []
@@ -63,16 +113,19 @@ class VectorStore:
                     doc = {
                         "text": text,
                         "embedding": [],
+                        "embedding_model": "",
                         "metadata": metadata[i] if metadata and i < len(metadata) else {}
                     }
                     documents.append(doc)
                 self.documents[file_id] = documents
-                logger.info(f"Stored {len(documents)} documents without embeddings for file_id: {file_id}")
+                self._version += 1
+                logger.info("Stored %s documents without embeddings for file_id: %s", len(documents), file_id)
             except Exception as e2:
-                logger.error(f"Failed to store documents even without embeddings: {str(e2)}")
+                logger.error("Failed to store documents even without embeddings: %s", e2)
                 raise
     
-    def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
+    @staticmethod
+    def _cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
         """Calculate cosine similarity between two vectors"""
         import math
         dot_product = sum(a * b for a, b in zip(vec1, vec2))
@@ -92,9 +145,6 @@ class VectorStore:
     ) -> List[Dict]:
         """Search for similar documents"""
         try:
-            # Generate query embedding
-            query_embedding = (await embedding_service.generate_embeddings([query]))[0]
-            
             # Search in specific file or all files
             search_space = []
             if file_id and file_id in self.documents:
@@ -103,34 +153,118 @@ class VectorStore:
                 for fid, docs in self.documents.items():
                     search_space.extend([(fid, doc) for doc in docs])
             
+            # Embed the query once per embedding space present in the search space
+            query_embeddings: Dict[str, List[float]] = {}
+            with span("embed_query"):
+                for model in {doc.get("embedding_model") for _, doc in search_space if doc["embedding"]}:
+                    try:
+                        backend = embedding_service.backend_for_model(model)
+                        query_embeddings[model] = (await embedding_service.generate_embeddings([query], backend=backend))[0]
+                    except Exception as e:
+                        logger.warning("Could not embed query with %s: %s", model, e)
+            
             # Calculate similarities
             results = []
-            for fid, doc in search_space:
-                similarity = self._cosine_similarity(query_embedding, doc["embedding"])
-                results.append({
-                    "file_id": fid,
-                    "text": doc["text"],
-                    "similarity": similarity,
-                    "metadata": doc.get("metadata", {})
-                })
+            with span("score", documents=len(search_space)):
+                for fid, doc in search_space:
+                    query_embedding = query_embeddings.get(doc.get("embedding_model"))
+                    similarity = self._cosine_similarity(query_embedding, doc["embedding"]) if query_embedding else 0.0
+                    results.append({
+                        "file_id": fid,
+                        "text": doc["text"],
+                        "similarity": similarity,
+                        "metadata": doc.get("metadata", {})
+                    })
             
             # Sort by similarity and return top_k
             results.sort(key=lambda x: x["similarity"], reverse=True)
             return results[:top_k]
         except Exception as e:
-            logger.error(f"Error in similarity search: {str(e)}")
+            logger.error("Error in similarity search: %s", e)
             raise
     
+    def _embedding_indexes(self) -> Dict[str, EmbeddingIndex]:
+        """One stacked index per embedding model, cached until the store changes"""
+        if self._indexes_version != self._version:
+            rows: Dict[str, List[Tuple[str, List[float]]]] = {}
+            for fid, docs in self.documents.items():
+                for doc in docs:
+                    if doc["embedding"]:
+                        rows.setdefault(doc.get("embedding_model", ""), []).append((fid, doc["embedding"]))
+            self._indexes = {model: EmbeddingIndex(model_rows) for model, model_rows in rows.items()}
+            self._indexes_version = self._version
+        return self._indexes
+    
+    async def file_similarities(self, query: str, file_ids: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """Best chunk similarity of every file to the query
+        
+        The query is embedded once per embedding model and scored against all
+        chunks in a single matrix product, so the cost barely grows with the
+        number of files. Files without embeddings get 0.0.
+        """
+        wanted = list(file_ids) if file_ids is not None else list(self.documents)
+        similarities = {fid: 0.0 for fid in wanted}
+        try:
+            # Stacking fails when a model's stored embeddings differ in dimension
+            indexes = self._embedding_indexes()
+        except ValueError as e:
+            logger.warning("Could not build embedding indexes: %s", e)
+            return similarities
+        for model, index in indexes.items():
+            try:
+                with span("embed_query"):
+                    backend = embedding_service.backend_for_model(model)
+                    query_embedding = (await embedding_service.generate_embeddings([query], backend=backend))[0]
+            except Exception as e:
+                logger.warning("Could not embed query with %s: %s", model, e)
+                continue
+            with span("score", files=len(index.file_ids)):
+                for fid, similarity in index.best_per_file(query_embedding).items():
+                    if fid in similarities:
+                        similarities[fid] = max(similarities[fid], similarity)
+        return similarities
+    
+    async def document_similarities(self, query: str, file_id: str) -> List[float]:
+        """Similarity of each of a file's documents to the query, in document order (0.0 without embeddings)"""
+        documents = self.documents.get(file_id, [])
+        query_embeddings: Dict[str, List[float]] = {}
+        for model in {doc.get("embedding_model") for doc in documents if doc["embedding"]}:
+            try:
+                backend = embedding_service.backend_for_model(model)
+                query_embeddings[model] = (await embedding_service.generate_embeddings([query], backend=backend))[0]
+            except Exception as e:
+                logger.warning("Could not embed query with %s: %s", model, e)
+        similarities = []
+        for doc in documents:
+            query_embedding = query_embeddings.get(doc.get("embedding_model"))
+            similarities.append(self._cosine_similarity(query_embedding, doc["embedding"]) if query_embedding else 0.0)
+        return similarities
+    
     def get_documents(self, file_id: str) -> List[Dict]:
         """Get all documents for a file_id"""
         return self.documents.get(file_id, [])
     
-    def delete_documents(self, file_id: str):
-        """Delete documents for a file_id"""
+    def get_profile(self, file_id: str) -> Optional[Dict]:
+        """Structured profile stored for a file_id, if one was extracted"""
+        return self.profiles.get(file_id)
+    
+    def set_profile(self, file_id: str, profile: Dict):
+        self.profiles[file_id] = profile
+    
+    async def delete_documents(self, file_id: str):
+        """Delete documents for a file_id
+
+        The in-memory entries are removed on the event loop, which also iterates
+        them; only the cache purge (SQLite) runs in a worker thread.
+        """
         if file_id in self.documents:
             del self.documents[file_id]
-            logger.info(f"Deleted documents for file_id: {file_id}")
+            self._version += 1
+            self.profiles.pop(file_id, None)
+            with span("invalidate_cache"):
+                await asyncio.to_thread(llm_client.invalidate_cache, file_id)
+            logger.info("Deleted documents for file_id: %s", file_id)
 
 # Global instance
-vectorstore = VectorStore()
+vectorstore: VectorStore = LazySingleton(VectorStore)
 
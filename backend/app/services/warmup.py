@@ -0,0 +1,177 @@
+import asyncio
+from collections import Counter
+from typing import Any, Dict, Optional, Set, Tuple
+from app.core import metrics
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.core.request_context import Priority, cache_bypass, cache_refresh, use_priority
+from app.core.tracing import span
+from app.services.flashcard_service import flashcard_service
+from app.services.notes_service import notes_service
+from app.services.quiz_service import quiz_service
+from app.services.vectorstore import vectorstore
+
+logger = get_logger(__name__)
+
+# The parameters each page requests by default; only these are generated ahead of time
+DEFAULT_PARAMS: Dict[str, Dict[str, Any]] = {
+    "notes": {"style": "concise"},
+    "flashcards": {"count": 10},
+    "quiz": {"count": 5, "difficulty": "medium"},
+}
+
+class WarmupService:
+    """Speculatively generate the default artifacts of a file right after upload
+
+    Generation runs at WARMUP priority (behind interactive and ingestion
+    traffic) with at most WARMUP_MAX_CONCURRENCY generations in flight. The
+    first request for a warmed artifact is answered from memory and the
+    result is dropped, so later requests generate fresh material as usual; a
+    request that arrives while its artifact is being generated waits for it
+    instead of starting a second call, and one that arrives while it is still
+    queued takes over and cancels the queued job. Deleting a file cancels its
+    jobs.
+    """
+
+    def __init__(self):
+        self.enabled = settings.WARMUP_ENABLED
+        self.artifacts = [
+            name for name in (part.strip() for part in settings.WARMUP_ARTIFACTS.split(",")) if name in DEFAULT_PARAMS
+        ]
+        self._semaphore = asyncio.Semaphore(max(1, settings.WARMUP_MAX_CONCURRENCY))
+        self._results = LRUCache(max_entries=settings.WARMUP_CACHE_ITEMS)
+        self._tasks: Dict[str, Dict[str, asyncio.Task]] = {}  # file_id -> artifact -> job
+        self._running: Set[Tuple[str, str]] = set()
+        self._served: Set[Tuple[str, str]] = set()
+        self._events: Counter = Counter()
+
+    def _record(self, artifact: str, event: str):
+        self._events[event] += 1
+        metrics.ARTIFACT_WARMUP.inc(artifact=artifact, event=event)
+
+    def _served_from_warmup(self, file_id: str, artifact: str, event: str):
+        key = (file_id, artifact)
+        if key not in self._served:
+            self._served.add(key)
+            self._events["used"] += 1
+        self._record(artifact, event)
+
+    def schedule(self, file_id: str):
+        """Queue warm generation of the configured artifacts for a newly ingested file"""
+        if not self.enabled or not self.artifacts:
+            return
+        jobs = self._tasks.setdefault(file_id, {})
+        with use_priority(Priority.WARMUP):
+            for artifact in self.artifacts:
+                if artifact not in jobs:
+                    jobs[artifact] = asyncio.create_task(self._warm(file_id, artifact))
+        logger.info("Scheduled warmup of %s for %s", ", ".join(self.artifacts), file_id)
+
+    async def _warm(self, file_id: str, artifact: str):
+        key = (file_id, artifact)
+        # Keep warm results out of the LLM response cache; otherwise the next request
+        # with the default prompt would get a consumed artifact again from the cache.
+        # The task runs in its own copy of the context, so this stays local to it
+        cache_bypass.set(True)
+        try:
+            async with self._semaphore:
+                self._running.add(key)
+                with span("warmup", artifact=artifact):
+                    result = await self._generate(file_id, artifact)
+            # The file may have been deleted while the call was in flight
+            if vectorstore.get_documents(file_id):
+                self._results.set(f"{file_id}:{artifact}", result)
+                self._record(artifact, "generated")
+            return result
+        except asyncio.CancelledError:
+            self._record(artifact, "cancelled")
+            raise
+        except Exception as e:
+            self._record(artifact, "failed")
+            logger.warning("Warmup of %s for %s failed: %s", artifact, file_id, e)
+            return None
+        finally:
+            self._running.discard(key)
+            jobs = self._tasks.get(file_id)
+            if jobs is not None:
+                jobs.pop(artifact, None)
+                if not jobs:
+                    self._tasks.pop(file_id, None)
+
+    async def _generate(self, file_id: str, artifact: str) -> Any:
+        params = DEFAULT_PARAMS[artifact]
+        if artifact == "notes":
+            return await notes_service.generate_notes(file_id=file_id, **params)
+        if artifact == "flashcards":
+            return await flashcard_service.generate_flashcards(file_id=file_id, **params)
+        return await quiz_service.generate_quiz(file_id=file_id, **params)
+
+    async def lookup(self, file_id: str, artifact: str, **params) -> Optional[Any]:
+        """Warmed result for a request, or None when the caller should generate it itself"""
+        if not self.enabled or params != DEFAULT_PARAMS[artifact]:
+            return None
+        # Cache-Control: no-cache / no-store ask for a fresh generation
+        if cache_bypass.get() or cache_refresh.get():
+            return None
+
+        key = (file_id, artifact)
+        result = self._results.get(f"{file_id}:{artifact}")
+        if result is not None:
+            # Served once: a repeated request (e.g. "regenerate") must get new material
+            self._results.delete(f"{file_id}:{artifact}")
+            self._served_from_warmup(file_id, artifact, "hit")
+            return result
+
+        task = self._tasks.get(file_id, {}).get(artifact)
+        if task is not None and not task.done():
+            if key in self._running:
+                # Shielded: a client disconnect must not cancel the shared job
+                try:
+                    result = await asyncio.shield(task)
+                except asyncio.CancelledError:
+                    if not task.cancelled():
+                        raise
+                    result = None  # the file was deleted meanwhile
+                if result is not None:
+                    self._results.delete(f"{file_id}:{artifact}")
+                    self._served_from_warmup(file_id, artifact, "joined")
+                    return result
+            else:
+                # Still queued behind other warm jobs; an interactive call is faster
+                task.cancel()
+                self._record(artifact, "preempted")
+                return None
+
+        self._record(artifact, "miss")
+        return None
+
+    def cancel(self, file_id: str):
+        """Stop pending work for a file and drop its warmed artifacts"""
+        for task in self._tasks.pop(file_id, {}).values():
+            task.cancel()
+        for artifact in DEFAULT_PARAMS:
+            key = f"{file_id}:{artifact}"
+            if self._results.get(key) is not None and (file_id, artifact) not in self._served:
+                self._record(artifact, "unused")
+            self._results.delete(key)
+            self._served.discard((file_id, artifact))
+
+    def stats(self) -> Dict:
+        generated = self._events["generated"]
+        served = self._events["hit"] + self._events["joined"]
+        lookups = served + self._events["miss"] + self._events["preempted"]
+        return {
+            "enabled": self.enabled,
+            "artifacts": self.artifacts,
+            "pending": sum(len(jobs) for jobs in self._tasks.values()),
+            "running": len(self._running),
+            **{event: self._events[event] for event in
+               ("generated", "failed", "cancelled", "hit", "joined", "preempted", "miss", "unused")},
+            # Share of lookups answered by warmup, and share of warm generations that were used
+            "hit_rate": round(served / lookups, 3) if lookups else 0.0,
+            "use_rate": round(self._events["used"] / generated, 3) if generated else 0.0,
+        }
+
+# Global instance
+warmup_service = WarmupService()
@@ -0,0 +1,68 @@
+"""Compare local and remote embedding backends.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_embeddings --chunks 200
+    python -m benchmarks.bench_embeddings --chunks 50 --remote   # needs OPENAI_API_KEY
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import List
+
+from app.services.embeddings import embedding_service
+
+SKILLS = [
+    "Python", "FastAPI", "PostgreSQL", "Kubernetes", "Docker", "React", "TypeScript", "AWS", "Terraform",
+    "machine learning", "data pipelines", "Kafka", "Redis", "GraphQL", "CI/CD", "Spark", "Airflow"
+]
+VERBS = ["Built", "Led", "Designed", "Migrated", "Optimized", "Automated", "Scaled", "Launched"]
+
+def make_chunks(count: int, seed: int = 7) -> List[str]:
+    """Synthetic resume-like chunks of roughly CHUNK_SIZE characters"""
+    rng = random.Random(seed)
+    chunks = []
+    for _ in range(count):
+        lines = []
+        while sum(len(line) for line in lines) < 900:
+            lines.append(
+                f"- {rng.choice(VERBS)} {rng.choice(SKILLS)} services with {rng.choice(SKILLS)} and "
+                f"{rng.choice(SKILLS)}, improving throughput by {rng.randint(10, 90)}%"
+            )
+        chunks.append("EXPERIENCE\n" + "\n".join(lines))
+    return chunks
+
+async def run_backend(name: str, chunks: List[str], repeats: int):
+    backend = embedding_service.get_backend(name)
+    # Warm up (projection matrix, HTTP connection)
+    await backend.embed(chunks[:1])
+
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        await backend.embed(chunks)
+        timings.append(time.perf_counter() - started)
+
+    best = min(timings)
+    print(
+        f"{name:>8} | {backend.model:<28} | batch {len(chunks):>4} | "
+        f"best {best * 1000:8.1f} ms | median {statistics.median(timings) * 1000:8.1f} ms | "
+        f"{best / len(chunks) * 1000:7.3f} ms/chunk"
+    )
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--remote", action="store_true", help="also benchmark the OpenAI backend")
+    args = parser.parse_args()
+
+    chunks = make_chunks(args.chunks)
+    await run_backend("local", chunks, args.repeats)
+    if args.remote:
+        await run_backend("openai", chunks, args.repeats)
+
+if __name__ == "__main__":
+    asyncio.run(main())
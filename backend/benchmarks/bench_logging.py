@@ -0,0 +1,94 @@
+"""Per-call overhead of logging on the request path.
+
+Compares the old setup (a StreamHandler writing synchronously, f-string
+messages) with the queue-based pipeline from app.core.logger (%-style
+messages, formatting and I/O on the listener thread). `--sink-latency-us`
+simulates a slow or back-pressured stdout, which is where synchronous
+handlers hurt the event loop. Run from the backend directory:
+
+    python -m benchmarks.bench_logging --calls 20000 --sink-latency-us 50
+"""
+import argparse
+import io
+import logging
+import queue
+import time
+from logging.handlers import QueueListener
+
+from app.core.logger import JsonFormatter, NonBlockingQueueHandler, RateLimitFilter, RequestIdFilter, TextFormatter
+
+class SlowSink(io.TextIOBase):
+    """Discards output after blocking for a fixed time per write, like a congested pipe"""
+
+    def __init__(self, latency_us: float):
+        self.latency = latency_us / 1_000_000
+
+    def write(self, text: str) -> int:
+        if self.latency:
+            # Sleeping releases the GIL, as real blocking I/O does
+            time.sleep(self.latency)
+        return len(text)
+
+def isolated_logger(name: str, handler: logging.Handler, level: int = logging.INFO) -> logging.Logger:
+    logger = logging.getLogger(f"bench.{name}")
+    logger.handlers = [handler]
+    logger.setLevel(level)
+    logger.propagate = False
+    return logger
+
+def per_call_us(log_call, calls: int) -> float:
+    started = time.perf_counter()
+    for i in range(calls):
+        log_call(i)
+    return (time.perf_counter() - started) / calls * 1_000_000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--sink-latency-us", type=float, default=20.0, help="simulated cost of one write")
+    args = parser.parse_args()
+
+    sink = SlowSink(args.sink_latency_us)
+    chunks = list(range(12))
+    results = []
+
+    # Old setup: synchronous handler, eager f-string
+    stream = logging.StreamHandler(sink)
+    stream.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+    sync_logger = isolated_logger("sync", stream)
+    results.append(("sync handler, f-string", per_call_us(
+        lambda i: sync_logger.info(f"Chunked text into {len(chunks)} chunks for request {i}"), args.calls)))
+
+    # New pipeline: caller only filters, interpolates and enqueues
+    for label, formatter, limit in (
+        ("queue handler, %-style, json", JsonFormatter(), 0),
+        ("queue handler, %-style, text", TextFormatter(), 0),
+        ("queue handler, sampled (50/min)", JsonFormatter(), 50),
+    ):
+        log_queue: queue.Queue = queue.Queue(maxsize=args.calls + 1)
+        handler = NonBlockingQueueHandler(log_queue)
+        handler.addFilter(RateLimitFilter(limit))
+        handler.addFilter(RequestIdFilter())
+        output = logging.StreamHandler(sink)
+        output.setFormatter(formatter)
+        listener = QueueListener(log_queue, output)
+        listener.start()
+        queued_logger = isolated_logger(label.replace(" ", "_"), handler)
+        results.append((label, per_call_us(
+            lambda i: queued_logger.info("Chunked text into %d chunks for request %d", len(chunks), i), args.calls)))
+        listener.stop()
+
+    # Disabled level: f-strings still pay for formatting, %-style does not
+    disabled = isolated_logger("disabled", logging.NullHandler(), level=logging.INFO)
+    results.append(("debug disabled, f-string", per_call_us(
+        lambda i: disabled.debug(f"Chunked text into {len(chunks)} chunks for request {i}"), args.calls)))
+    results.append(("debug disabled, %-style", per_call_us(
+        lambda i: disabled.debug("Chunked text into %d chunks for request %d", len(chunks), i), args.calls)))
+
+    print(f"{args.calls} calls, simulated sink latency {args.sink_latency_us:.0f} us/write\n")
+    print(f"{'setup':<34}{'us/call (caller)':>18}")
+    for label, value in results:
+        print(f"{label:<34}{value:>18.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Import-time benchmark for the application.
+
+Runs `python -X importtime -c "import app.main"` in fresh interpreters and
+reports the median cumulative import time plus the slowest modules. Fails
+(exit 1) when the median exceeds a threshold, when it regresses against a
+saved baseline, or when a heavy optional dependency is imported eagerly.
+Run from the backend directory:
+
+    python -m benchmarks.import_time --runs 5 --max-ms 800
+    python -m benchmarks.import_time --json imports.json
+    python -m benchmarks.import_time --baseline imports.json --max-regression 0.2
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Modules that must only be loaded on first use, never by importing the app
+LAZY_MODULES = ("openai", "httpx", "numpy", "PyPDF2", "pytesseract", "PIL", "pdf2image", "pyinstrument")
+
+def import_profile(module: str) -> Dict[str, Tuple[int, int]]:
+    """Module -> (self us, cumulative us) for one cold import in a fresh interpreter"""
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = (int(self_us), int(cumulative_us))
+    return profile
+
+def eager_heavy_imports(profile: Dict[str, Tuple[int, int]]) -> List[str]:
+    return sorted(name for name in profile if name.split(".")[0] in LAZY_MODULES)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list")
+    parser.add_argument("--max-ms", type=float, default=0, help="fail above this median (0 disables)")
+    parser.add_argument("--json", default=None, help="write the result to this file")
+    parser.add_argument("--baseline", default=None, help="result JSON from an earlier run")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed increase vs baseline")
+    args = parser.parse_args()
+
+    profiles = [import_profile(args.module) for _ in range(args.runs)]
+    totals_ms = [profile[args.module][1] / 1000.0 for profile in profiles]
+    median_ms = statistics.median(totals_ms)
+
+    # Slowest modules by self time, from the median run
+    median_profile = profiles[totals_ms.index(sorted(totals_ms)[len(totals_ms) // 2])]
+    slowest = sorted(median_profile.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+
+    print(f"import {args.module}: median {median_ms:.1f} ms over {args.runs} runs "
+          f"(min {min(totals_ms):.1f}, max {max(totals_ms):.1f})")
+    print(f"\n{'self ms':>9}{'cumul ms':>10}  module")
+    for name, (self_us, cumulative_us) in slowest:
+        print(f"{self_us / 1000:>9.1f}{cumulative_us / 1000:>10.1f}  {name}")
+
+    problems = []
+    eager = eager_heavy_imports(median_profile)
+    if eager:
+        problems.append(f"heavy optional modules imported eagerly: {', '.join(eager[:10])}")
+    if args.max_ms and median_ms > args.max_ms:
+        problems.append(f"median {median_ms:.1f} ms exceeds --max-ms {args.max_ms:.0f}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            previous = json.load(handle)["median_ms"]
+        change = median_ms / previous - 1
+        if change > args.max_regression:
+            problems.append(f"median {previous:.1f} -> {median_ms:.1f} ms (+{change:.0%}) vs baseline")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump({
+                "module": args.module,
+                "median_ms": round(median_ms, 1),
+                "runs_ms": [round(value, 1) for value in totals_ms],
+                "slowest": [{"module": name, "self_ms": self_us / 1000, "cumulative_ms": cumulative_us / 1000}
+                            for name, (self_us, cumulative_us) in slowest]
+            }, handle, indent=2)
+
+    if problems:
+        print("\nImport-time check failed:")
+        for problem in problems:
+            print(f"  {problem}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Open-loop load generator for the API.
+
+Drives the main endpoints at a target request rate and reports throughput and
+p50/p95/p99 latency per endpoint. Pair it with the mock OpenAI server to
+measure the service itself without paying for API calls:
+
+    python -m benchmarks.mock_openai_server --port 9000 --latency lognormal:600,0.4 &
+    OPENAI_API_KEY=mock OPENAI_BASE_URL=http://127.0.0.1:9000/v1 uvicorn app.main:app --port 8000 &
+    python -m benchmarks.loadgen --rps 20 --duration 60 --no-cache --json results.json
+
+Compare against an earlier run and fail on regressions:
+
+    python -m benchmarks.loadgen --rps 20 --duration 60 --baseline results.json --max-regression 0.2
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+RESUME_LINES = [
+    "JANE DOE",
+    "jane.doe@example.com | +1 555 0100 | Berlin",
+    "SUMMARY",
+    "Backend engineer with 7 years of experience building Python and Go services.",
+    "EXPERIENCE",
+    "Senior Software Engineer, Acme Corp, Jan 2020 - Present",
+    "Led migration of 40 services to Kubernetes, cutting deploy time by 60%.",
+    "Built FastAPI platform serving 2M requests per day with PostgreSQL and Redis.",
+    "Software Engineer, Globex, Jun 2016 - Dec 2019",
+    "Designed Kafka data pipelines and Terraform-managed AWS infrastructure.",
+    "SKILLS",
+    "Python, Go, FastAPI, PostgreSQL, Redis, Kafka, Docker, Kubernetes, AWS, Terraform",
+    "EDUCATION",
+    "BSc Computer Science, TU Munich, 2016",
+]
+
+JOB_DESCRIPTION = (
+    "We are hiring a Senior Backend Engineer with strong Python, FastAPI and PostgreSQL skills. "
+    "Experience with Kubernetes, Terraform, CI/CD and observability (Prometheus, Grafana) is required. "
+    "Nice to have: machine learning pipelines and GraphQL."
+)
+
+def sample_resume_pdf() -> bytes:
+    """A small single-page text PDF the parser can read"""
+    def escape(text: str) -> str:
+        return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    content = "BT /F1 11 Tf 14 TL 72 740 Td " + " ".join(f"({escape(line)}) Tj T*" for line in RESUME_LINES) + " ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        "/Resources << /Font << /F1 5 0 R >> >> >>",
+        f"<< /Length {len(content)} >>\nstream\n{content}\nendstream",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    output = "%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n{body}\nendobj\n"
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    output += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n"
+    return output.encode("latin-1")
+
+class LoadTest:
+    def __init__(self, base_url: str, headers: Dict[str, str]):
+        self.base_url = base_url.rstrip("/")
+        self.headers = headers
+        self.file_ids: List[str] = []
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.client: Optional[httpx.AsyncClient] = None
+
+    async def upload(self) -> Optional[str]:
+        files = {"file": ("resume.pdf", sample_resume_pdf(), "application/pdf")}
+        response = await self.client.post(f"{self.base_url}/upload", files=files, headers=self.headers)
+        response.raise_for_status()
+        file_id = response.json()["file_id"]
+        self.file_ids.append(file_id)
+        return file_id
+
+    def payload(self, endpoint: str) -> Dict:
+        file_id = random.choice(self.file_ids)
+        if endpoint == "notes":
+            return {"file_id": file_id, "style": "concise"}
+        if endpoint == "quiz":
+            return {"file_id": file_id, "count": 5, "difficulty": "medium"}
+        if endpoint == "flashcards":
+            return {"file_id": file_id, "count": 10}
+        if endpoint == "ats":
+            return {"file_id": file_id, "job_description": JOB_DESCRIPTION}
+        if endpoint == "generate":
+            return {
+                "name": "Jane Doe",
+                "contact": "jane.doe@example.com",
+                "summary": "Backend engineer with 7 years of experience.",
+                "experiences": [{"title": "Senior Software Engineer", "company": "Acme", "duration": "2020 - Present",
+                                 "description": "Led Kubernetes migration"}],
+                "skills": ["Python", "FastAPI", "Kubernetes"],
+                "education": [{"degree": "BSc Computer Science", "institution": "TU Munich", "year": "2016"}],
+                "template": "modern",
+                "job_description": JOB_DESCRIPTION
+            }
+        raise ValueError(f"Unknown endpoint: {endpoint}")
+
+    async def fire(self, endpoint: str):
+        started = time.perf_counter()
+        try:
+            if endpoint == "upload":
+                await self.upload()
+            else:
+                response = await self.client.post(
+                    f"{self.base_url}/{endpoint}", json=self.payload(endpoint), headers=self.headers
+                )
+                response.raise_for_status()
+        except Exception:
+            self.errors[endpoint] += 1
+            return
+        self.latencies[endpoint].append(time.perf_counter() - started)
+
+    async def run(self, rps: float, duration: float, mix: Dict[str, float], concurrency: int):
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+            self.client = client
+            await self.upload()
+
+            endpoints = list(mix)
+            weights = [mix[endpoint] for endpoint in endpoints]
+            tasks = []
+            started = time.perf_counter()
+            sent = 0
+            # Open loop: send on schedule regardless of how fast responses come back
+            while time.perf_counter() - started < duration:
+                due = started + sent / rps
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.ensure_future(self.fire(random.choices(endpoints, weights)[0])))
+                sent += 1
+            await asyncio.gather(*tasks)
+            return time.perf_counter() - started
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+def summarize(test: LoadTest, elapsed: float) -> Dict[str, Dict]:
+    summary = {}
+    for endpoint in sorted(set(test.latencies) | set(test.errors)):
+        latencies = test.latencies[endpoint]
+        summary[endpoint] = {
+            "ok": len(latencies),
+            "errors": test.errors[endpoint],
+            "throughput_rps": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        }
+    return summary
+
+def print_summary(summary: Dict[str, Dict]):
+    print(f"{'endpoint':<12}{'ok':>7}{'errors':>8}{'rps':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for endpoint, row in summary.items():
+        print(
+            f"{endpoint:<12}{row['ok']:>7}{row['errors']:>8}{row['throughput_rps']:>8}"
+            f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}"
+        )
+
+def regressions(summary: Dict[str, Dict], baseline: Dict[str, Dict], max_regression: float) -> List[str]:
+    problems = []
+    for endpoint, row in summary.items():
+        previous = baseline.get(endpoint)
+        if not previous or not previous.get("p95_ms"):
+            continue
+        change = row["p95_ms"] / previous["p95_ms"] - 1
+        if change > max_regression:
+            problems.append(f"{endpoint}: p95 {previous['p95_ms']} -> {row['p95_ms']} ms (+{change:.0%})")
+    return problems
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000/api")
+    parser.add_argument("--rps", type=float, default=10)
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--mix", default="upload=1,notes=3,quiz=2,flashcards=2,ats=3,generate=1")
+    parser.add_argument("--concurrency", type=int, default=200, help="max open connections")
+    parser.add_argument("--no-cache", action="store_true", help="send Cache-Control: no-store to bypass the LLM cache")
+    parser.add_argument("--tenant", default=None, help="X-Tenant-ID header")
+    parser.add_argument("--json", default=None, help="write the summary to this file")
+    parser.add_argument("--baseline", default=None, help="summary JSON from an earlier run")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed p95 increase vs baseline")
+    args = parser.parse_args()
+
+    headers = {}
+    if args.no_cache:
+        headers["Cache-Control"] = "no-store"
+    if args.tenant:
+        headers["X-Tenant-ID"] = args.tenant
+
+    test = LoadTest(args.base_url, headers)
+    elapsed = asyncio.run(test.run(args.rps, args.duration, parse_mix(args.mix), args.concurrency))
+    summary = summarize(test, elapsed)
+    print_summary(summary)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump(summary, handle, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            problems = regressions(summary, json.load(handle), args.max_regression)
+        if problems:
+            print("\nRegressions against baseline:")
+            for problem in problems:
+                print(f"  {problem}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
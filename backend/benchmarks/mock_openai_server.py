@@ -0,0 +1,289 @@
+"""Local OpenAI-compatible stand-in for load and resilience testing.
+
+Serves deterministic chat, JSON-mode, streaming and embedding responses with
+configurable latency and error injection, so the backend can be exercised
+without spending money. Run from the backend directory:
+
+    python -m benchmarks.mock_openai_server --port 9000 --latency lognormal:400,0.5 --error-rate 0.02
+
+and point the app at it:
+
+    OPENAI_API_KEY=mock OPENAI_BASE_URL=http://127.0.0.1:9000/v1 uvicorn app.main:app
+
+Record/replay: `--mode record --upstream https://api.openai.com/v1 --cassette run.jsonl`
+proxies non-streaming requests to the real API (using OPENAI_API_KEY) and stores
+the responses; `--mode replay --cassette run.jsonl` serves them back offline,
+falling back to synthetic responses for requests it has not seen.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="Mock OpenAI API")
+
+class MockConfig:
+    latency = "fixed:0"            # chat latency before the first byte
+    embedding_latency = "fixed:0"
+    token_delay_ms = 0.0           # delay between streamed chunks
+    error_rate = 0.0               # fraction of requests answered with 500
+    rate_limit_rate = 0.0          # fraction of requests answered with 429 + Retry-After
+    retry_after = 1.0
+    embedding_dim = 1536
+    mode = "synthetic"             # synthetic, record or replay
+    upstream = "https://api.openai.com/v1"
+    cassette: Optional[str] = None
+    strict = False                 # replay: 404 instead of synthesizing unseen requests
+
+config = MockConfig()
+cassette: Dict[str, Any] = {}
+stats = {"requests": 0, "errors": 0, "rate_limited": 0, "replayed": 0, "recorded": 0}
+
+def sample_latency(spec: str) -> float:
+    """Seconds from a spec like fixed:200, uniform:100,400 or lognormal:300,0.5 (median ms, sigma)"""
+    kind, _, params = spec.partition(":")
+    values = [float(value) for value in params.split(",") if value]
+    if kind == "fixed":
+        return values[0] / 1000.0
+    if kind == "uniform":
+        return random.uniform(values[0], values[1]) / 1000.0
+    if kind == "lognormal":
+        return random.lognormvariate(math.log(values[0]), values[1]) / 1000.0
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+def fingerprint(path: str, body: Dict) -> str:
+    stable = {key: value for key, value in body.items() if key not in ("stream", "user")}
+    return hashlib.sha256(f"{path}:{json.dumps(stable, sort_keys=True)}".encode("utf-8")).hexdigest()
+
+def seeded_random(body: Dict) -> random.Random:
+    """Same request, same answer"""
+    return random.Random(hashlib.sha256(json.dumps(body, sort_keys=True).encode("utf-8")).digest())
+
+def requested_count(prompt: str, default: int) -> int:
+    match = re.search(r"exactly (\d+)", prompt)
+    return int(match.group(1)) if match else default
+
+def synthetic_json(prompt: str, rng: random.Random) -> Dict:
+    """Plausible JSON for the prompts the app sends"""
+    lowered = prompt.lower()
+    if "flashcard" in lowered:
+        return {"flashcards": [
+            {"front": f"What did the candidate do in project {i + 1}?", "back": f"Delivered outcome {rng.randint(1, 999)}"}
+            for i in range(requested_count(prompt, 10))
+        ]}
+    if "multiple-choice" in lowered or "quiz" in lowered:
+        return {"questions": [
+            {
+                "question": f"Which technology was used in role {i + 1}?",
+                "options": ["Python", "Java", "Go", "Rust"],
+                "correct_answer": rng.randint(0, 3),
+                "explanation": "Mentioned in the experience section."
+            }
+            for i in range(requested_count(prompt, 5))
+        ]}
+    if "ats" in lowered:
+        return {
+            "score": rng.randint(40, 95),
+            "feedback": ["Clear structure", "Quantified achievements"],
+            "missing_keywords": ["Kubernetes", "Terraform"],
+            "suggestions": ["Add a skills section matching the job description"]
+        }
+    return {"result": "ok", "value": rng.randint(0, 1000)}
+
+def synthetic_text(prompt: str, rng: random.Random, max_tokens: Optional[int]) -> str:
+    words = re.findall(r"[A-Za-z]{4,}", prompt) or ["resume"]
+    length = min(max_tokens or 300, 300)
+    lines, count = [], 0
+    while count < length:
+        line = " ".join(rng.choice(words) for _ in range(rng.randint(6, 14)))
+        lines.append(f"- {line}")
+        count += len(line.split())
+    return "\n".join(lines)
+
+def completion_body(model: str, content: str, prompt_tokens: int) -> Dict:
+    completion_tokens = max(1, len(content) // 4)
+    return {
+        "id": f"chatcmpl-mock-{hashlib.md5(content.encode('utf-8')).hexdigest()[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+    }
+
+def injected_error() -> Optional[JSONResponse]:
+    roll = random.random()
+    if roll < config.rate_limit_rate:
+        stats["rate_limited"] += 1
+        return JSONResponse(
+            {"error": {"message": "Rate limit reached (mock)", "type": "rate_limit_error"}},
+            status_code=429,
+            headers={"retry-after": str(config.retry_after)}
+        )
+    if roll < config.rate_limit_rate + config.error_rate:
+        stats["errors"] += 1
+        return JSONResponse({"error": {"message": "Internal error (mock)", "type": "server_error"}}, status_code=500)
+    return None
+
+async def from_cassette(path: str, body: Dict) -> Optional[Dict]:
+    """Replay a recorded response, or record one from the real upstream"""
+    key = fingerprint(path, body)
+    if config.mode == "replay":
+        if key in cassette:
+            stats["replayed"] += 1
+            return cassette[key]
+        return None
+    if config.mode == "record" and not body.get("stream"):
+        import httpx
+        async with httpx.AsyncClient(timeout=120) as client:
+            response = await client.post(
+                f"{config.upstream}{path}",
+                json=body,
+                headers={"Authorization": f"Bearer {os.getenv('OPENAI_API_KEY', '')}"}
+            )
+        response.raise_for_status()
+        recorded = response.json()
+        cassette[key] = recorded
+        with open(config.cassette, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps({"key": key, "response": recorded}) + "\n")
+        stats["recorded"] += 1
+        return recorded
+    return None
+
+async def stream_chunks(model: str, content: str):
+    """Re-chunk a completion into chat.completion.chunk events"""
+    base = {"id": "chatcmpl-mock-stream", "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+    pieces = re.findall(r"\S+\s*", content) or [content]
+    first = {**base, "choices": [{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}]}
+    yield f"data: {json.dumps(first)}\n\n"
+    for piece in pieces:
+        if config.token_delay_ms:
+            await asyncio.sleep(config.token_delay_ms / 1000.0)
+        chunk = {**base, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+        yield f"data: {json.dumps(chunk)}\n\n"
+    last = {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+    yield f"data: {json.dumps(last)}\n\n"
+    yield "data: [DONE]\n\n"
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    stats["requests"] += 1
+    error = injected_error()
+    if error:
+        return error
+    await asyncio.sleep(sample_latency(config.latency))
+
+    model = body.get("model", "mock-model")
+    recorded = await from_cassette("/chat/completions", body)
+    if recorded is not None:
+        content = recorded["choices"][0]["message"]["content"]
+        if not body.get("stream"):
+            return JSONResponse(recorded)
+    elif config.mode == "replay" and config.strict:
+        return JSONResponse({"error": {"message": "Request not in cassette"}}, status_code=404)
+    else:
+        messages: List[Dict] = body.get("messages", [])
+        prompt = "\n".join(message.get("content", "") for message in messages)
+        rng = seeded_random(body)
+        if (body.get("response_format") or {}).get("type") == "json_object":
+            content = json.dumps(synthetic_json(prompt, rng))
+        else:
+            content = synthetic_text(prompt, rng, body.get("max_tokens"))
+
+    if body.get("stream"):
+        return StreamingResponse(stream_chunks(model, content), media_type="text/event-stream")
+    prompt_tokens = sum(len(message.get("content", "")) for message in body.get("messages", [])) // 4
+    return JSONResponse(completion_body(model, content, prompt_tokens))
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    stats["requests"] += 1
+    error = injected_error()
+    if error:
+        return error
+    await asyncio.sleep(sample_latency(config.embedding_latency))
+
+    recorded = await from_cassette("/embeddings", body)
+    if recorded is not None:
+        return JSONResponse(recorded)
+
+    inputs = body.get("input", [])
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    dim = body.get("dimensions") or config.embedding_dim
+    data = []
+    for index, text in enumerate(inputs):
+        rng = random.Random(hashlib.sha256(str(text).encode("utf-8")).digest())
+        vector = [rng.gauss(0, 1) for _ in range(dim)]
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        data.append({"object": "embedding", "index": index, "embedding": [value / norm for value in vector]})
+    tokens = sum(len(str(text)) // 4 + 1 for text in inputs)
+    return JSONResponse({
+        "object": "list",
+        "data": data,
+        "model": body.get("model", "mock-embedding"),
+        "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+    })
+
+@app.get("/stats")
+async def get_stats():
+    return stats
+
+def load_cassette(path: str):
+    if not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                entry = json.loads(line)
+                cassette[entry["key"]] = entry["response"]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", default=config.latency, help="chat latency: fixed:MS, uniform:MIN,MAX or lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--embedding-latency", default=config.embedding_latency)
+    parser.add_argument("--token-delay-ms", type=float, default=config.token_delay_ms)
+    parser.add_argument("--error-rate", type=float, default=config.error_rate)
+    parser.add_argument("--rate-limit-rate", type=float, default=config.rate_limit_rate)
+    parser.add_argument("--retry-after", type=float, default=config.retry_after)
+    parser.add_argument("--embedding-dim", type=int, default=config.embedding_dim)
+    parser.add_argument("--mode", choices=["synthetic", "record", "replay"], default=config.mode)
+    parser.add_argument("--upstream", default=config.upstream)
+    parser.add_argument("--cassette", default=None)
+    parser.add_argument("--strict", action="store_true")
+    args = parser.parse_args()
+
+    for name, value in vars(args).items():
+        if hasattr(config, name):
+            setattr(config, name, value)
+    if config.mode != "synthetic":
+        if not config.cassette:
+            parser.error("--cassette is required for record and replay modes")
+        load_cassette(config.cassette)
+
+    # Validate distributions up front
+    sample_latency(config.latency)
+    sample_latency(config.embedding_latency)
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
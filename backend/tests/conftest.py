@@ -0,0 +1,28 @@
+import json
+from types import SimpleNamespace
+import pytest
+from app.models.llm_cache import LLMResponseCache
+from app.models.llm_client import llm_client
+from app.services.context_builder import context_builder
+
+@pytest.fixture
+def upstream(monkeypatch, tmp_path):
+    """Count calls that reach the OpenAI client; every call answers with `upstream.payload`"""
+    state = SimpleNamespace(calls=0, payload=None, requests=[])
+
+    async def fake_request(make_call, **kwargs):
+        state.calls += 1
+        state.requests.append(kwargs)
+        content = state.payload if isinstance(state.payload, str) else json.dumps(state.payload)
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+    async def fake_context(file_id, task):
+        return "SKILLS\nPython, FastAPI"
+
+    monkeypatch.setattr(llm_client, "_client", object())
+    monkeypatch.setattr(llm_client, "_request", fake_request)
+    # A fresh, enabled response cache per test
+    monkeypatch.setattr(llm_client, "cache", LLMResponseCache(path=str(tmp_path / "llm_cache.sqlite3"), enabled=True))
+    monkeypatch.setattr(context_builder, "build", fake_context)
+    return state
@@ -0,0 +1,52 @@
+import pytest
+from app.services.ats_scorer import ATSScorer
+
+JOB = """Senior Backend Engineer
+You must have strong experience with Python and Kubernetes (k8s).
+You will own payment processing systems end to end.
+Nice to have: Terraform."""
+
+def doc(text, section):
+    return {"text": text, "metadata": {"section": section}}
+
+@pytest.fixture
+def scorer():
+    return ATSScorer()
+
+def test_lexicon_aliases_map_to_canonical_skills(scorer):
+    keywords = {keyword.term: keyword for keyword in scorer.extract_keywords(JOB)}
+    assert keywords["kubernetes"].kind == "skill"
+    assert "k8s" not in keywords
+    assert keywords["python"].kind == "skill"
+
+def test_boilerplate_never_becomes_a_keyword(scorer):
+    terms = {keyword.term for keyword in scorer.extract_keywords(JOB)}
+    assert not any(word in term.split(" ") for term in terms for word in ("strong", "experience"))
+    assert "payment processing" in terms
+
+def test_required_skills_outweigh_optional_ones(scorer):
+    weights = {keyword.term: keyword.weight for keyword in scorer.extract_keywords(JOB)}
+    assert weights["python"] > weights["terraform"]
+
+def test_ngrams_match_across_plurals_and_missing_terms_are_reported(scorer):
+    documents = [doc("Built payments processing services in Python.", "experience")]
+    result = scorer.score(JOB, "file-1", documents)
+    assert "payment processing" in result["matched_keywords"]
+    assert "python" in result["matched_keywords"]
+    assert "kubernetes" in result["missing_keywords"]
+    assert "terraform" in result["missing_keywords"]
+
+def test_skill_backed_by_experience_scores_higher_than_a_bare_skills_list(scorer):
+    job = "Required: Python."
+    listed = scorer.score(job, "file-1", [doc("Python", "skills")])
+    applied = scorer.score(job, "file-2", [doc("Built services in Python", "experience")])
+    assert listed["score"] < applied["score"] == 100.0
+    assert any("python" in line for line in listed["feedback"] if line.startswith("Listed but not"))
+
+def test_score_bounds(scorer):
+    assert scorer.score(JOB, "file-1", [doc("Gardening and cooking.", "other")])["score"] == 0.0
+    full = scorer.score(JOB, "file-2", [doc(JOB, "experience")])
+    assert 0.0 < full["score"] <= 100.0
+    empty = scorer.score("", "file-3", [doc("Python", "skills")])
+    assert empty["score"] == 0.0
+    assert empty["feedback"] == ["The job description has too little content to extract keywords from."]
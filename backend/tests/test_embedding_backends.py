@@ -0,0 +1,38 @@
+import asyncio
+import math
+import pytest
+from app.services.embedding_backends import LocalHashingEmbeddingBackend
+
+pytest.importorskip("numpy")
+
+def cosine(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+@pytest.fixture
+def backend():
+    return LocalHashingEmbeddingBackend(dimensions=128)
+
+def test_local_embeddings_are_deterministic(backend):
+    text = "Senior Python developer building FastAPI services"
+    first = backend.embed_sync([text])[0]
+    # A fresh instance rebuilds the projection from the same seed
+    again = LocalHashingEmbeddingBackend(dimensions=128).embed_sync([text])[0]
+    assert first == again
+
+def test_local_embeddings_have_the_configured_dimension_and_unit_norm(backend):
+    vectors = asyncio.run(backend.embed(["Python and Kubernetes", "Led a team of five engineers"]))
+    assert [len(vector) for vector in vectors] == [128, 128]
+    for vector in vectors:
+        assert math.isclose(math.sqrt(sum(x * x for x in vector)), 1.0, rel_tol=1e-5)
+    assert backend.model == "local-hash-v1-128"
+
+def test_empty_text_embeds_to_zeros(backend):
+    assert backend.embed_sync([""])[0] == [0.0] * 128
+
+def test_similar_texts_score_higher_than_unrelated_ones(backend):
+    query, similar, unrelated = backend.embed_sync([
+        "python backend developer with fastapi and postgresql",
+        "backend developer writing python services on fastapi with a postgresql database",
+        "pastry chef baking sourdough bread and croissants",
+    ])
+    assert cosine(query, similar) > cosine(query, unrelated) + 0.2
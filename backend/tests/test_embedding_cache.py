@@ -0,0 +1,113 @@
+import asyncio
+from types import SimpleNamespace
+from app.models import llm_client as llm_client_module
+from app.models.llm_client import llm_client
+from app.services.embedding_backends import EmbeddingBackend
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embeddings import EmbeddingService
+
+def cache_at(tmp_path, **kwargs):
+    return EmbeddingCache(path=str(tmp_path / "embeddings.sqlite3"), enabled=True, **kwargs)
+
+def test_keys_ignore_whitespace_but_not_model_or_dimensions(tmp_path):
+    cache = cache_at(tmp_path)
+    key = cache.make_key("Python  developer\n", "model-a", 256)
+    assert key == cache.make_key(" Python developer", "model-a", 256)
+    assert key != cache.make_key("Python developer", "model-b", 256)
+    assert key != cache.make_key("Python developer", "model-a", 512)
+
+def test_memory_then_disk_tiers(tmp_path):
+    vector = [0.25, -0.5, 1.0]
+
+    async def run():
+        writer = cache_at(tmp_path)
+        await writer.put_many({"k": vector})
+        memory = await writer.get_many(["k", "absent"])
+        # A new process has an empty memory tier but shares the SQLite file
+        reader = cache_at(tmp_path)
+        from_disk = await reader.get_many(["k"])
+        promoted = await reader.get_many(["k"])
+        return writer, reader, memory, from_disk, promoted
+
+    writer, reader, memory, from_disk, promoted = asyncio.run(run())
+    assert memory == {"k": vector}
+    assert writer.stats()["memory_hits"] == 1 and writer.stats()["misses"] == 1
+    # float32 on disk: these values round-trip exactly
+    assert from_disk == promoted == {"k": vector}
+    assert (reader.disk_hits, reader.memory_hits) == (1, 1)
+
+def test_entries_evicted_from_memory_are_still_on_disk(tmp_path):
+    async def run():
+        cache = cache_at(tmp_path, memory_items=1)
+        await cache.put_many({"a": [1.0], "b": [2.0]})
+        return cache, await cache.get_many(["a"])
+
+    cache, found = asyncio.run(run())
+    assert found == {"a": [1.0]}
+    assert cache.disk_hits == 1
+
+def test_disabled_cache_stores_nothing(tmp_path):
+    async def run():
+        cache = EmbeddingCache(path=str(tmp_path / "off.sqlite3"), enabled=False)
+        await cache.put_many({"k": [1.0]})
+        return await cache.get_many(["k"])
+
+    assert asyncio.run(run()) == {}
+    assert not (tmp_path / "off.sqlite3").exists()
+
+class CountingBackend(EmbeddingBackend):
+    name = "counting"
+    cacheable = True
+
+    def __init__(self):
+        self.calls = []
+
+    @property
+    def model(self):
+        return "counting-v1"
+
+    @property
+    def dimensions(self):
+        return 1
+
+    def is_available(self):
+        return True
+
+    async def embed(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+def test_service_sends_each_distinct_missing_text_once(tmp_path):
+    service = EmbeddingService()
+    service.cache = cache_at(tmp_path)
+    backend = CountingBackend()
+
+    async def run():
+        first = await service.generate_embeddings(["aa", "bbb", "aa"], backend=backend)
+        second = await service.generate_embeddings(["bbb", "cccc"], backend=backend)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == [[2.0], [3.0], [2.0]]
+    assert second == [[3.0], [4.0]]
+    assert backend.calls == [["aa", "bbb"], ["cccc"]]
+
+def test_configured_dimensions_are_sent_to_the_api(monkeypatch):
+    sent = {}
+
+    async def create(**kwargs):
+        sent.update(kwargs)
+        return SimpleNamespace(data=[SimpleNamespace(embedding=[0.0] * 256)], usage=None)
+
+    async def direct(make_call, **kwargs):
+        return await make_call()
+
+    monkeypatch.setattr(llm_client_module.settings, "EMBEDDING_DIMENSIONS", 256)
+    monkeypatch.setattr(llm_client, "_client", SimpleNamespace(embeddings=SimpleNamespace(create=create)))
+    monkeypatch.setattr(llm_client, "_request", direct)
+    asyncio.run(llm_client.generate_embeddings(["text"]))
+    assert sent["extra_body"] == {"dimensions": 256}
+
+    monkeypatch.setattr(llm_client_module.settings, "EMBEDDING_DIMENSIONS", 0)
+    asyncio.run(llm_client.generate_embeddings(["text"]))
+    assert sent["extra_body"] is None
@@ -0,0 +1,100 @@
+import asyncio
+import pytest
+from app.services.embeddings import EmbeddingScheduler
+
+class FakeProvider:
+    """Embeds "n" as [n] and records every call"""
+
+    def __init__(self, delay: float = 0.0, error: Exception = None):
+        self.calls = []
+        self.delay = delay
+        self.error = error
+        self.active = 0
+        self.max_active = 0
+
+    async def __call__(self, texts):
+        self.calls.append(list(texts))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.error is not None:
+                raise self.error
+            return [[float(text)] for text in texts]
+        finally:
+            self.active -= 1
+
+def scheduler(provider, **kwargs):
+    options = {"max_items": 4, "max_tokens": 1000, "max_concurrency": 2, "coalesce_window_ms": 5}
+    return EmbeddingScheduler(embed_fn=provider, **{**options, **kwargs})
+
+def test_split_batches_respects_item_and_token_limits():
+    batcher = scheduler(FakeProvider(), max_items=3, max_tokens=10)
+    assert batcher.split_batches([str(n) for n in range(7)]) == [["0", "1", "2"], ["3", "4", "5"], ["6"]]
+    # ~4 characters per token: two 20-character texts do not fit 10 tokens together
+    long_text = "x" * 20
+    assert batcher.split_batches([long_text, long_text, "1"]) == [[long_text], [long_text, "1"]]
+
+def test_concurrent_small_requests_are_coalesced_into_one_call():
+    provider = FakeProvider()
+    batcher = scheduler(provider)
+
+    async def run():
+        return await asyncio.gather(batcher.embed(["1"]), batcher.embed(["2", "3"]), batcher.embed(["4"]))
+
+    assert asyncio.run(run()) == [[[1.0]], [[2.0], [3.0]], [[4.0]]]
+    assert provider.calls == [["1", "2", "3", "4"]]
+    assert batcher.api_calls == 1
+    assert batcher.coalesced_requests == 3
+
+def test_a_request_that_would_overflow_the_batch_flushes_it_first():
+    provider = FakeProvider()
+    batcher = scheduler(provider, max_items=3)
+
+    async def run():
+        return await asyncio.gather(batcher.embed(["1", "2"]), batcher.embed(["3", "4"]))
+
+    assert asyncio.run(run()) == [[[1.0], [2.0]], [[3.0], [4.0]]]
+    assert provider.calls == [["1", "2"], ["3", "4"]]
+
+def test_large_requests_are_split_and_concurrency_is_limited():
+    provider = FakeProvider(delay=0.01)
+    batcher = scheduler(provider, max_items=2, max_concurrency=2)
+    texts = [str(n) for n in range(9)]
+
+    embeddings = asyncio.run(batcher.embed(texts))
+    assert embeddings == [[float(n)] for n in range(9)]
+    assert len(provider.calls) == 5
+    assert provider.max_active == 2
+
+def test_errors_reach_every_coalesced_caller():
+    provider = FakeProvider(error=RuntimeError("rate limited"))
+    batcher = scheduler(provider)
+
+    async def run():
+        return await asyncio.gather(batcher.embed(["1"]), batcher.embed(["2"]), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert [str(result) for result in results] == ["rate limited", "rate limited"]
+    assert len(provider.calls) == 1
+
+def test_dispatch_tasks_are_referenced_until_done():
+    provider = FakeProvider(delay=0.02)
+    batcher = scheduler(provider)
+
+    async def run():
+        request = asyncio.ensure_future(batcher.embed(["1"]))
+        await asyncio.sleep(0.01)  # past the coalescing window, inside the provider call
+        in_flight = len(batcher._tasks)
+        await request
+        await asyncio.sleep(0)
+        return in_flight, len(batcher._tasks)
+
+    assert asyncio.run(run()) == (1, 0)
+
+def test_wrong_number_of_embeddings_is_an_error():
+    async def short(texts):
+        return [[1.0]]
+
+    with pytest.raises(ValueError):
+        asyncio.run(scheduler(short, coalesce_window_ms=0).embed(["1", "2"]))
@@ -0,0 +1,59 @@
+import asyncio
+import os
+import time
+import pytest
+from app.services import export_service as export_module
+from app.services.export_service import ExportService
+
+@pytest.fixture
+def exports(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_module.settings, "EXPORT_DIR", str(tmp_path))
+    monkeypatch.setattr(export_module.settings, "EXPORT_TTL_SECONDS", 3600)
+    return tmp_path
+
+def age(path, seconds):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+def test_register_prunes_files_unused_past_the_ttl(exports):
+    service = ExportService()
+    stale = exports / f"{'a' * 32}.pdf"
+    stale.write_bytes(b"%PDF")
+    age(stale, 7200)
+    fresh = exports / f"{'b' * 32}.txt"
+    fresh.write_text("recent")
+    age(fresh, 60)
+
+    export_id = asyncio.run(service.register("Jane Doe resume"))
+
+    assert not stale.exists()
+    assert fresh.exists()
+    assert (exports / f"{export_id}.txt").exists()
+    assert service.stats()["pruned"] == 1
+
+def test_downloads_and_regeneration_restart_the_expiry(exports):
+    service = ExportService()
+    export_id = asyncio.run(service.register("Jane Doe resume"))
+    source = exports / f"{export_id}.txt"
+    rendered = exports / f"{export_id}.pdf"
+    rendered.write_bytes(b"%PDF")
+    age(source, 7200)
+    age(rendered, 7200)
+
+    assert asyncio.run(service.render(export_id, "pdf")) == rendered
+    asyncio.run(service.register("Jane Doe resume"))
+    service._pruned_at = 0.0
+    asyncio.run(service.register("Another resume"))
+
+    assert source.exists() and rendered.exists()
+    assert service.hits == 1
+
+def test_zero_ttl_keeps_everything(exports, monkeypatch):
+    monkeypatch.setattr(export_module.settings, "EXPORT_TTL_SECONDS", 0)
+    old = exports / f"{'c' * 32}.docx"
+    old.write_bytes(b"PK")
+    age(old, 10 ** 8)
+
+    asyncio.run(ExportService().register("Jane Doe resume"))
+
+    assert old.exists()
@@ -0,0 +1,30 @@
+import asyncio
+import hashlib
+from app.services import generation
+from app.services.generation import generate_sharded, shard_focuses
+
+def test_shard_focuses_are_distinct_with_fewer_sections_than_shards():
+    focuses = shard_focuses(["technical skills"], 8)
+    assert len(set(focuses)) == 8
+
+def test_single_section_resume_gets_requested_count(monkeypatch):
+    monkeypatch.setattr(generation.settings, "GENERATION_SHARD_SIZE", 5)
+    monkeypatch.setattr(generation.settings, "GENERATION_MAX_SHARDS", 8)
+    monkeypatch.setattr(generation.settings, "GENERATION_RETRY_ROUNDS", 0)
+    monkeypatch.setattr(generation.vectorstore, "get_documents",
+                        lambda file_id: [{"text": "SKILLS\nPython, FastAPI, Docker", "metadata": {"section": "skills"}}])
+    calls = {}
+
+    async def generate(size, focus, avoid):
+        # Like the LLM cache and single-flight: identical prompts share one response
+        prompt = (size, focus, tuple(avoid))
+        if prompt not in calls:
+            calls[prompt] = [
+                {"front": hashlib.sha256(f"{focus}:{index}".encode()).hexdigest()[:12], "back": "answer"}
+                for index in range(size)
+            ]
+        return calls[prompt]
+
+    items = asyncio.run(generate_sharded("file-1", 30, generate, "flashcards"))
+    assert len(items) == 30
+    assert len(calls) == 6
@@ -0,0 +1,44 @@
+import asyncio
+from app.models import router as router_module
+from app.models.llm_client import llm_client
+from app.models.router import ModelRouter
+from app.services.flashcard_service import flashcard_service
+from app.services.quiz_service import quiz_service
+
+QUIZ = {"questions": [{"question": "Which language?", "options": ["Python", "Go", "C", "Java"],
+                       "correct_answer": 0, "explanation": "Listed under skills"}]}
+FLASHCARDS = {"flashcards": [{"front": "Python", "back": "Main language"}]}
+
+def test_repeated_quiz_requests_reach_upstream(upstream):
+    upstream.payload = QUIZ
+
+    async def run():
+        first = await quiz_service.generate_quiz("file-1", count=1)
+        second = await quiz_service.generate_quiz("file-1", count=1)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second == [{**QUIZ["questions"][0]}]
+    assert upstream.calls == 2
+
+def test_repeated_flashcard_requests_reach_upstream(upstream):
+    upstream.payload = FLASHCARDS
+
+    async def run():
+        await flashcard_service.generate_flashcards("file-1", count=1)
+        await flashcard_service.generate_flashcards("file-1", count=1)
+
+    asyncio.run(run())
+    assert upstream.calls == 2
+
+def test_item_count_sizes_the_routed_call(monkeypatch, upstream):
+    monkeypatch.setattr(router_module.settings, "LLM_ROUTES", "quiz=2500/8")
+    monkeypatch.setattr(llm_client, "router", ModelRouter("primary", "fast"))
+    upstream.payload = QUIZ
+
+    async def run():
+        await quiz_service._generate_batch("file-1", 5, "medium", None, ())
+        await quiz_service._generate_batch("file-1", 50, "medium", None, ())
+
+    asyncio.run(run())
+    assert [request["model"] for request in upstream.requests] == ["fast", "primary"]
@@ -0,0 +1,28 @@
+import asyncio
+from app.core.tokens import estimate_tokens
+from app.services import notes_service as notes_module
+from app.services.notes_service import NotesService
+
+def test_split_cuts_oversized_text_at_word_breaks():
+    text = " ".join(f"word{i}" for i in range(400))
+    windows = NotesService._split([text, "short"], 100)
+
+    assert len(windows) > 2
+    assert windows[-1] == "short"
+    assert all(estimate_tokens(window) <= 101 for window in windows)
+    assert " ".join(windows[:-1]).split() == text.split()
+
+def test_single_whole_text_chunk_is_still_map_reduced(monkeypatch, upstream):
+    upstream.payload = "- Python developer\n- Built APIs with FastAPI"
+    monkeypatch.setattr(notes_module.settings, "NOTES_MAP_REDUCE_MIN_TOKENS", 1500)
+    monkeypatch.setattr(notes_module.settings, "NOTES_MAP_GROUP_TOKENS", 1200)
+    # What the chunker falls back to when it cannot split: one chunk with the whole resume
+    resume = "\n".join(f"Led project {i} delivering Python services with FastAPI" for i in range(250))
+    monkeypatch.setattr(notes_module.vectorstore, "get_documents", lambda file_id: [{"text": resume}])
+
+    notes = asyncio.run(NotesService().generate_notes("file-1"))
+
+    assert notes == upstream.payload
+    callers = [request["caller"] for request in upstream.requests]
+    assert callers.count("notes_map") >= 3
+    assert callers[-1] == "notes"
@@ -0,0 +1,30 @@
+import asyncio
+from app.models.schemas import CandidateProfile
+from app.services import profile_service as profile_module
+from app.services.profile_service import profile_service
+
+RULES_PROFILE = {
+    "skills": ["python"], "titles": [], "employers": [], "positions": [], "total_years_experience": 0.0,
+    "education": [], "sections": ["skills"], "source": "rules",
+}
+
+def test_enrichment_normalises_education_the_llm_reports_loosely(monkeypatch, upstream):
+    profiles = {"file-1": dict(RULES_PROFILE)}
+    monkeypatch.setattr(profile_module.vectorstore, "get_profile", profiles.get)
+    monkeypatch.setattr(profile_module.vectorstore, "set_profile", profiles.__setitem__)
+    upstream.payload = {"total_years_experience": "4", "education": [
+        {"degree": "BSc Computer Science", "institution": "State University", "year": "2019-2023"},
+        {"degree": ["MSc"], "institution": " ", "year": "ongoing"},
+        {"degree": "Bootcamp", "institution": None, "year": 2018},
+        "not an object",
+    ]}
+
+    merged = asyncio.run(profile_service.enrich("file-1", "resume text"))
+    assert merged["education"] == [
+        {"degree": "BSc Computer Science", "institution": "State University", "year": 2023},
+        {"degree": None, "institution": None, "year": None},
+        {"degree": "Bootcamp", "institution": None, "year": 2018},
+    ]
+    assert merged["total_years_experience"] == 4.0
+    # What GET /files/{id}/profile builds
+    CandidateProfile(file_id="file-1", **profiles["file-1"])
@@ -0,0 +1,29 @@
+import asyncio
+from app.core.profiling import ProfilingMiddleware
+
+async def app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 204, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+def request(token: bytes, admin_token: str = "sécret"):
+    scope = {
+        "type": "http", "method": "GET", "path": "/api/health",
+        "query_string": b"profile=1", "headers": [(b"x-admin-token", token)],
+    }
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(ProfilingMiddleware(app, admin_token)(scope, None, send))
+    return sent[0]["status"], dict(sent[0]["headers"])
+
+def test_non_ascii_token_mismatch_passes_request_through():
+    status, headers = request("wrông".encode("utf-8"))
+    assert status == 204
+    assert b"x-profiled-status" not in headers
+
+def test_non_ascii_token_match_profiles_request():
+    status, headers = request("sécret".encode("utf-8"))
+    assert status == 200
+    assert headers[b"x-profiled-status"] == b"204"
@@ -0,0 +1,122 @@
+import asyncio
+import pytest
+from app.core import rate_limiter
+from app.core.rate_limiter import AdmissionRejected, AdmissionScheduler, TokenBucket
+from app.core.request_context import Priority
+
+TIMEOUTS = {Priority.INTERACTIVE: 5.0, Priority.BACKGROUND: 5.0, Priority.WARMUP: 5.0}
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", clock)
+    return clock
+
+def test_bucket_refills_continuously_up_to_capacity(clock):
+    bucket = TokenBucket(capacity=10, rate=2.0)
+    bucket.consume(10)
+    assert bucket.time_until(4) == 2.0
+    clock.now += 1.0
+    assert bucket.time_until(2) == 0.0
+    clock.now += 100.0
+    bucket.consume(0)
+    assert bucket.tokens == 10
+
+def test_oversized_requests_are_clamped_to_capacity(clock):
+    bucket = TokenBucket(capacity=10, rate=1.0)
+    # Larger than the bucket could ever hold: waits for a full bucket instead of forever
+    assert bucket.time_until(50) == 0.0
+    bucket.consume(50)
+    assert bucket.tokens == 0
+    assert bucket.time_until(50) == 10.0
+
+def test_refunds_are_capped_at_capacity(clock):
+    bucket = TokenBucket(capacity=10, rate=1.0)
+    bucket.consume(8)
+    bucket.refund(5)
+    assert bucket.tokens == 7
+    bucket.refund(100)
+    assert bucket.tokens == 10
+
+def test_scheduler_refund_returns_over_estimated_tokens(clock):
+    scheduler = AdmissionScheduler(rpm=0, tpm=1000, queue_timeouts=TIMEOUTS)
+    asyncio.run(scheduler.acquire(800))
+    assert scheduler.tokens.tokens == 200
+    scheduler.refund(500)
+    scheduler.refund(-100)  # under-estimates are not charged after the fact
+    assert scheduler.tokens.tokens == 700
+
+def test_disabled_scheduler_admits_everything():
+    scheduler = AdmissionScheduler(rpm=0, tpm=0, queue_timeouts=TIMEOUTS)
+    asyncio.run(scheduler.acquire(10 ** 9))
+    assert not scheduler.enabled
+
+def admission_order(scheduler, requests):
+    """Queue (name, priority, tenant) requests in order; return the order they are admitted in"""
+    order = []
+
+    async def request(name, priority, tenant):
+        await scheduler.acquire(1, priority=priority, tenant=tenant)
+        order.append(name)
+
+    async def run():
+        await asyncio.gather(*(request(*spec) for spec in requests))
+
+    asyncio.run(run())
+    return order
+
+def test_higher_priority_is_admitted_first():
+    scheduler = AdmissionScheduler(rpm=6000, tpm=0, queue_timeouts=TIMEOUTS)  # one request per 10 ms
+    scheduler.requests.tokens = 0
+    order = admission_order(scheduler, [
+        ("warm", Priority.WARMUP, "a"),
+        ("background", Priority.BACKGROUND, "a"),
+        ("interactive", Priority.INTERACTIVE, "a"),
+    ])
+    assert order == ["interactive", "background", "warm"]
+    assert scheduler.admitted == 3
+
+def test_tenants_take_turns_within_a_priority():
+    scheduler = AdmissionScheduler(rpm=6000, tpm=0, queue_timeouts=TIMEOUTS)
+    scheduler.requests.tokens = 0
+    order = admission_order(scheduler, [
+        ("a1", Priority.INTERACTIVE, "a"),
+        ("a2", Priority.INTERACTIVE, "a"),
+        ("a3", Priority.INTERACTIVE, "a"),
+        ("b1", Priority.INTERACTIVE, "b"),
+    ])
+    assert order == ["a1", "b1", "a2", "a3"]
+
+def test_requests_waiting_past_the_queue_timeout_are_shed():
+    scheduler = AdmissionScheduler(rpm=60, tpm=0, queue_timeouts={**TIMEOUTS, Priority.WARMUP: 0.02})
+    scheduler.requests.tokens = 0
+    with pytest.raises(AdmissionRejected) as raised:
+        asyncio.run(scheduler.acquire(1, priority=Priority.WARMUP))
+    assert raised.value.retry_after == 0.02
+    assert scheduler.stats()["shed"] == 1
+    assert scheduler.stats()["queued"]["warmup"] == 0
+
+def test_a_cancelled_waiter_does_not_block_the_queue():
+    scheduler = AdmissionScheduler(rpm=0, tpm=100, queue_timeouts=TIMEOUTS)
+
+    async def run():
+        scheduler.tokens.tokens = 0
+        scheduler.tokens.rate = 1.0  # the 100-token head would wait ~100 s
+        head = asyncio.ensure_future(scheduler.acquire(100, tenant="a"))
+        behind = asyncio.ensure_future(scheduler.acquire(1, tenant="b"))
+        await asyncio.sleep(0.01)
+        assert not behind.done()
+        head.cancel()
+        scheduler.tokens.rate = 1000.0
+        await asyncio.wait_for(behind, timeout=1.0)
+        return head.cancelled()
+
+    assert asyncio.run(run())
+    assert scheduler.admitted == 1
@@ -0,0 +1,204 @@
+import asyncio
+import time
+from types import SimpleNamespace
+import pytest
+from app.core.resilience import (
+    CircuitBreaker, CircuitOpenError, RetryPolicy, ServiceUnavailableError, call_with_retries, hedged,
+    retry_after_seconds
+)
+
+class Flaky:
+    """A call that fails with the given exceptions, in order, then succeeds"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+class Retryable(Exception):
+    pass
+
+NO_WAIT = RetryPolicy(max_retries=2, base_delay=0.0)
+
+def test_retry_after_header_forms():
+    def error(headers):
+        return SimpleNamespace(response=SimpleNamespace(headers=headers))
+
+    assert retry_after_seconds(error({"retry-after-ms": "1500"})) == 1.5
+    assert retry_after_seconds(error({"retry-after": "3"})) == 3.0
+    assert retry_after_seconds(error({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0.0
+    assert retry_after_seconds(error({"retry-after": "soon"})) is None
+    assert retry_after_seconds(RuntimeError()) is None
+
+def test_backoff_is_capped_and_honours_retry_after():
+    policy = RetryPolicy(base_delay=1.0, max_delay=4.0)
+    assert all(0.0 <= policy.compute_delay(attempt) <= 4.0 for attempt in range(10))
+    assert 2.0 <= policy.compute_delay(0, retry_after=2.0) <= 2.2
+    assert policy.compute_delay(0, retry_after=60.0) == 4.0
+
+def test_retryable_errors_are_retried_up_to_the_limit():
+    flaky = Flaky(Retryable(), Retryable())
+    retries = []
+    result = asyncio.run(call_with_retries(flaky, NO_WAIT, on_retry=lambda attempt, exc, delay: retries.append(attempt)))
+    assert result == "ok"
+    assert flaky.calls == 3
+    assert retries == [1, 2]
+
+    exhausted = Flaky(Retryable(), Retryable(), Retryable())
+    with pytest.raises(Retryable):
+        asyncio.run(call_with_retries(exhausted, NO_WAIT))
+    assert exhausted.calls == 3
+
+def test_non_retryable_errors_fail_at_once_without_tripping_the_breaker():
+    breaker = CircuitBreaker("test", failure_threshold=1)
+    flaky = Flaky(ValueError("bad request"))
+    with pytest.raises(ValueError):
+        asyncio.run(call_with_retries(flaky, NO_WAIT, breaker=breaker, is_retryable=lambda exc: False))
+    assert flaky.calls == 1
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_breaker_opens_rejects_then_lets_one_probe_through():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=30.0)
+    flaky = Flaky(Retryable(), Retryable())
+    with pytest.raises(Retryable):
+        asyncio.run(call_with_retries(flaky, RetryPolicy(max_retries=1, base_delay=0.0), breaker=breaker))
+    assert breaker.state == CircuitBreaker.OPEN
+
+    rejected = Flaky()
+    with pytest.raises(CircuitOpenError) as raised:
+        asyncio.run(call_with_retries(rejected, NO_WAIT, breaker=breaker))
+    assert rejected.calls == 0
+    assert 0 < raised.value.retry_after <= 30.0
+
+    breaker.opened_at = time.monotonic() - 31.0  # cool-down over
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # only one probe at a time
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_failed_probe_reopens_and_cancelled_probe_is_released():
+    breaker = CircuitBreaker("test", failure_threshold=5)
+    breaker.state = CircuitBreaker.HALF_OPEN
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    breaker.state = CircuitBreaker.HALF_OPEN
+    breaker.release_probe()
+
+    async def cancelled():
+        raise asyncio.CancelledError()
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(call_with_retries(cancelled, NO_WAIT, breaker=breaker))
+    breaker.before_call()  # the abandoned probe does not block the next one
+
+def test_load_shedding_is_not_retried_or_counted_as_upstream_failure():
+    breaker = CircuitBreaker("test", failure_threshold=1)
+    flaky = Flaky(ServiceUnavailableError("queue full", retry_after=1.0))
+    with pytest.raises(ServiceUnavailableError):
+        asyncio.run(call_with_retries(flaky, NO_WAIT, breaker=breaker))
+    assert flaky.calls == 1
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_fast_call_is_not_hedged():
+    calls = []
+
+    async def make_call():
+        calls.append(1)
+        return "fast"
+
+    assert asyncio.run(hedged(make_call, 0.05)) == "fast"
+    assert len(calls) == 1
+
+def test_slow_call_is_hedged_and_the_loser_cancelled():
+    calls = []
+
+    async def make_call():
+        calls.append(asyncio.current_task())
+        await asyncio.sleep(10 if len(calls) == 1 else 0.01)
+        return len(calls)
+
+    async def run():
+        result = await hedged(make_call, 0.01)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(run()) == 2
+    assert calls[0].cancelled()
+
+def test_hedge_falls_back_to_the_other_call_when_one_fails():
+    calls = []
+
+    async def make_call():
+        calls.append(1)
+        if len(calls) == 1:
+            await asyncio.sleep(0.03)
+            return "slow but fine"
+        raise Retryable()
+
+    assert asyncio.run(hedged(make_call, 0.01)) == "slow but fine"
+
+def test_cancelling_the_caller_cancels_every_hedged_call():
+    calls = []
+
+    async def make_call():
+        calls.append(asyncio.current_task())
+        await asyncio.sleep(10)
+
+    async def run(cancel_after):
+        calls.clear()
+        task = asyncio.ensure_future(hedged(make_call, 0.02))
+        await asyncio.sleep(cancel_after)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0)
+        return [call.cancelled() for call in calls]
+
+    assert asyncio.run(run(0.005)) == [True]  # before the hedge delay
+    assert asyncio.run(run(0.05)) == [True, True]
+
+def test_hedge_survives_a_cancelled_losing_call():
+    calls = []
+
+    async def make_call():
+        calls.append(asyncio.current_task())
+        if len(calls) == 1:
+            await asyncio.sleep(10)
+        await asyncio.sleep(0.05)
+        return len(calls)
+
+    async def run():
+        result = asyncio.ensure_future(hedged(make_call, 0.01))
+        while len(calls) < 2:
+            await asyncio.sleep(0.005)
+        calls[0].cancel()  # e.g. cancelled by shutdown, not by hedged() itself
+        return await result
+
+    assert asyncio.run(run()) == 2
+
+def test_hedge_raises_cancelled_when_every_call_was_cancelled():
+    calls = []
+
+    async def make_call():
+        calls.append(asyncio.current_task())
+        await asyncio.sleep(10)
+
+    async def run():
+        result = asyncio.ensure_future(hedged(make_call, 0.01))
+        while len(calls) < 2:
+            await asyncio.sleep(0.005)
+        for call in calls:
+            call.cancel()
+        await result
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(run())
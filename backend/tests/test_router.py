@@ -0,0 +1,70 @@
+import pytest
+from app.models import router as router_module
+from app.models.router import ModelRouter, _parse_overrides
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(router_module.time, "monotonic", clock)
+    return clock
+
+@pytest.fixture
+def router(monkeypatch, clock):
+    monkeypatch.setattr(router_module.settings, "LLM_ROUTES", "")
+    monkeypatch.setattr(router_module.settings, "LLM_ROUTER_WINDOW_SECONDS", 60.0)
+    monkeypatch.setattr(router_module.settings, "LLM_ROUTER_MIN_SAMPLES", 5)
+    return ModelRouter("primary", "fast")
+
+def test_without_a_distinct_fast_model_everything_uses_the_primary():
+    assert ModelRouter("primary", "primary").route("quiz", 10, 10) == "primary"
+    assert ModelRouter("primary").route("quiz", 10, 10) == "primary"
+
+def test_small_requests_go_to_the_fast_model(router):
+    assert router.route("quiz", 1000, 600) == "fast"
+    assert router.stats()["routes"]["quiz"] == {"small": 1}
+
+def test_requested_output_size_decides_the_route(router):
+    # Same prompt: 5 questions fit the fast budget, 50 do not
+    assert router.route("quiz", 1000, 5 * 120) == "fast"
+    assert router.route("quiz", 1000, 50 * 120) == "primary"
+    # Uncapped calls without an estimate assume DEFAULT_OUTPUT_TOKENS
+    assert router.route("quiz", 1000, None) == "fast"
+    assert router.route("quiz", 2000, None) == "primary"
+
+def test_unknown_callers_and_zero_budgets_stay_on_the_primary(router):
+    assert router.route("something-else", 10, 10) == "primary"
+    assert router.route("ats", 10, 10) == "primary"
+
+def test_slow_primary_falls_back_to_fast_until_samples_age_out(router, clock):
+    for _ in range(4):
+        router.observe("primary", "ats", 30.0)
+    # Too few samples to judge
+    assert router.p95("primary", "ats") is None
+    assert router.route("ats", 3000, 1000) == "primary"
+
+    router.observe("primary", "ats", 30.0)
+    assert router.p95("primary", "ats") == 30.0
+    assert router.route("ats", 3000, 1000) == "fast"
+    assert router.stats()["routes"]["ats"] == {"default": 1, "slo_fallback": 1}
+
+    clock.now += 61.0
+    assert router.p95("primary", "ats") is None
+    assert router.route("ats", 3000, 1000) == "primary"
+
+def test_p95_ignores_a_few_outliers(router):
+    for seconds in [1.0] * 19 + [60.0]:
+        router.observe("primary", "ats", seconds)
+    assert router.p95("primary", "ats") == 1.0
+    assert router.route("ats", 3000, 1000) == "primary"
+
+def test_route_overrides(monkeypatch, clock):
+    assert _parse_overrides("quiz=3000/6, bad, ats=x/1") == {"quiz": {"fast_max_tokens": 3000, "slo_seconds": 6.0}}
+    monkeypatch.setattr(router_module.settings, "LLM_ROUTES", "quiz=100/6")
+    assert ModelRouter("primary", "fast").route("quiz", 50, 100) == "primary"
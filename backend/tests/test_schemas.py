@@ -0,0 +1,11 @@
+import pytest
+from pydantic import ValidationError
+from app.models.schemas import ATSBatchRequest
+
+def test_batch_ranking_sizes_must_not_be_negative():
+    request = ATSBatchRequest(job_description="Python", top_n=3, limit=0)
+    assert (request.top_n, request.limit) == (3, 0)
+    assert ATSBatchRequest(job_description="Python").limit is None
+    for field in ("top_n", "limit"):
+        with pytest.raises(ValidationError):
+            ATSBatchRequest(job_description="Python", **{field: -1})
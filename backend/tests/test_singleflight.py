@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+from app.core.singleflight import SingleFlight
+
+def test_concurrent_calls_with_the_same_key_share_one_execution():
+    flight = SingleFlight()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def run():
+        results = await asyncio.gather(*(flight.do("key", work) for _ in range(5)), flight.do("other", work))
+        return results, flight.in_flight()
+
+    results, in_flight = asyncio.run(run())
+    assert results == ["result"] * 6
+    assert len(runs) == 2
+    assert flight.stats() == {"executed": 2, "coalesced": 4, "in_flight": 0}
+    assert in_flight == 0
+
+def test_errors_reach_every_waiter_and_the_key_is_released():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream failed")
+
+    async def run():
+        results = await asyncio.gather(flight.do("key", fail), flight.do("key", fail), return_exceptions=True)
+        assert not flight.is_running("key")
+        # The failure is not remembered: the next call executes again
+        again = await flight.do("key", lambda: asyncio.sleep(0, result="ok"))
+        return results, again
+
+    results, again = asyncio.run(run())
+    assert [str(result) for result in results] == ["upstream failed", "upstream failed"]
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert again == "ok"
+    assert flight.executed == 2
+
+def test_one_waiter_cancelling_does_not_cancel_shared_work():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def run():
+        leaving = asyncio.ensure_future(flight.do("key", work))
+        staying = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0.01)
+        leaving.cancel()
+        return await staying, leaving.cancelled()
+
+    assert asyncio.run(run()) == ("done", True)
+
+def test_last_waiter_cancelling_cancels_the_work():
+    flight = SingleFlight()
+
+    async def run():
+        reached_end = []
+
+        async def work():
+            await asyncio.sleep(10)
+            reached_end.append(True)
+
+        waiter = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0)
+        return reached_end, flight.is_running("key")
+
+    assert asyncio.run(run()) == ([], False)
@@ -0,0 +1,19 @@
+import asyncio
+import threading
+from app.services import vectorstore as vectorstore_module
+from app.services.vectorstore import VectorStore
+
+def test_delete_documents_purges_cache_off_the_loop(monkeypatch, tmp_path):
+    monkeypatch.setattr(vectorstore_module.settings, "VECTOR_STORE_PATH", str(tmp_path))
+    purged = []
+    monkeypatch.setattr(vectorstore_module.llm_client, "invalidate_cache",
+                        lambda tag: purged.append((tag, threading.current_thread())))
+    store = VectorStore()
+    store.documents["file-1"] = [{"text": "resume", "embedding": [], "embedding_model": "", "metadata": {}}]
+    store.profiles["file-1"] = {"skills": ["python"]}
+
+    asyncio.run(store.delete_documents("file-1"))
+    assert "file-1" not in store.documents
+    assert "file-1" not in store.profiles
+    assert [tag for tag, _ in purged] == ["file-1"]
+    assert purged[0][1] is not threading.main_thread()
@@ -0,0 +1,53 @@
+import asyncio
+from app.services import warmup
+from app.services.warmup import WarmupService
+
+def test_warmed_artifact_is_served_once(monkeypatch):
+    cards = [{"front": "Python", "back": "Language"}]
+    generated = []
+
+    async def fake_generate(self, file_id, artifact):
+        generated.append((file_id, artifact))
+        return cards
+
+    monkeypatch.setattr(warmup.settings, "WARMUP_ENABLED", True)
+    monkeypatch.setattr(warmup.settings, "WARMUP_ARTIFACTS", "flashcards")
+    monkeypatch.setattr(warmup.vectorstore, "get_documents", lambda file_id: [{"text": "resume"}])
+    monkeypatch.setattr(WarmupService, "_generate", fake_generate)
+
+    async def run():
+        service = WarmupService()
+        service.schedule("file-1")
+        await asyncio.gather(*service._tasks["file-1"].values())
+        first = await service.lookup("file-1", "flashcards", count=10)
+        second = await service.lookup("file-1", "flashcards", count=10)
+        return service, first, second
+
+    service, first, second = asyncio.run(run())
+    assert first == cards
+    # The second request falls through to a fresh generation
+    assert second is None
+    assert generated == [("file-1", "flashcards")]
+    assert service.stats()["hit"] == 1
+    assert service.stats()["miss"] == 1
+
+def test_consumed_artifact_is_not_served_again_from_the_llm_cache(monkeypatch, upstream):
+    upstream.payload = "- Python developer\n- Built APIs with FastAPI"
+    monkeypatch.setattr(warmup.settings, "WARMUP_ENABLED", True)
+    monkeypatch.setattr(warmup.settings, "WARMUP_ARTIFACTS", "notes")
+    monkeypatch.setattr(warmup.vectorstore, "get_documents", lambda file_id: [{"text": "SKILLS\nPython, FastAPI"}])
+
+    async def run():
+        service = WarmupService()
+        service.schedule("file-1")
+        await asyncio.gather(*service._tasks["file-1"].values())
+        warmed = await service.lookup("file-1", "notes", style="concise")
+        # What /api/notes does once lookup() falls through
+        assert await service.lookup("file-1", "notes", style="concise") is None
+        fresh = await warmup.notes_service.generate_notes("file-1", style="concise")
+        return warmed, fresh
+
+    warmed, fresh = asyncio.run(run())
+    assert warmed == fresh == upstream.payload
+    # The second request generated again instead of reading the warm call from the cache
+    assert upstream.calls == 2
@@ -26,9 +26,10 @@ export default function NotesPage() {
 
     setLoading(true);
     setError(null);
+    setNotes('');
 
     try {
-      const response = await fetch(`${API_BASE}/notes`, {
+      const response = await fetch(`${API_BASE}/notes/stream`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -44,8 +45,30 @@ export default function NotesPage() {
         throw new Error(error.detail || 'Failed to generate notes');
       }
 
-      const data = await response.json();
-      setNotes(data.notes);
+      // Read server-sent events and append tokens as they arrive
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+        for (const rawEvent of events) {
+          const eventLine = rawEvent.split('\n').find((line) => line.startsWith('event: '));
+          const dataLine = rawEvent.split('\n').find((line) => line.startsWith('data: '));
+          if (!dataLine) continue;
+          const event = eventLine ? eventLine.slice(7) : 'message';
+          const data = JSON.parse(dataLine.slice(6));
+          if (event === 'token') {
+            setNotes((previous) => previous + data.text);
+          } else if (event === 'error') {
+            throw new Error(data.detail || 'Failed to generate notes');
+          }
+        }
+      }
     } catch (err) {
       setError(err.message || 'Failed to generate notes');
     } finally {